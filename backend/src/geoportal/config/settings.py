@@ -18,6 +18,7 @@ class AppSubSettings(BaseSettings):
     NAME: str = 'Geoportal API'
     VERSION: str = '0.1.0'
     API_PREFIX: str = '/api/v1'
+    METRICS_ENABLED: bool = True
 
     model_config = SettingsConfigDict(
         env_file=ENV_FILE, env_prefix='APP_', extra='ignore'
@@ -29,6 +30,31 @@ class MapServerSubSettings(BaseSettings):
 
     URL: str = 'http://localhost:8080'
 
+    POOL_MAX_CONNECTIONS: int = 100
+    POOL_MAX_KEEPALIVE: int = 20
+    POOL_KEEPALIVE_EXPIRY: float = 30.0
+    POOL_TIMEOUT: float = 10.0
+    CONNECT_TIMEOUT: float = 5.0
+    READ_TIMEOUT: float = 60.0
+    HTTP2: bool = False
+    MAX_CONCURRENCY: int = 32
+
+    CACHE_ENABLED: bool = True
+    CACHE_DIR: str = '.cache/tiles'
+    CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    CACHE_MEMORY_MAX_ITEMS: int = 4096
+    CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_INVALIDATION_ENABLED: bool = True
+    CACHE_INVALIDATION_CHANNEL: str = 'geo_changes'
+    # Pixels around a feature that its symbols and labels may cover.
+    CACHE_INVALIDATION_MARGIN: int = 64
+    TILE_MAX_AGE: int = 24 * 60 * 60
+    CAPABILITIES_MAX_AGE: int = 5 * 60
+
+    METATILE_ENABLED: bool = False
+    METATILE_SIZE: int = 4
+    METATILE_BUFFER: int = 0
+
     model_config = SettingsConfigDict(
         env_file=ENV_FILE, env_prefix='MAPSERVER_', extra='ignore'
     )
@@ -43,6 +69,22 @@ class DbSubSettings(BaseSettings):
     PORT: int = 5432
     NAME: str = 'geoportaldb'
 
+    ECHO: bool = False
+    POOL_SIZE: int = 10
+    POOL_MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30.0
+    POOL_RECYCLE_SECONDS: int = 30 * 60
+    POOL_PRE_PING: bool = True
+    STATEMENT_TIMEOUT_MS: int = 30_000
+    # Applies instead of STATEMENT_TIMEOUT_MS to the cursor of layer exports.
+    EXPORT_STATEMENT_TIMEOUT_MS: int = 30 * 60_000
+    PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
+    REPLICA_URIS: list[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+
     @computed_field
     @property
     def ASYNC_DATABASE_URI(self) -> PostgresDsn:
@@ -67,10 +109,26 @@ class DbSubSettings(BaseSettings):
 class AuthSubSettings(BaseSettings):
     """Authentication specific settings."""
 
+    class JwtBackend(str, Enum):
+        JOSE = 'jose'
+        HMAC = 'hmac'
+
     SECRET_KEY: str = 'your_super_secret_key'
     ALGORITHM: str = 'HS256'
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    HASH_WORKERS: int = 4
+    HASH_MAX_QUEUE: int = 64
+
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_MAX_ITEMS: int = 10000
+
+    TOKEN_CLAIMS_ENABLED: bool = False
+    TOKEN_VERSION_REFRESH_SECONDS: float = 30.0
+
+    JWT_BACKEND: JwtBackend = JwtBackend.JOSE
+    TOKEN_CACHE_SIZE: int = 4096
+
     model_config = SettingsConfigDict(
         env_file=ENV_FILE, env_prefix='AUTH_', extra='ignore'
     )
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, TypeVar
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.core.metrics import metrics_registry
+from src.geoportal.core.security import get_password_hash, verify_password
+
+T = TypeVar('T')
+
+hash_queue_time = metrics_registry.histogram(
+    'password_hash_queue_seconds', 'Time bcrypt jobs waited for a worker.'
+)
+hash_run_time = metrics_registry.histogram(
+    'password_hash_duration_seconds', 'Time bcrypt jobs ran on a worker.'
+)
+hash_rejected = metrics_registry.counter(
+    'password_hash_rejected', 'bcrypt jobs rejected because the queue was full.'
+)
+hash_queue_depth = metrics_registry.gauge(
+    'password_hash_queue_depth', 'bcrypt jobs waiting for a worker.'
+)
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many password hashing jobs are already waiting."""
+
+
+@dataclass(slots=True)
+class HasherStats:
+    """Counters of the password hashing pool."""
+
+    completed: int = 0
+    rejected: int = 0
+    queue_time_seconds: float = 0.0
+    run_time_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so hashing in threads keeps the event loop
+    serving other requests. Jobs beyond the pool size wait in a bounded
+    queue; when it is full PasswordHasherBusyError is raised at once, so
+    a login storm is shed instead of queueing without limit.
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.stats = HasherStats()
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs submitted and not yet finished."""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker."""
+        return max(0, self._pending - self.workers)
+
+    async def hash(self, password: str) -> str:
+        """Hashes a plain password."""
+        return await self._run(get_password_hash, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str | Exception]:
+        """
+        Hashes passwords in parallel, for bulk operations.
+
+        At most one job per worker is submitted at a time, so interactive
+        logins queue behind a bounded number of bulk jobs. Failed jobs are
+        returned as exceptions in place of their hash.
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                return await self.hash(password)
+
+        return await asyncio.gather(
+            *(hash_one(password) for password in passwords), return_exceptions=True
+        )
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifies a plain password against a hashed password."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stops the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self.queue_depth >= self.max_queue:
+            self.stats.rejected += 1
+            hash_rejected.labels().inc()
+            raise PasswordHasherBusyError('Password hashing queue is full')
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='password-hasher'
+            )
+
+        submitted = time.perf_counter()
+
+        def job() -> tuple[T, float, float]:
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, waited, ran = await loop.run_in_executor(self._executor, job)
+        finally:
+            self._pending -= 1
+        self.stats.completed += 1
+        self.stats.queue_time_seconds += waited
+        self.stats.run_time_seconds += ran
+        hash_queue_time.labels().observe(waited)
+        hash_run_time.labels().observe(ran)
+        return result
+
+
+def create_password_hasher() -> PasswordHasher:
+    """Creates the password hasher from settings."""
+    settings = get_settings()
+    return PasswordHasher(
+        workers=settings.auth.HASH_WORKERS,
+        max_queue=settings.auth.HASH_MAX_QUEUE,
+    )
+
+
+password_hasher = create_password_hasher()
+metrics_registry.add_collector(
+    lambda: hash_queue_depth.labels().set(password_hasher.queue_depth)
+)
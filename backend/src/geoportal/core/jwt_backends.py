@@ -0,0 +1,84 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Protocol
+
+from jose import JWTError, jwt
+
+
+class TokenDecodeError(Exception):
+    """Raised when a token is malformed, has a bad signature or expired."""
+
+
+class JwtBackend(Protocol):
+    """Verifies and decodes signed JWTs."""
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict[str, Any]:
+        """Returns the verified claims or raises TokenDecodeError."""
+
+
+class JoseBackend:
+    """Verifies tokens with python-jose, supporting every jose algorithm."""
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict[str, Any]:
+        try:
+            return jwt.decode(token, key, algorithms=algorithms)
+        except JWTError as exc:
+            raise TokenDecodeError(str(exc)) from exc
+
+
+class HmacBackend:
+    """
+    Verifies HS256/HS384/HS512 tokens with the standard library only.
+
+    Skips the generic claim validation of python-jose and only checks the
+    signature and the `exp` and `nbf` claims, which is all the tokens
+    issued by `create_access_token` rely on.
+    """
+
+    DIGESTS = {
+        'HS256': hashlib.sha256,
+        'HS384': hashlib.sha384,
+        'HS512': hashlib.sha512,
+    }
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict[str, Any]:
+        try:
+            signing_input, _, signature = token.rpartition('.')
+            encoded_header, _, encoded_payload = signing_input.partition('.')
+            header = json.loads(_b64decode(encoded_header))
+            algorithm = header.get('alg')
+            if algorithm not in algorithms or algorithm not in self.DIGESTS:
+                raise TokenDecodeError(f'Algorithm {algorithm!r} is not allowed')
+            expected = hmac.new(
+                key.encode(), signing_input.encode(), self.DIGESTS[algorithm]
+            ).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise TokenDecodeError('Signature verification failed')
+            claims = json.loads(_b64decode(encoded_payload))
+        except (ValueError, TypeError, AttributeError) as exc:
+            raise TokenDecodeError('Malformed token') from exc
+        if not isinstance(claims, dict):
+            raise TokenDecodeError('Malformed token')
+
+        now = time.time()
+        try:
+            if 'exp' in claims and now >= float(claims['exp']):
+                raise TokenDecodeError('Signature has expired')
+            if 'nbf' in claims and now < float(claims['nbf']):
+                raise TokenDecodeError('The token is not yet valid')
+        except (TypeError, ValueError) as exc:
+            raise TokenDecodeError('Invalid time claim') from exc
+        return claims
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+
+JWT_BACKENDS: dict[str, type[JwtBackend]] = {
+    'jose': JoseBackend,
+    'hmac': HmacBackend,
+}
@@ -0,0 +1,222 @@
+from bisect import bisect_left
+from typing import Callable, Generic, TypeVar
+
+# Seconds; covers sub-millisecond queries up to slow renders.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+C = TypeVar('C')
+
+
+class CounterValue:
+    """A monotonically increasing value."""
+
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        return [f'{name}{labels} {format_value(self.value)}']
+
+
+class GaugeValue:
+    """A value that goes up and down."""
+
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        return [f'{name}{labels} {format_value(self.value)}']
+
+
+class HistogramValue:
+    """Observations counted into buckets by upper bound."""
+
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # The last slot counts observations above every bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        prefix = f'{labels[:-1]},' if labels else '{'
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{prefix}le="{format_value(bound)}"}} {cumulative}'
+            )
+        lines.append(f'{name}_sum{labels} {format_value(self.sum)}')
+        lines.append(f'{name}_count{labels} {cumulative}')
+        return lines
+
+
+class Metric(Generic[C]):
+    """
+    A named metric with one value per combination of label values.
+
+    Values are plain attributes updated on the event loop, so recording
+    costs a dict lookup; they are per process, like the other stats.
+    """
+
+    kind = ''
+    # Appended to the name of the sample family, e.g. `_total` for counters.
+    suffix = ''
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        factory: Callable[[], C],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._factory = factory
+        self._values: dict[tuple[str, ...], C] = {}
+
+    def labels(self, *values: str) -> C:
+        """Returns the value for the given label values, in labelnames order."""
+        value = self._values.get(values)
+        if value is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}')
+            value = self._values[values] = self._factory()
+        return value
+
+    def render(self) -> list[str]:
+        # HELP and TYPE must name the family the samples belong to.
+        family = self.name + self.suffix
+        lines = [
+            f'# HELP {family} {self.documentation}',
+            f'# TYPE {family} {self.kind}',
+        ]
+        for values, value in self._values.items():
+            labels = ','.join(
+                f'{name}="{escape_label(label)}"'
+                for name, label in zip(self.labelnames, values)
+            )
+            lines.extend(value.samples(family, f'{{{labels}}}' if labels else ''))
+        return lines
+
+
+class Counter(Metric[CounterValue]):
+    kind = 'counter'
+    suffix = '_total'
+
+
+class Gauge(Metric[GaugeValue]):
+    kind = 'gauge'
+
+
+class Histogram(Metric[HistogramValue]):
+    kind = 'histogram'
+
+
+class MetricsRegistry:
+    """
+    Holds the application metrics and renders them for Prometheus.
+
+    Collectors run on every scrape and set gauges that are cheaper to read
+    from their source than to keep up to date, such as pool occupancy.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        """Registers a counter; `_total` is appended to its samples."""
+        return self._register(Counter(name, documentation, labelnames, CounterValue))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Gauge:
+        """Registers a gauge."""
+        return self._register(Gauge(name, documentation, labelnames, GaugeValue))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Registers a histogram with sorted bucket upper bounds."""
+        return self._register(
+            Histogram(name, documentation, labelnames, lambda: HistogramValue(buckets))
+        )
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Registers a callback run before every scrape."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+
+def escape_label(value: str) -> str:
+    """Escapes a label value for the exposition format."""
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_value(value: float) -> str:
+    """Formats a sample value, keeping integral values short."""
+    if value == float('inf'):
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+metrics_registry = MetricsRegistry()
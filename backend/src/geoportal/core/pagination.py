@@ -0,0 +1,50 @@
+import base64
+import json
+from typing import Any
+
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    """Encodes the sort key of the last returned row as an opaque cursor."""
+    data = json.dumps(values, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decodes a cursor created by `encode_cursor`.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (ValueError, TypeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if not isinstance(values, dict):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+async def count_rows(db: AsyncSession, table: Table, estimate: bool = False) -> int:
+    """
+    Counts the rows of a table.
+
+    With `estimate`, returns the planner estimate kept in `pg_class`, which
+    costs the same for any table size. Falls back to an exact count while
+    the table was never analyzed.
+    """
+    if estimate:
+        result = await db.execute(
+            text(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)'
+            ),
+            {'name': table.fullname},
+        )
+        estimated = result.scalar_one_or_none()
+        if estimated is not None and estimated >= 0:
+            return estimated
+    result = await db.execute(select(func.count()).select_from(table))
+    return result.scalar_one()
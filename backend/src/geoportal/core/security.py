@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, timezone
+from typing import Any
 from uuid import UUID
 
 from jose import jwt
@@ -23,15 +24,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(subject: UUID) -> str:
+def create_access_token(subject: UUID, claims: dict[str, Any] | None = None) -> str:
     """
     Creates a new JWT access token.
+
+    Extra `claims` are embedded as is, e.g. to issue self-contained tokens.
     """
     settings = get_settings()
-    expire = datetime.now(timezone.utc) + timedelta(
-        minutes=settings.auth.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
-    to_encode = {'exp': expire, 'sub': str(subject)}
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=settings.auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode = {**(claims or {}), 'exp': expire, 'iat': now, 'sub': str(subject)}
     encoded_jwt = jwt.encode(
         to_encode, settings.auth.SECRET_KEY, algorithm=settings.auth.ALGORITHM
     )
@@ -0,0 +1,90 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.geoportal.core.metrics import metrics_registry
+from src.geoportal.db.pool import WAIT_BUCKETS
+
+OPERATIONS = frozenset({'select', 'insert', 'update', 'delete'})
+# Connection info key holding start times of the statements being executed.
+QUERY_STARTED = 'metrics_query_started'
+
+db_query_duration = metrics_registry.histogram(
+    'db_query_duration_seconds',
+    'Time spent executing SQL statements.',
+    ('database', 'operation'),
+)
+db_query_errors = metrics_registry.counter(
+    'db_query_errors', 'SQL statements that failed.', ('database', 'operation')
+)
+db_pool_connections = metrics_registry.gauge(
+    'db_pool_connections',
+    'Connections of the engine pool by state.',
+    ('database', 'state'),
+)
+db_pool_checkouts = metrics_registry.counter(
+    'db_pool_checkouts', 'Connections checked out of the engine pool.', ('database',)
+)
+db_pool_timeouts = metrics_registry.counter(
+    'db_pool_timeouts',
+    'Checkouts that timed out waiting for a connection.',
+    ('database',),
+)
+db_pool_wait = metrics_registry.histogram(
+    'db_pool_wait_seconds',
+    'Time checkouts waited for a connection.',
+    ('database',),
+    buckets=WAIT_BUCKETS[:-1],
+)
+
+
+def statement_operation(statement: str) -> str:
+    """Returns the lower-cased leading SQL keyword of a DML statement."""
+    keyword = statement.lstrip()[:6].lower()
+    return keyword if keyword in OPERATIONS else 'other'
+
+
+def instrument_engine(engine: AsyncEngine, database: str) -> None:
+    """
+    Records statement timings, pool occupancy and checkout counters of an
+    engine.
+
+    Statements are timed with cursor execution events, which run in the
+    greenlet awaiting the driver, so the timings include the round trip.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault(QUERY_STARTED, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info[QUERY_STARTED].pop()
+        db_query_duration.labels(database, statement_operation(statement)).observe(
+            time.perf_counter() - started
+        )
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def handle_error(context):
+        if context.connection is not None:
+            started = context.connection.info.get(QUERY_STARTED)
+            if started:
+                started.pop()
+        operation = statement_operation(context.statement or '')
+        db_query_errors.labels(database, operation).inc()
+
+    def collect_pool() -> None:
+        pool = engine.pool
+        db_pool_connections.labels(database, 'checked_in').set(pool.checkedin())
+        db_pool_connections.labels(database, 'checked_out').set(pool.checkedout())
+        db_pool_connections.labels(database, 'overflow').set(max(0, pool.overflow()))
+        stats = pool.stats
+        db_pool_checkouts.labels(database).value = stats.checkouts
+        db_pool_timeouts.labels(database).value = stats.timeouts
+        wait = db_pool_wait.labels(database)
+        wait.counts = list(stats.wait_buckets)
+        wait.sum = stats.wait_seconds
+
+    metrics_registry.add_collector(collect_pool)
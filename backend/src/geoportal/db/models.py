@@ -1,6 +1,6 @@
 from src.geoportal.db.associations import user_role_association
 from src.geoportal.db.base_class import Base
 from src.geoportal.modules.roles.models import Role
-from src.geoportal.modules.users.models import User
+from src.geoportal.modules.users.models import User, UserDeletion
 
-__all__ = ['Base', 'User', 'Role', 'user_role_association']
+__all__ = ['Base', 'User', 'UserDeletion', 'Role', 'user_role_association']
@@ -0,0 +1,60 @@
+import bisect
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds, in seconds, of the connection wait time histogram buckets.
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+
+@dataclass(slots=True)
+class PoolStats:
+    """Counters of connection checkouts from an engine pool."""
+
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds: float = 0.0
+    wait_buckets: list[int] = field(default_factory=lambda: [0] * len(WAIT_BUCKETS))
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_seconds += seconds
+        self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def histogram(self) -> dict[str, int]:
+        """Returns cumulative wait counts by bucket upper bound."""
+        cumulative, total = {}, 0
+        for bound, count in zip(WAIT_BUCKETS, self.wait_buckets):
+            total += count
+            cumulative['+Inf' if bound == float('inf') else str(bound)] = total
+        return cumulative
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool recording how long checkouts wait for a connection.
+
+    Every engine has its own pool and so its own `stats`, which are kept
+    when the engine recreates its pool.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> 'InstrumentedPool':
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.checkouts += 1
+        self.stats.observe_wait(time.perf_counter() - started)
+        return connection
@@ -0,0 +1,118 @@
+import asyncio
+import itertools
+import logging
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Replication delay in seconds; zero when the replica replayed all WAL it
+# received, so an idle primary does not make replicas look stale.
+REPLICATION_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+# Cookie telling that a client recently wrote and must read from the primary.
+STICKY_COOKIE = 'db_primary_until'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin among those lagging little enough.
+
+    Replication lag is polled in the background; a replica that cannot be
+    reached or falls more than `max_lag_seconds` behind gets no reads until
+    it catches up. Without healthy replicas reads go to the primary.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+    ) -> None:
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.lag: dict[int, float | None] = {
+            index: None for index in range(len(engines))
+        }
+        self._counter = itertools.count()
+        self._task: asyncio.Task[None] | None = None
+
+    def choose(self) -> AsyncEngine | None:
+        """Returns a healthy replica engine, or None to use the primary."""
+        healthy = [
+            engine
+            for index, engine in enumerate(self.engines)
+            if (lag := self.lag[index]) is not None and lag <= self.max_lag_seconds
+        ]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def start(self) -> None:
+        """Starts polling replication lag in the background."""
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        """Stops polling and closes the replica pools."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    async def check(self) -> None:
+        """Measures the replication lag of every replica."""
+        lags = await asyncio.gather(*(self._measure(engine) for engine in self.engines))
+        self.lag = dict(enumerate(lags))
+
+    async def _measure(self, engine: AsyncEngine) -> float | None:
+        try:
+            async with engine.connect() as conn:
+                return float(await conn.scalar(REPLICATION_LAG_QUERY))
+        except Exception as exc:
+            logger.warning('Replica %s is unavailable: %s', engine.url.host, exc)
+            return None
+
+    async def _poll(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval_seconds)
+
+
+def is_sticky(request: Request) -> bool:
+    """Checks whether a client must read its own recent writes."""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_sticky(response: Response, seconds: float) -> None:
+    """Routes the client's reads to the primary for `seconds`."""
+    response.set_cookie(
+        key=STICKY_COOKIE,
+        value=f'{time.time() + seconds:.0f}',
+        max_age=int(seconds),
+        httponly=True,
+        samesite='lax',
+    )
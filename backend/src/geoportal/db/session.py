@@ -1,17 +1,57 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from src.geoportal.config.get_settings import get_settings
+from src.geoportal.db.metrics import instrument_engine
+from src.geoportal.db.pool import InstrumentedPool
+from src.geoportal.db.replicas import ReplicaSet, is_sticky
 
 settings = get_settings()
 
-engine = create_async_engine(
-    str(settings.db.ASYNC_DATABASE_URI),
-    echo=settings.app.ENV.value == 'dev',
-    future=True,
+
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Creates an engine with the pool settings of the application.
+    """
+    return create_async_engine(
+        url,
+        echo=settings.db.ECHO,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_size=settings.db.POOL_SIZE,
+        max_overflow=settings.db.POOL_MAX_OVERFLOW,
+        pool_timeout=settings.db.POOL_TIMEOUT,
+        pool_recycle=settings.db.POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.db.POOL_PRE_PING,
+        connect_args={
+            'prepared_statement_cache_size': settings.db.PREPARED_STATEMENT_CACHE_SIZE,
+            # Applied per connection, so every session gets the timeout.
+            'server_settings': {
+                'statement_timeout': str(settings.db.STATEMENT_TIMEOUT_MS)
+            },
+        },
+    )
+
+
+engine = create_engine(str(settings.db.ASYNC_DATABASE_URI))
+instrument_engine(engine, 'primary')
+
+replica_set = ReplicaSet(
+    engines=[create_engine(url) for url in settings.db.REPLICA_URIS],
+    max_lag_seconds=settings.db.REPLICA_MAX_LAG_SECONDS,
+    check_interval_seconds=settings.db.REPLICA_CHECK_INTERVAL_SECONDS,
 )
 
+for replica in replica_set.engines:
+    instrument_engine(replica, f'replica:{replica.url.host}')
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -19,6 +59,16 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+def read_session() -> AsyncSession:
+    """
+    Creates a session for reads, bound to a healthy replica if there is one.
+    """
+    replica = replica_set.choose()
+    if replica is None:
+        return AsyncSessionLocal()
+    return AsyncSessionLocal(bind=replica)
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to get database session.
@@ -28,3 +78,18 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get a read-only database session.
+
+    Reads go to a replica, unless the client wrote recently and must see
+    its own changes.
+    """
+    session = AsyncSessionLocal() if is_sticky(request) else read_session()
+    async with session:
+        try:
+            yield session
+        finally:
+            await session.close()
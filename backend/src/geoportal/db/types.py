@@ -0,0 +1,33 @@
+from sqlalchemy.types import UserDefinedType
+
+
+class Geometry(UserDefinedType):
+    """
+    PostGIS geometry column type.
+
+    Geometries are never loaded into Python objects; queries convert them
+    inside PostgreSQL with functions such as ST_AsGeoJSON or ST_AsMVTGeom.
+    """
+
+    cache_ok = True
+
+    def __init__(self, geometry_type: str = 'GEOMETRY', srid: int = 4326) -> None:
+        self.geometry_type = geometry_type
+        self.srid = srid
+
+    def get_col_spec(self, **kw) -> str:
+        return f'geometry({self.geometry_type}, {self.srid})'
+
+
+class Geography(UserDefinedType):
+    """
+    PostGIS geography type, used to cast geometries for distances in meters.
+
+    Rendered without modifiers so `CAST(geom AS geography)` matches
+    expression indexes on `(geom::geography)`.
+    """
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw) -> str:
+        return 'geography'
@@ -1,14 +1,46 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 
 from src.geoportal.config.get_settings import get_settings
 from src.geoportal.config.settings import Settings
+from src.geoportal.core.hashing import PasswordHasherBusyError, password_hasher
+from src.geoportal.db.replicas import SAFE_METHODS, mark_sticky
+from src.geoportal.db.session import replica_set
 from src.geoportal.modules.auth.api.v1.router import router as auth_router
+from src.geoportal.modules.auth.revocation import token_revocations
+from src.geoportal.modules.features.api.v1.router import router as features_router
 from src.geoportal.modules.health.api.v1.router import router as health_router
+from src.geoportal.modules.metrics.api.v1.router import router as metrics_router
+from src.geoportal.modules.metrics.middleware import MetricsMiddleware
 from src.geoportal.modules.proxy.api.v1.router import router as proxy_router
+from src.geoportal.modules.proxy.client import upstream_client
+from src.geoportal.modules.proxy.invalidation import cache_invalidator
 from src.geoportal.modules.roles.api.v1.router import router as roles_router
+from src.geoportal.modules.tiles.api.v1.router import router as tiles_router
 from src.geoportal.modules.users.api.v1.router import router as users_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts and stops long-lived resources together with the application.
+    """
+    await upstream_client.start()
+    await cache_invalidator.start()
+    await token_revocations.start()
+    await replica_set.start()
+    try:
+        yield
+    finally:
+        await replica_set.stop()
+        await token_revocations.stop()
+        await cache_invalidator.stop()
+        await upstream_client.stop()
+        password_hasher.shutdown()
+
+
 def create_application() -> FastAPI:
     """
     Creates and configures the FastAPI application instance.
@@ -19,9 +51,12 @@ def create_application() -> FastAPI:
         title=settings.app.NAME,
         description='API for the Sverdlovsk Oblast Tourist Objects Geoportal',
         version=settings.app.VERSION,
+        lifespan=lifespan,
     )
 
+    register_middlewares(app, settings)
     register_routers(app, settings)
+    register_exception_handlers(app)
 
     @app.get('/')
     async def root():
@@ -30,15 +65,55 @@ def create_application() -> FastAPI:
     return app
 
 
+def register_middlewares(app: FastAPI, settings: Settings):
+    """
+    Adds HTTP middlewares.
+    """
+    if settings.app.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    if settings.db.REPLICA_URIS:
+
+        @app.middleware('http')
+        async def read_your_writes(request: Request, call_next):
+            # Replicas may lag behind, so clients read their own writes
+            # from the primary for a while.
+            response = await call_next(request)
+            if request.method not in SAFE_METHODS and response.status_code < 400:
+                mark_sticky(response, settings.db.READ_YOUR_WRITES_SECONDS)
+            return response
+
+
 def register_routers(app: FastAPI, settings: Settings):
     """
     Includes all application routers.
     """
     app.include_router(auth_router, prefix=settings.app.API_PREFIX)
+    app.include_router(features_router, prefix=settings.app.API_PREFIX)
     app.include_router(health_router, prefix=settings.app.API_PREFIX)
     app.include_router(proxy_router, prefix=settings.app.API_PREFIX)
     app.include_router(roles_router, prefix=settings.app.API_PREFIX)
+    app.include_router(tiles_router, prefix=settings.app.API_PREFIX)
     app.include_router(users_router, prefix=settings.app.API_PREFIX)
+    if settings.app.METRICS_ENABLED:
+        # Scrapers expect metrics at a fixed path, outside the API version.
+        app.include_router(metrics_router)
+
+
+def register_exception_handlers(app: FastAPI):
+    """
+    Maps application errors to HTTP responses.
+    """
+
+    @app.exception_handler(PasswordHasherBusyError)
+    async def password_hasher_busy_handler(
+        request: Request, exc: PasswordHasherBusyError
+    ) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={'detail': 'Too many authentication requests, retry later'},
+            headers={'Retry-After': '1'},
+        )
 
 
 app = create_application()
@@ -4,10 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.core.hashing import password_hasher
 from src.geoportal.core.security import create_access_token
 from src.geoportal.db.session import get_db
-from src.geoportal.modules.auth.api.v1.schemas import Token
+from src.geoportal.modules.auth.api.v1.schemas import HasherStatsResponse, Token
 from src.geoportal.modules.auth.crud import auth_crud
+from src.geoportal.modules.auth.dependencies import require_role
 
 router = APIRouter(prefix='/auth', tags=['Authentication'])
 
@@ -33,7 +36,10 @@ async def login_for_access_token(
             detail='Incorrect username or password',
             headers={'WWW-Authenticate': 'Bearer'},
         )
-    access_token = create_access_token(subject=uuid.UUID(str(user.id)))
+    claims = None
+    if get_settings().auth.TOKEN_CLAIMS_ENABLED:
+        claims = await auth_crud.token_claims(db, user)
+    access_token = create_access_token(subject=uuid.UUID(str(user.id)), claims=claims)
     response.set_cookie(
         key='access_token',
         value=access_token,
@@ -42,3 +48,21 @@ async def login_for_access_token(
         secure=False,
     )
     return {'access_token': access_token, 'token_type': 'bearer'}
+
+
+@router.get(
+    '/hasher/stats',
+    response_model=HasherStatsResponse,
+    dependencies=[Depends(require_role(['admin']))],
+)
+async def get_hasher_stats() -> HasherStatsResponse:
+    """
+    Returns password hashing pool counters, used to size the pool.
+    """
+    return HasherStatsResponse(
+        workers=password_hasher.workers,
+        max_queue=password_hasher.max_queue,
+        pending=password_hasher.pending,
+        queue_depth=password_hasher.queue_depth,
+        **password_hasher.stats.as_dict(),
+    )
@@ -15,3 +15,31 @@ class TokenPayload(BaseModel):
 
     sub: UUID = Field(..., description='Subject of the token (user ID)')
     exp: int | None = Field(None, description='Expiration time claim')
+    iat: int | None = Field(None, description='Issued at time claim')
+    roles: list[str] | None = Field(
+        None, description='Role names, present in self-contained tokens'
+    )
+    active: bool | None = Field(
+        None, description='Whether the user is active, present in self-contained tokens'
+    )
+    ver: int | None = Field(None, description='Token version of the user')
+
+    @property
+    def has_claims(self) -> bool:
+        """Whether the token carries enough claims to authorize without the DB."""
+        return self.roles is not None and self.active is not None
+
+
+class HasherStatsResponse(BaseModel):
+    """Occupancy and counters of the password hashing pool."""
+
+    workers: int = Field(..., description='Threads hashing passwords.')
+    max_queue: int = Field(..., description='Jobs allowed to wait for a thread.')
+    pending: int = Field(..., description='Jobs submitted and not yet finished.')
+    queue_depth: int = Field(..., description='Jobs waiting for a free thread.')
+    completed: int = Field(..., description='Jobs finished since startup.')
+    rejected: int = Field(..., description='Jobs rejected with a full queue.')
+    queue_time_seconds: float = Field(
+        ..., description='Total time jobs waited for a thread.'
+    )
+    run_time_seconds: float = Field(..., description='Total time spent hashing.')
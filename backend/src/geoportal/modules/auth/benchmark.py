@@ -0,0 +1,64 @@
+"""
+Measures the per-request cost of access token verification.
+
+Compares the JWT backends with and without the verified token cache, on
+a token as issued by the login endpoint.
+
+Usage:
+    python -m src.geoportal.modules.auth.benchmark --iterations 20000
+"""
+
+import argparse
+import timeit
+import uuid
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.core.jwt_backends import JWT_BACKENDS
+from src.geoportal.core.security import create_access_token
+from src.geoportal.modules.auth.tokens import TokenVerifier
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=20000,
+        help='Verifications per measurement (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='Measurements per case, the best is reported (default: %(default)s)',
+    )
+    return parser.parse_args(argv)
+
+
+def benchmark(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    token = create_access_token(
+        uuid.uuid4(), claims={'roles': ['user'], 'active': True, 'ver': 0}
+    )
+    print(f'{"backend":<8} {"cache":<6} {"µs/request":>11}')
+    for name, backend in JWT_BACKENDS.items():
+        for cache_size in (0, settings.auth.TOKEN_CACHE_SIZE):
+            verifier = TokenVerifier(
+                backend=backend(),
+                secret_key=settings.auth.SECRET_KEY,
+                algorithm=settings.auth.ALGORITHM,
+                cache_size=cache_size,
+            )
+            best = min(
+                timeit.repeat(
+                    lambda: verifier.verify(token),
+                    number=args.iterations,
+                    repeat=args.repeat,
+                )
+            )
+            cache = 'on' if cache_size else 'off'
+            print(f'{name:<8} {cache:<6} {best / args.iterations * 1e6:>11.2f}')
+
+
+if __name__ == '__main__':
+    benchmark(parse_args())
@@ -1,6 +1,8 @@
+from typing import Any
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.geoportal.core.security import verify_password
+from src.geoportal.core.hashing import password_hasher
 from src.geoportal.db.models import User
 from src.geoportal.modules.users.crud import user_crud
 
@@ -19,9 +21,23 @@ class AuthCRUD:
         user = await user_crud.get_by_username(db, username)
         if not user:
             return None
-        if not verify_password(password, str(user.hashed_password)):
+        if not await password_hasher.verify(password, str(user.hashed_password)):
             return None
         return user
 
+    async def token_claims(self, db: AsyncSession, user: User) -> dict[str, Any]:
+        """
+        Returns the claims of a self-contained access token for a user.
+
+        They let read paths authorize without loading the user, see
+        `get_current_principal`.
+        """
+        await db.refresh(user, attribute_names=['roles'])
+        return {
+            'roles': sorted(role.name for role in user.roles),
+            'active': bool(user.is_active),
+            'ver': user.token_version,
+        }
+
 
 auth_crud = AuthCRUD()
@@ -2,14 +2,17 @@ from typing import Any, Callable, Coroutine, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.geoportal.config.get_settings import get_settings
+from src.geoportal.core.jwt_backends import TokenDecodeError
 from src.geoportal.db.models import User
-from src.geoportal.db.session import get_db
+from src.geoportal.db.session import get_read_db
 from src.geoportal.modules.auth.api.v1.schemas import TokenPayload
+from src.geoportal.modules.auth.principal import Principal, principal_cache
+from src.geoportal.modules.auth.revocation import token_revocations
+from src.geoportal.modules.auth.tokens import token_verifier
 from src.geoportal.modules.users.crud import user_crud
 
 settings = get_settings()
@@ -29,46 +32,89 @@ async def get_token(
     return request.cookies.get('access_token')
 
 
-async def get_current_user(
-    token: Optional[str] = Depends(get_token), db: AsyncSession = Depends(get_db)
-) -> User:
-    """
-    Dependency to get the current authenticated user.
-
-    Decodes the JWT token, validates it, and fetches the user from the database.
-    """
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
+
+
+async def get_token_payload(token: Optional[str] = Depends(get_token)) -> TokenPayload:
+    """
+    Dependency to get the verified claims of the access token.
+    """
     if token is None:
-        raise credentials_exception
+        raise credentials_exception()
     try:
-        payload = jwt.decode(
-            token, settings.auth.SECRET_KEY, algorithms=[settings.auth.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
-        raise credentials_exception
+        return token_verifier.verify(token)
+    except (TokenDecodeError, ValidationError):
+        raise credentials_exception()
+
+
+async def get_current_user(
+    token_data: TokenPayload = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """
+    Dependency to get the current authenticated user.
+
+    Decodes the JWT token, validates it, and fetches the user from the
+    principal cache or the database.
+    """
+    user = principal_cache.get(token_data.sub)
+    if user is not None:
+        return user
 
     user = await user_crud.get_by_id(db, user_id=token_data.sub)
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
+    principal_cache.set(user)
     return user
 
 
-def require_role(required_roles: list[str]) -> Callable[[User], Coroutine[Any, Any, None]]:
+async def get_current_principal(
+    token_data: TokenPayload = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_read_db),
+) -> Principal:
+    """
+    Dependency to get the identity and roles of the current request.
+
+    Self-contained tokens are trusted without loading the user unless
+    their token version was revoked; other tokens, and all tokens until
+    token versions are loaded, fall back to the user.
+    """
+    if (
+        settings.auth.TOKEN_CLAIMS_ENABLED
+        and token_data.has_claims
+        and token_revocations.is_loaded
+    ):
+        if token_revocations.is_revoked(token_data):
+            raise credentials_exception()
+        return Principal(
+            id=token_data.sub,
+            roles=frozenset(token_data.roles),
+            is_active=token_data.active,
+        )
+    return Principal.from_user(await get_current_user(token_data, db))
+
+
+def require_role(
+    required_roles: list[str],
+) -> Callable[[Principal], Coroutine[Any, Any, None]]:
     """
     Dependency factory to require a specific set of roles.
     """
 
-    async def role_checker(current_user: User = Depends(get_current_user)) -> None:
+    async def role_checker(
+        principal: Principal = Depends(get_current_principal),
+    ) -> None:
         """
-        Checks if the current user has any of the required roles.
+        Checks if the current user is active and has any of the required roles.
         """
-        user_roles = {role.name for role in current_user.roles}
-        if not any(role in user_roles for role in required_roles):
+        if not principal.is_active or not any(
+            role in principal.roles for role in required_roles
+        ):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail='The user does not have the required permissions',
@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.db.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The identity and roles a request is authorized with."""
+
+    id: UUID
+    roles: frozenset[str]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> 'Principal':
+        return cls(
+            id=user.id,
+            roles=frozenset(role.name for role in user.roles),
+            is_active=bool(user.is_active),
+        )
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users with their roles loaded.
+
+    Saves the user lookup on every authenticated request. `UserCRUD` and
+    `RoleCRUD` invalidate entries when users or roles change; other
+    worker processes only see such changes after the TTL, so it is kept
+    short. Cached users are detached from any session and read-only.
+    """
+
+    def __init__(self, ttl_seconds: float, max_items: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self._users: OrderedDict[UUID, tuple[User, float]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_items > 0
+
+    def get(self, user_id: UUID) -> User | None:
+        """Returns a cached user, or None if missing or expired."""
+        item = self._users.get(user_id)
+        if item is None:
+            return None
+        user, expires_at = item
+        if time.monotonic() >= expires_at:
+            del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        return user
+
+    def set(self, user: User) -> None:
+        """Caches a user loaded with its roles."""
+        if not self.enabled:
+            return
+        self._users[user.id] = (user, time.monotonic() + self.ttl_seconds)
+        self._users.move_to_end(user.id)
+        while len(self._users) > self.max_items:
+            self._users.popitem(last=False)
+
+    def invalidate(self, user_id: UUID) -> None:
+        """Drops a user, after it was updated, deleted or got new roles."""
+        self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drops every user, after a role was changed."""
+        self._users.clear()
+
+
+def create_principal_cache() -> PrincipalCache:
+    """Creates the principal cache from settings."""
+    settings = get_settings()
+    return PrincipalCache(
+        ttl_seconds=settings.auth.PRINCIPAL_CACHE_TTL_SECONDS,
+        max_items=settings.auth.PRINCIPAL_CACHE_MAX_ITEMS,
+    )
+
+
+principal_cache = create_principal_cache()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import extract, func, literal, select
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.db.models import User, UserDeletion
+from src.geoportal.db.session import AsyncSessionLocal
+from src.geoportal.modules.auth.api.v1.schemas import TokenPayload
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocations:
+    """
+    In-memory check of access tokens against current user token versions.
+
+    Tokens carrying claims are accepted without loading the user, as long
+    as their version is not older than the user's current token version.
+    Only users whose version was ever raised are kept, others are at
+    version 0, along with users deleted within the token lifetime. Both
+    are loaded periodically; changes made by this process are applied at
+    once, changes made by other processes after the next refresh.
+    """
+
+    def __init__(
+        self, enabled: bool, refresh_seconds: float, token_lifetime_seconds: float
+    ) -> None:
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self._versions: dict[UUID, int] = {}
+        # Deletion times; tokens of users deleted longer ago have expired.
+        self._deleted: dict[UUID, float] = {}
+        self._loaded_at: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether user token versions were loaded at least once."""
+        return self._loaded_at is not None
+
+    def is_revoked(self, payload: TokenPayload) -> bool:
+        """Checks whether a token with claims no longer reflects its user."""
+        if payload.sub in self._deleted:
+            return True
+        return (payload.ver or 0) < self._versions.get(payload.sub, 0)
+
+    def set_version(self, user_id: UUID, version: int) -> None:
+        """Records a new token version, revoking older tokens of the user."""
+        self._versions[user_id] = version
+
+    def mark_deleted(self, user_id: UUID) -> None:
+        """Revokes every token of a deleted user."""
+        self._versions.pop(user_id, None)
+        self._deleted[user_id] = time.time()
+
+    async def refresh(self) -> None:
+        """Loads raised token versions and recent user deletions."""
+        loaded_at = time.time()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, User.token_version).where(
+                    # Inlined, so the partial index matches.
+                    User.token_version > literal(0, literal_execute=True)
+                )
+            )
+            versions = {user_id: version for user_id, version in result}
+            result = await db.execute(
+                select(
+                    UserDeletion.user_id, extract('epoch', UserDeletion.deleted_at)
+                ).where(
+                    UserDeletion.deleted_at
+                    > func.now() - timedelta(seconds=self.token_lifetime_seconds)
+                )
+            )
+            deleted = {user_id: float(deleted_at) for user_id, deleted_at in result}
+        # Keeps deletions of this process the query may have missed.
+        expired = loaded_at - self.token_lifetime_seconds
+        for user_id, deleted_at in self._deleted.items():
+            if deleted_at > expired:
+                deleted.setdefault(user_id, deleted_at)
+        self._versions = versions
+        self._deleted = deleted
+        self._loaded_at = loaded_at
+
+    async def start(self) -> None:
+        """Starts refreshing versions in the background."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """Stops refreshing versions."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception('Failed to refresh token versions')
+            await asyncio.sleep(self.refresh_seconds)
+
+
+def create_token_revocations() -> TokenRevocations:
+    """Creates the token revocation check from settings."""
+    settings = get_settings()
+    return TokenRevocations(
+        enabled=settings.auth.TOKEN_CLAIMS_ENABLED,
+        refresh_seconds=settings.auth.TOKEN_VERSION_REFRESH_SECONDS,
+        token_lifetime_seconds=settings.auth.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+
+token_revocations = create_token_revocations()
@@ -0,0 +1,84 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.core.jwt_backends import JWT_BACKENDS, JwtBackend
+from src.geoportal.modules.auth.api.v1.schemas import TokenPayload
+
+
+@dataclass(slots=True)
+class TokenCacheStats:
+    """Counters of the verified token cache."""
+
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class TokenVerifier:
+    """
+    Verifies access tokens and remembers the verified ones.
+
+    A page of map tiles sends the same token dozens of times, so verified
+    payloads are kept in a bounded LRU keyed by a digest of the token and
+    returned until the token expires. Only tokens that passed signature
+    verification are stored, so the cache cannot be used to forge one.
+    """
+
+    def __init__(
+        self,
+        backend: JwtBackend,
+        secret_key: str,
+        algorithm: str,
+        cache_size: int,
+    ) -> None:
+        self.backend = backend
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.cache_size = cache_size
+        self.stats = TokenCacheStats()
+        self._payloads: OrderedDict[bytes, TokenPayload] = OrderedDict()
+
+    def verify(self, token: str) -> TokenPayload:
+        """
+        Returns the payload of a valid token.
+
+        Raises TokenDecodeError or pydantic.ValidationError otherwise.
+        """
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        payload = self._payloads.get(key)
+        if payload is not None:
+            if payload.exp is None or time.time() < payload.exp:
+                self._payloads.move_to_end(key)
+                self.stats.hits += 1
+                return payload
+            del self._payloads[key]
+            self.stats.expirations += 1
+
+        self.stats.misses += 1
+        claims = self.backend.decode(token, self.secret_key, [self.algorithm])
+        payload = TokenPayload(**claims)
+        if self.cache_size > 0:
+            self._payloads[key] = payload
+            if len(self._payloads) > self.cache_size:
+                self._payloads.popitem(last=False)
+        return payload
+
+
+def create_token_verifier() -> TokenVerifier:
+    """Creates the token verifier from settings."""
+    settings = get_settings()
+    return TokenVerifier(
+        backend=JWT_BACKENDS[settings.auth.JWT_BACKEND.value](),
+        secret_key=settings.auth.SECRET_KEY,
+        algorithm=settings.auth.ALGORITHM,
+        cache_size=settings.auth.TOKEN_CACHE_SIZE,
+    )
+
+
+token_verifier = create_token_verifier()
@@ -0,0 +1,303 @@
+from enum import Enum
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.geoportal.db.session import get_read_db, read_session
+from src.geoportal.modules.auth.dependencies import require_role
+from src.geoportal.modules.features.api.v1.schemas import (
+    ClusterLayer,
+    ExportFormat,
+    FeatureClustersResponse,
+    FeatureInfoResponse,
+    FeatureLayer,
+    NearestFeatureResponse,
+    SearchLayer,
+    SearchResponse,
+)
+from src.geoportal.modules.features.crud import INFO_SRIDS, BBox, feature_crud
+from src.geoportal.modules.features.export import (
+    EXPORT_FORMATS,
+    accepts_gzip,
+    feature_exporter,
+)
+from src.geoportal.modules.features.search import feature_search
+
+router = APIRouter(
+    prefix='/features',
+    tags=['Features'],
+    dependencies=[Depends(require_role(['user']))],
+)
+
+GEOJSON_MEDIA_TYPE = 'application/geo+json'
+
+
+def parse_layers(value: str, layers: type[Enum] = FeatureLayer) -> list[str]:
+    """
+    Parses comma separated layer names, dropping duplicates.
+
+    Raises HTTPException for names that are not members of `layers`.
+    """
+    try:
+        return list(dict.fromkeys(layers(name).value for name in value.split(',')))
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+
+def parse_optional_bbox(value: str | None) -> BBox | None:
+    """Parses an optional bbox, raising HTTPException if it is malformed."""
+    if value is None:
+        return None
+    try:
+        return feature_crud.parse_bbox(value)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+
+@router.get('/info', response_model=FeatureInfoResponse)
+async def get_feature_info(
+    x: float = Query(..., description='Click position X in the request CRS'),
+    y: float = Query(..., description='Click position Y in the request CRS'),
+    resolution: float = Query(
+        ..., gt=0, description='Map resolution in CRS units per pixel'
+    ),
+    layers: str = Query(..., description='Comma separated layers to query'),
+    crs: str = Query('EPSG:3857', description='EPSG:3857 or EPSG:4326'),
+    tolerance: int = Query(5, ge=0, le=50, description='Search radius in pixels'),
+    limit: int = Query(10, ge=1, le=100, description='Features per layer'),
+    db: AsyncSession = Depends(get_read_db),
+) -> FeatureInfoResponse:
+    """
+    Returns the features of all requested layers near a map click.
+
+    Replaces one WMS GetFeatureInfo request per layer with a single query.
+    """
+    authority, _, code = crs.upper().partition(':')
+    if authority != 'EPSG' or not code.isdigit() or int(code) not in INFO_SRIDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Unsupported CRS {crs!r}',
+        )
+    features = await feature_crud.get_feature_info(
+        db,
+        parse_layers(layers),
+        x,
+        y,
+        srid=int(code),
+        radius=resolution * max(tolerance, 1),
+        limit=limit,
+    )
+    return FeatureInfoResponse(features=features)
+
+
+@router.get('/nearest', response_model=NearestFeatureResponse)
+async def get_nearest_features(
+    lon: float = Query(..., ge=-180, le=180, description='EPSG:4326 longitude'),
+    lat: float = Query(..., ge=-90, le=90, description='EPSG:4326 latitude'),
+    layers: str = Query(
+        ','.join(layer.value for layer in FeatureLayer),
+        description='Comma separated layers to search',
+    ),
+    limit: int = Query(10, ge=1, le=100, description='Number of features'),
+    max_distance: float | None = Query(
+        None, gt=0, description='Search radius in meters'
+    ),
+    db: AsyncSession = Depends(get_read_db),
+) -> NearestFeatureResponse:
+    """
+    Returns the features of the requested layers nearest to a position.
+    """
+    features = await feature_crud.get_nearest(
+        db, parse_layers(layers), lon, lat, limit, max_distance
+    )
+    return NearestFeatureResponse(features=features)
+
+
+SEARCH_LAYERS_DEFAULT = ','.join(layer.value for layer in SearchLayer)
+
+
+@router.get('/search', response_model=SearchResponse)
+async def search_features(
+    q: str = Query(..., min_length=1, max_length=200, description='Search text'),
+    layers: str = Query(
+        SEARCH_LAYERS_DEFAULT, description='Comma separated layers to search'
+    ),
+    bbox: str | None = Query(None, description='EPSG:4326 bbox as minx,miny,maxx,maxy'),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+) -> SearchResponse:
+    """
+    Searches features by name and description, best matches first.
+
+    Accepts web search syntax: quoted phrases, `or` and `-` exclusions.
+    Names are also matched fuzzily, so small misspellings are tolerated.
+    """
+    results = await feature_search.search(
+        db,
+        parse_layers(layers, SearchLayer),
+        q,
+        bbox=parse_optional_bbox(bbox),
+        limit=limit,
+    )
+    return SearchResponse(results=results)
+
+
+@router.get('/autocomplete', response_model=SearchResponse)
+async def autocomplete_features(
+    q: str = Query(..., min_length=1, max_length=100, description='Typed text'),
+    layers: str = Query(
+        SEARCH_LAYERS_DEFAULT, description='Comma separated layers to search'
+    ),
+    bbox: str | None = Query(None, description='EPSG:4326 bbox as minx,miny,maxx,maxy'),
+    limit: int = Query(10, ge=1, le=20),
+    db: AsyncSession = Depends(get_read_db),
+) -> SearchResponse:
+    """
+    Suggests features whose name or description words start with the
+    typed words. Repeated prefixes are answered from a short-lived cache.
+    """
+    results = await feature_search.autocomplete(
+        db,
+        parse_layers(layers, SearchLayer),
+        q,
+        bbox=parse_optional_bbox(bbox),
+        limit=limit,
+    )
+    return SearchResponse(results=results)
+
+
+@router.get('/{layer}/clusters', response_model=FeatureClustersResponse)
+async def get_feature_clusters(
+    layer: ClusterLayer,
+    bbox: str = Query(..., description='EPSG:4326 bbox as minx,miny,maxx,maxy'),
+    zoom: int = Query(..., ge=0, le=24, description='Web Mercator zoom level'),
+    limit: int = Query(5000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_read_db),
+) -> FeatureClustersResponse:
+    """
+    Returns the points of a layer merged into grid clusters for a zoom.
+
+    Cells are about 64 px wide at the requested zoom, so the response
+    stays small however dense the layer is.
+    """
+    try:
+        parsed_bbox = feature_crud.parse_bbox(bbox)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+    clusters = await feature_crud.get_clusters(
+        db, layer.value, zoom, parsed_bbox, limit
+    )
+    return FeatureClustersResponse(layer=layer, zoom=zoom, clusters=clusters)
+
+
+@router.get('/{layer}/export', response_class=StreamingResponse)
+async def export_features(
+    request: Request,
+    layer: FeatureLayer,
+    export_format: ExportFormat = Query(ExportFormat.GEOJSONSEQ, alias='format'),
+    bbox: str | None = Query(None, description='EPSG:4326 bbox as minx,miny,maxx,maxy'),
+    filters: list[str] = Query(
+        [],
+        alias='filter',
+        description='Property filters as name:value, may be repeated',
+    ),
+    after: int | None = Query(
+        None, description='Only features with a larger id, to resume an export'
+    ),
+    spatial_index: bool = Query(
+        True, alias='index', description='FlatGeobuf: include the spatial index'
+    ),
+) -> StreamingResponse:
+    """
+    Downloads a whole layer as newline-delimited GeoJSON, FlatGeobuf or
+    CSV with WKT geometries.
+
+    Features are streamed from the database as they are read, gzipped if
+    the client accepts it. GeoJSON and CSV are in id order: an interrupted
+    download is resumed by passing the last received id as `after`.
+    """
+    try:
+        parsed_bbox = feature_crud.parse_bbox(bbox) if bbox else None
+        parsed_filters = feature_crud.parse_filters(layer.value, filters)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+    compress = accepts_gzip(request.headers.get('accept-encoding'))
+
+    async def body():
+        # Dependency sessions are closed before a streaming body is sent.
+        async with read_session() as db:
+            async for chunk in feature_exporter.stream(
+                db,
+                layer.value,
+                export_format.value,
+                bbox=parsed_bbox,
+                filters=parsed_filters,
+                after=after,
+                spatial_index=spatial_index,
+                compress=compress,
+            ):
+                yield chunk
+
+    output = EXPORT_FORMATS[export_format.value]
+    headers = {
+        'Content-Disposition': (
+            f'attachment; filename="{layer.value}.{output.extension}"'
+        ),
+        'Vary': 'Accept-Encoding',
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    return StreamingResponse(body(), media_type=output.media_type, headers=headers)
+
+
+@router.get('/{layer}', response_class=StreamingResponse)
+async def get_features(
+    layer: FeatureLayer,
+    bbox: str | None = Query(None, description='EPSG:4326 bbox as minx,miny,maxx,maxy'),
+    filters: list[str] = Query(
+        [],
+        alias='filter',
+        description='Property filters as name:value, may be repeated',
+    ),
+    limit: int = Query(1000, ge=1, le=10000),
+    zoom: int | None = Query(
+        None, ge=0, le=24, description='Map zoom, selects simplified geometries'
+    ),
+) -> StreamingResponse:
+    """
+    Returns layer features as a GeoJSON FeatureCollection.
+
+    With a zoom, lines and polygons are simplified to what that zoom can
+    show, from precomputed versions.
+    """
+    try:
+        query = feature_crud.feature_query(
+            layer.value,
+            bbox=feature_crud.parse_bbox(bbox) if bbox else None,
+            filters=feature_crud.parse_filters(layer.value, filters),
+            limit=limit,
+            zoom=zoom,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+    async def body():
+        # Dependency sessions are closed before a streaming body is sent.
+        async with read_session() as db:
+            async for chunk in feature_crud.stream_collection(db, query):
+                yield chunk
+
+    return StreamingResponse(body(), media_type=GEOJSON_MEDIA_TYPE)
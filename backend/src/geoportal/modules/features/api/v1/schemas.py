@@ -0,0 +1,102 @@
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class FeatureLayer(str, Enum):
+    """Layers of the `geo` schema served by the feature API."""
+
+    ATTRACTION = 'attraction'
+    MUSEUM = 'museum'
+    PARK = 'park'
+    BOUNDARY = 'boundary'
+
+
+class ClusterLayer(str, Enum):
+    """Point layers served as grid clusters."""
+
+    ATTRACTION = 'attraction'
+    MUSEUM = 'museum'
+
+
+class SearchLayer(str, Enum):
+    """Layers searchable by name and description."""
+
+    ATTRACTION = 'attraction'
+    MUSEUM = 'museum'
+    PARK = 'park'
+
+
+class ExportFormat(str, Enum):
+    """Formats layers are exported in."""
+
+    GEOJSONSEQ = 'geojsonseq'
+    FLATGEOBUF = 'flatgeobuf'
+    CSV = 'csv'
+
+
+class FeatureInfo(BaseModel):
+    """A feature found near a map click."""
+
+    layer: FeatureLayer
+    id: int
+    properties: dict[str, Any]
+    distance: float = Field(..., description='Distance in units of the request CRS')
+
+
+class FeatureInfoResponse(BaseModel):
+    """Features found near a map click, nearest first within each layer."""
+
+    features: list[FeatureInfo]
+
+
+class NearestFeature(BaseModel):
+    """A feature found near a position."""
+
+    layer: FeatureLayer
+    id: int
+    properties: dict[str, Any]
+    distance: float = Field(..., description='Distance in meters')
+
+
+class NearestFeatureResponse(BaseModel):
+    """Features of all requested layers, nearest first."""
+
+    features: list[NearestFeature]
+
+
+class SearchResult(BaseModel):
+    """A feature matching a search text."""
+
+    layer: SearchLayer
+    id: int
+    name: str | None
+    rank: float = Field(..., description='Relevance, higher is better')
+    longitude: float = Field(..., description='A point on the feature')
+    latitude: float = Field(..., description='A point on the feature')
+
+
+class SearchResponse(BaseModel):
+    """Features of all requested layers matching a search text."""
+
+    results: list[SearchResult]
+
+
+class FeatureCluster(BaseModel):
+    """Points of a layer merged into one marker at the requested zoom."""
+
+    longitude: float = Field(..., description='Centroid of the clustered points')
+    latitude: float = Field(..., description='Centroid of the clustered points')
+    count: int = Field(..., description='Number of clustered points')
+    id: int | None = Field(
+        None, description='Feature id, set beyond the maximum cluster zoom'
+    )
+
+
+class FeatureClustersResponse(BaseModel):
+    """Clusters of a layer in a bbox, largest first."""
+
+    layer: ClusterLayer
+    zoom: int
+    clusters: list[FeatureCluster]
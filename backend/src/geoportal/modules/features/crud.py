@@ -0,0 +1,378 @@
+import math
+from typing import AsyncIterator
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    ColumnElement,
+    CompoundSelect,
+    Float,
+    Select,
+    Text,
+    cast,
+    func,
+    literal,
+    null,
+    select,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.geoportal.db.types import Geography
+from src.geoportal.modules.features.generalization import geometry_source
+from src.geoportal.modules.features.models import LAYER_MODELS, FeatureCluster
+
+BBox = tuple[float, float, float, float]
+
+# Columns not exposed as feature properties.
+NON_PROPERTY_COLUMNS = ('id', 'geom', 'search_vector')
+
+# Number of features fetched from the server side cursor at a time.
+STREAM_BATCH_SIZE = 500
+
+FEATURE_COLLECTION_START = '{"type":"FeatureCollection","features":['
+FEATURE_COLLECTION_END = ']}'
+
+# Projections a feature info click position can be given in.
+INFO_SRIDS = (3857, 4326)
+
+# Point layers aggregated into grid clusters by the `geo_cluster_change`
+# triggers. Zoom and grid must match the `add_feature_clusters` migration.
+CLUSTER_LAYERS = ('attraction', 'museum')
+CLUSTER_MAX_ZOOM = 16
+CELLS_PER_TILE = 4
+
+MERCATOR_HALF_WORLD = 20037508.342789244
+MERCATOR_MAX_LATITUDE = 85.0511287798066
+
+
+def to_mercator(lon: float, lat: float) -> tuple[float, float]:
+    """Projects EPSG:4326 coordinates to EPSG:3857."""
+    lat = max(-MERCATOR_MAX_LATITUDE, min(MERCATOR_MAX_LATITUDE, lat))
+    x = lon * MERCATOR_HALF_WORLD / 180
+    y = math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+    return x, y * MERCATOR_HALF_WORLD / math.pi
+
+
+def from_mercator(x: float, y: float) -> tuple[float, float]:
+    """Projects EPSG:3857 coordinates to EPSG:4326."""
+    lat = 2 * math.atan(math.exp(y * math.pi / MERCATOR_HALF_WORLD)) - math.pi / 2
+    return x * 180 / MERCATOR_HALF_WORLD, math.degrees(lat)
+
+
+def cell_range(bbox: BBox, zoom: int) -> tuple[int, int, int, int]:
+    """Returns the first and last grid cells covering an EPSG:4326 bbox."""
+    cells = CELLS_PER_TILE << zoom
+    last = cells - 1
+    min_x, min_y = to_mercator(bbox[0], bbox[1])
+    max_x, max_y = to_mercator(bbox[2], bbox[3])
+
+    def cell(value: float) -> int:
+        index = math.floor(
+            (value + MERCATOR_HALF_WORLD) * cells / (2 * MERCATOR_HALF_WORLD)
+        )
+        return max(0, min(last, index))
+
+    return cell(min_x), cell(min_y), cell(max_x), cell(max_y)
+
+
+class FeatureCRUD:
+    """
+    Read operations for the `geo` layer tables.
+
+    GeoJSON is built by PostgreSQL, one feature per row, so rows reach
+    Python as ready-made JSON text and are streamed to the client as they
+    are fetched.
+    """
+
+    def property_columns(self, layer: str) -> dict[str, Column]:
+        """Returns the attribute columns of a layer, by property name."""
+        table = LAYER_MODELS[layer].__table__
+        return {
+            column.name: column
+            for column in table.columns
+            if column.name not in NON_PROPERTY_COLUMNS
+        }
+
+    def parse_bbox(self, value: str) -> BBox:
+        """
+        Parses a `minx,miny,maxx,maxy` EPSG:4326 bbox.
+
+        Raises ValueError if the value is malformed.
+        """
+        parts = [float(part) for part in value.split(',')]
+        if len(parts) != 4 or parts[0] > parts[2] or parts[1] > parts[3]:
+            raise ValueError(f'Invalid bbox {value!r}')
+        return tuple(parts)
+
+    def parse_filters(self, layer: str, filters: list[str]) -> dict[str, object]:
+        """
+        Parses `name:value` property filters into typed values.
+
+        Raises ValueError for unknown properties or malformed values.
+        """
+        columns = self.property_columns(layer)
+        parsed = {}
+        for item in filters:
+            name, separator, value = item.partition(':')
+            if not separator:
+                raise ValueError(f'Filter {item!r} is not in the name:value form')
+            if name not in columns:
+                raise ValueError(f'Layer {layer!r} has no property {name!r}')
+            parsed[name] = columns[name].type.python_type(value)
+        return parsed
+
+    def feature_query(
+        self,
+        layer: str,
+        bbox: BBox | None = None,
+        filters: dict[str, object] | None = None,
+        limit: int = 1000,
+        zoom: int | None = None,
+    ) -> Select:
+        """
+        Builds a query returning GeoJSON features of a layer as text.
+
+        `bbox` is in EPSG:4326. `filters` match properties by equality.
+        With a `zoom`, lines and polygons are read from their generalized
+        version for that zoom.
+        """
+        table = LAYER_MODELS[layer].__table__
+        source, geom, _ = geometry_source(layer, zoom)
+        return (
+            select(self.feature_json(layer, geom))
+            .select_from(source)
+            .where(*self.feature_conditions(layer, geom, bbox, filters))
+            .order_by(table.c.id)
+            .limit(limit)
+        )
+
+    def feature_json(self, layer: str, geom: ColumnElement) -> ColumnElement[str]:
+        """Builds the GeoJSON text of a layer feature with geometry `geom`."""
+        table = LAYER_MODELS[layer].__table__
+        columns = self.property_columns(layer)
+        properties = func.json_build_object(
+            *(item for name, column in columns.items() for item in (name, column))
+        )
+        feature = func.json_build_object(
+            'type',
+            'Feature',
+            'id',
+            table.c.id,
+            'geometry',
+            cast(func.ST_AsGeoJSON(geom), JSON),
+            'properties',
+            properties,
+        )
+        return cast(feature, Text)
+
+    def feature_conditions(
+        self,
+        layer: str,
+        geom: ColumnElement,
+        bbox: BBox | None = None,
+        filters: dict[str, object] | None = None,
+    ) -> list[ColumnElement[bool]]:
+        """Builds the bbox and property filter conditions of a feature query."""
+        columns = self.property_columns(layer)
+        conditions = [columns[name] == value for name, value in (filters or {}).items()]
+        if bbox is not None:
+            conditions.append(geom.op('&&')(func.ST_MakeEnvelope(*bbox, 4326)))
+        return conditions
+
+    def feature_info_query(
+        self,
+        layers: list[str],
+        x: float,
+        y: float,
+        srid: int,
+        radius: float,
+        limit: int = 10,
+    ) -> CompoundSelect:
+        """
+        Builds one query finding the features of several layers near a point.
+
+        `x`, `y` and `radius` are in the units of `srid`. Features of each
+        layer are ordered by distance and capped at `limit`.
+        """
+        point = func.ST_SetSRID(func.ST_MakePoint(x, y), srid)
+        search_area = func.ST_Transform(func.ST_Expand(point, radius), 4326)
+        queries = []
+        for layer in layers:
+            table = LAYER_MODELS[layer].__table__
+            columns = self.property_columns(layer)
+            geom = func.ST_Transform(table.c.geom, srid)
+            distance = func.ST_Distance(geom, point)
+            properties = func.json_build_object(
+                *(item for name, column in columns.items() for item in (name, column)),
+                type_=JSON,
+            )
+            queries.append(
+                select(
+                    literal(layer).label('layer'),
+                    table.c.id,
+                    properties.label('properties'),
+                    distance.label('distance'),
+                )
+                .where(
+                    table.c.geom.op('&&')(search_area),
+                    func.ST_DWithin(geom, point, radius),
+                )
+                .order_by(distance)
+                .limit(limit)
+            )
+        return union_all(*queries)
+
+    def nearest_query(
+        self,
+        layers: list[str],
+        lon: float,
+        lat: float,
+        limit: int,
+        max_distance: float | None = None,
+    ) -> Select:
+        """
+        Builds one query finding the features of several layers nearest to
+        an EPSG:4326 position, nearest first.
+
+        Each layer is searched with KNN ordering on its `(geom::geography)`
+        GiST index, so only about `limit` index entries are visited per
+        layer. Distances and `max_distance` are in meters.
+        """
+        point = cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326), Geography)
+        queries = []
+        for layer in layers:
+            table = LAYER_MODELS[layer].__table__
+            columns = self.property_columns(layer)
+            geog = cast(table.c.geom, Geography)
+            properties = func.json_build_object(
+                *(item for name, column in columns.items() for item in (name, column)),
+                type_=JSON,
+            )
+            conditions = []
+            if max_distance is not None:
+                conditions.append(func.ST_DWithin(geog, point, max_distance))
+            queries.append(
+                select(
+                    literal(layer).label('layer'),
+                    table.c.id,
+                    properties.label('properties'),
+                    func.ST_Distance(geog, point).label('distance'),
+                )
+                .where(*conditions)
+                .order_by(geog.op('<->', return_type=Float)(point))
+                .limit(limit)
+            )
+        nearest = union_all(*queries).subquery()
+        return select(nearest).order_by(nearest.c.distance).limit(limit)
+
+    async def get_nearest(
+        self,
+        db: AsyncSession,
+        layers: list[str],
+        lon: float,
+        lat: float,
+        limit: int,
+        max_distance: float | None = None,
+    ) -> list[dict]:
+        """Returns the features of several layers nearest to a position."""
+        result = await db.execute(
+            self.nearest_query(layers, lon, lat, limit, max_distance)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def get_feature_info(
+        self,
+        db: AsyncSession,
+        layers: list[str],
+        x: float,
+        y: float,
+        srid: int,
+        radius: float,
+        limit: int = 10,
+    ) -> list[dict]:
+        """Returns the features of several layers near a point."""
+        result = await db.execute(
+            self.feature_info_query(layers, x, y, srid, radius, limit)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    def cluster_query(self, layer: str, zoom: int, bbox: BBox, limit: int) -> Select:
+        """
+        Builds a query returning the point clusters of a layer in a bbox.
+
+        Up to CLUSTER_MAX_ZOOM clusters are read from the precomputed grid,
+        so the cost depends on the number of cells in view rather than on
+        the number of points. Beyond it points are returned one by one.
+        """
+        if zoom > CLUSTER_MAX_ZOOM:
+            table = LAYER_MODELS[layer].__table__
+            return (
+                select(
+                    table.c.id,
+                    func.ST_X(table.c.geom).label('x'),
+                    func.ST_Y(table.c.geom).label('y'),
+                    literal(1).label('count'),
+                    literal(4326).label('srid'),
+                )
+                .where(table.c.geom.op('&&')(func.ST_MakeEnvelope(*bbox, 4326)))
+                .order_by(table.c.id)
+                .limit(limit)
+            )
+
+        clusters = FeatureCluster.__table__
+        min_x, min_y, max_x, max_y = cell_range(bbox, zoom)
+        return (
+            select(
+                null().label('id'),
+                (clusters.c.sum_x / cast(clusters.c.count, Float)).label('x'),
+                (clusters.c.sum_y / cast(clusters.c.count, Float)).label('y'),
+                clusters.c.count,
+                literal(3857).label('srid'),
+            )
+            .where(
+                clusters.c.layer == layer,
+                clusters.c.zoom == zoom,
+                clusters.c.cell_x.between(min_x, max_x),
+                clusters.c.cell_y.between(min_y, max_y),
+            )
+            .order_by(clusters.c.count.desc())
+            .limit(limit)
+        )
+
+    async def get_clusters(
+        self, db: AsyncSession, layer: str, zoom: int, bbox: BBox, limit: int
+    ) -> list[dict]:
+        """Returns the point clusters of a layer in a bbox, largest first."""
+        result = await db.execute(self.cluster_query(layer, zoom, bbox, limit))
+        clusters = []
+        for row in result.mappings():
+            lon, lat = (
+                from_mercator(row['x'], row['y'])
+                if row['srid'] == 3857
+                else (row['x'], row['y'])
+            )
+            clusters.append(
+                {
+                    'id': row['id'],
+                    'longitude': lon,
+                    'latitude': lat,
+                    'count': row['count'],
+                }
+            )
+        return clusters
+
+    async def stream_collection(
+        self, db: AsyncSession, query: Select
+    ) -> AsyncIterator[str]:
+        """Streams the features of `query` as a GeoJSON FeatureCollection."""
+        yield FEATURE_COLLECTION_START
+        separator = ''
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for features in result.scalars().partitions():
+            yield separator + ','.join(features)
+            separator = ','
+        yield FEATURE_COLLECTION_END
+
+
+feature_crud = FeatureCRUD()
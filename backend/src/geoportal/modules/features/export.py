@@ -0,0 +1,333 @@
+import asyncio
+import csv
+import io
+import tempfile
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import IO, AsyncIterator, Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Float,
+    Integer,
+    LargeBinary,
+    Select,
+    SmallInteger,
+    func,
+    not_,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.type_api import TypeEngine
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.core.metrics import metrics_registry
+from src.geoportal.modules.features import flatgeobuf
+from src.geoportal.modules.features.crud import STREAM_BATCH_SIZE, BBox, feature_crud
+from src.geoportal.modules.features.models import LAYER_MODELS
+
+settings = get_settings()
+
+GZIP_LEVEL = 6
+
+GEOMETRY_TYPES = {
+    'POINT': flatgeobuf.GeometryType.POINT,
+    'LINESTRING': flatgeobuf.GeometryType.LINESTRING,
+    'POLYGON': flatgeobuf.GeometryType.POLYGON,
+    'MULTIPOINT': flatgeobuf.GeometryType.MULTIPOINT,
+    'MULTILINESTRING': flatgeobuf.GeometryType.MULTILINESTRING,
+    'MULTIPOLYGON': flatgeobuf.GeometryType.MULTIPOLYGON,
+}
+
+exported_features = metrics_registry.counter(
+    'feature_export_features',
+    'Features written by layer exports.',
+    ('layer', 'format'),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ExportFormat:
+    """Response settings of an export format."""
+
+    media_type: str
+    extension: str
+
+
+EXPORT_FORMATS: dict[str, ExportFormat] = {
+    'geojsonseq': ExportFormat('application/geo+json-seq', 'geojsonl'),
+    'flatgeobuf': ExportFormat('application/flatgeobuf', 'fgb'),
+    'csv': ExportFormat('text/csv; charset=utf-8', 'csv'),
+}
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Returns whether an Accept-Encoding header allows gzip."""
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        if coding.strip().lower() != 'gzip':
+            continue
+        name, _, value = params.strip().partition('=')
+        try:
+            return name.strip() != 'q' or float(value) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def column_type(type_: TypeEngine) -> flatgeobuf.ColumnType:
+    """Maps a column type to a FlatGeobuf column type, strings by default."""
+    if isinstance(type_, Boolean):
+        return flatgeobuf.ColumnType.BOOL
+    if isinstance(type_, SmallInteger):
+        return flatgeobuf.ColumnType.SHORT
+    if isinstance(type_, BigInteger):
+        return flatgeobuf.ColumnType.LONG
+    if isinstance(type_, Integer):
+        return flatgeobuf.ColumnType.INT
+    if isinstance(type_, Float):
+        return flatgeobuf.ColumnType.DOUBLE
+    return flatgeobuf.ColumnType.STRING
+
+
+class FeatureExporter:
+    """
+    Streams whole layers as newline-delimited GeoJSON, FlatGeobuf or CSV.
+
+    Rows are read through a server-side cursor in id order and written as
+    they arrive, so memory does not grow with the layer. An export may be
+    resumed with the last id received, and runs under its own statement
+    timeout as it may take longer than API queries.
+    """
+
+    def __init__(self, statement_timeout_ms: int) -> None:
+        self.statement_timeout_ms = statement_timeout_ms
+
+    def export_query(
+        self,
+        layer: str,
+        columns: list,
+        bbox: BBox | None = None,
+        filters: dict[str, object] | None = None,
+        after: int | None = None,
+    ) -> Select:
+        """Builds a query returning `columns` of a layer's features by id."""
+        table = LAYER_MODELS[layer].__table__
+        conditions = feature_crud.feature_conditions(layer, table.c.geom, bbox, filters)
+        if after is not None:
+            conditions.append(table.c.id > after)
+        return select(*columns).where(*conditions).order_by(table.c.id)
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        layer: str,
+        export_format: str,
+        bbox: BBox | None = None,
+        filters: dict[str, object] | None = None,
+        after: int | None = None,
+        spatial_index: bool = True,
+        compress: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams the features of a layer in `export_format`.
+
+        Only features with an id above `after` are exported. Line formats
+        are in id order, so an interrupted download is resumed with the id
+        of its last complete line.
+        """
+        # Local to the export's transaction, which also holds the cursor.
+        await db.execute(
+            select(
+                func.set_config(
+                    'statement_timeout', str(self.statement_timeout_ms), True
+                )
+            )
+        )
+        if export_format == 'flatgeobuf':
+            chunks = self._flatgeobuf(db, layer, bbox, filters, after, spatial_index)
+        elif export_format == 'csv':
+            chunks = self._csv(db, layer, bbox, filters, after)
+        else:
+            chunks = self._geojsonseq(db, layer, bbox, filters, after)
+        if compress:
+            chunks = self._gzip(chunks)
+        async for chunk in chunks:
+            yield chunk
+
+    async def _geojsonseq(
+        self,
+        db: AsyncSession,
+        layer: str,
+        bbox: BBox | None,
+        filters: dict[str, object] | None,
+        after: int | None,
+    ) -> AsyncIterator[bytes]:
+        table = LAYER_MODELS[layer].__table__
+        query = self.export_query(
+            layer,
+            [feature_crud.feature_json(layer, table.c.geom)],
+            bbox,
+            filters,
+            after,
+        )
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for features in result.scalars().partitions():
+            exported_features.labels(layer, 'geojsonseq').inc(len(features))
+            yield ('\n'.join(features) + '\n').encode()
+
+    async def _csv(
+        self,
+        db: AsyncSession,
+        layer: str,
+        bbox: BBox | None,
+        filters: dict[str, object] | None,
+        after: int | None,
+    ) -> AsyncIterator[bytes]:
+        table = LAYER_MODELS[layer].__table__
+        columns = feature_crud.property_columns(layer)
+        query = self.export_query(
+            layer,
+            [table.c.id, *columns.values(), func.ST_AsText(table.c.geom)],
+            bbox,
+            filters,
+            after,
+        )
+        yield self._csv_rows([('id', *columns, 'wkt')])
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for rows in result.partitions():
+            exported_features.labels(layer, 'csv').inc(len(rows))
+            yield self._csv_rows(rows)
+
+    def _csv_rows(self, rows: Sequence[Sequence]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    async def _flatgeobuf(
+        self,
+        db: AsyncSession,
+        layer: str,
+        bbox: BBox | None,
+        filters: dict[str, object] | None,
+        after: int | None,
+        spatial_index: bool,
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams a FlatGeobuf file, by default with its packed R-tree.
+
+        The index precedes the features and orders them along a Hilbert
+        curve, so features are first encoded into a temporary file and
+        only their bounds and sizes are kept in memory. Without the index
+        features are written as they are read. Empty geometries are left
+        out, as they have no place in the index.
+        """
+        table = LAYER_MODELS[layer].__table__
+        properties = feature_crud.property_columns(layer)
+        columns = [('id', column_type(table.c.id.type))] + [
+            (name, column_type(column.type)) for name, column in properties.items()
+        ]
+        types = [column for _, column in columns]
+        geometry_type = GEOMETRY_TYPES.get(
+            table.c.geom.type.geometry_type, flatgeobuf.GeometryType.UNKNOWN
+        )
+        wkb = func.ST_AsBinary(func.ST_Force2D(table.c.geom), 'NDR', type_=LargeBinary)
+        query = self.export_query(
+            layer, [table.c.id, *properties.values(), wkb], bbox, filters, after
+        ).where(not_(func.ST_IsEmpty(table.c.geom)))
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+
+        if not spatial_index:
+            yield flatgeobuf.MAGIC + flatgeobuf.encode_header(
+                layer, geometry_type, columns, 0, None, 0
+            )
+            async for rows in result.partitions():
+                features = await asyncio.to_thread(self._encode_features, types, rows)
+                exported_features.labels(layer, 'flatgeobuf').inc(len(rows))
+                yield b''.join(feature for feature, _ in features)
+            return
+
+        with tempfile.TemporaryFile() as spool:
+            bounds = array('d')
+            offsets = array('Q')
+            sizes = array('Q')
+            async for rows in result.partitions():
+                await asyncio.to_thread(
+                    self._spool_features, spool, types, rows, bounds, offsets, sizes
+                )
+                exported_features.labels(layer, 'flatgeobuf').inc(len(rows))
+            if not sizes:
+                yield flatgeobuf.MAGIC + flatgeobuf.encode_header(
+                    layer, geometry_type, columns, 0, None, 0
+                )
+                return
+
+            tree = await asyncio.to_thread(flatgeobuf.PackedRTree, bounds, sizes)
+            yield flatgeobuf.MAGIC + flatgeobuf.encode_header(
+                layer, geometry_type, columns, len(sizes), tree.extent, tree.node_size
+            )
+            for chunk in tree.chunks():
+                yield chunk
+            for start in range(0, len(tree.order), STREAM_BATCH_SIZE):
+                yield await asyncio.to_thread(
+                    self._read_features,
+                    spool,
+                    offsets,
+                    sizes,
+                    tree.order[start : start + STREAM_BATCH_SIZE],
+                )
+
+    def _encode_features(
+        self, types: list[flatgeobuf.ColumnType], rows: Sequence[Sequence]
+    ) -> list[tuple[bytes, flatgeobuf.Bounds]]:
+        features = []
+        for *values, wkb in rows:
+            geometry = flatgeobuf.read_wkb(wkb)
+            properties = flatgeobuf.encode_properties(types, values)
+            features.append(
+                (flatgeobuf.encode_feature(geometry, properties), geometry.bounds())
+            )
+        return features
+
+    def _spool_features(
+        self,
+        spool: IO[bytes],
+        types: list[flatgeobuf.ColumnType],
+        rows: Sequence[Sequence],
+        bounds: array,
+        offsets: array,
+        sizes: array,
+    ) -> None:
+        position = spool.tell()
+        for feature, feature_bounds in self._encode_features(types, rows):
+            spool.write(feature)
+            bounds.extend(feature_bounds)
+            offsets.append(position)
+            sizes.append(len(feature))
+            position += len(feature)
+
+    def _read_features(
+        self, spool: IO[bytes], offsets: array, sizes: array, items: list[int]
+    ) -> bytes:
+        features = []
+        for item in items:
+            spool.seek(offsets[item])
+            features.append(spool.read(sizes[item]))
+        return b''.join(features)
+
+    async def _gzip(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def compress(chunk: bytes) -> bytes:
+            # Flushing every chunk keeps a broken download decodable up to
+            # its last chunk, so it can be resumed from there.
+            return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        async for chunk in chunks:
+            yield await asyncio.to_thread(compress, chunk)
+        yield compressor.flush()
+
+
+feature_exporter = FeatureExporter(settings.db.EXPORT_STATEMENT_TIMEOUT_MS)
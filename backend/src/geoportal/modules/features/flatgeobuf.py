@@ -0,0 +1,479 @@
+"""
+FlatGeobuf encoding, see https://flatgeobuf.org.
+
+A file is the magic bytes, a size-prefixed `Header` FlatBuffer, an
+optional packed Hilbert R-tree and size-prefixed `Feature` FlatBuffers.
+Only what the export needs is implemented: 2D geometries read from WKB,
+scalar and string properties, and the spatial index.
+"""
+
+import math
+import struct
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Iterator, Sequence
+
+MAGIC = b'fgb\x03fgb\x00'
+DEFAULT_NODE_SIZE = 16
+HILBERT_MAX = (1 << 16) - 1
+
+# Index nodes: bounds, then a byte offset into the features for leaves or
+# the position of the first child node for the other levels.
+NODE = struct.Struct('<4dQ')
+# Index nodes written per chunk.
+NODE_CHUNK_SIZE = 4096
+
+Bounds = tuple[float, float, float, float]
+
+
+class GeometryType(IntEnum):
+    UNKNOWN = 0
+    POINT = 1
+    LINESTRING = 2
+    POLYGON = 3
+    MULTIPOINT = 4
+    MULTILINESTRING = 5
+    MULTIPOLYGON = 6
+    GEOMETRYCOLLECTION = 7
+
+
+class ColumnType(IntEnum):
+    BYTE = 0
+    UBYTE = 1
+    BOOL = 2
+    SHORT = 3
+    USHORT = 4
+    INT = 5
+    UINT = 6
+    LONG = 7
+    ULONG = 8
+    FLOAT = 9
+    DOUBLE = 10
+    STRING = 11
+    JSON = 12
+    DATETIME = 13
+    BINARY = 14
+
+
+# Fixed size property values; the other types are length-prefixed.
+COLUMN_FORMATS = {
+    ColumnType.BYTE: struct.Struct('<b'),
+    ColumnType.UBYTE: struct.Struct('<B'),
+    ColumnType.BOOL: struct.Struct('<?'),
+    ColumnType.SHORT: struct.Struct('<h'),
+    ColumnType.USHORT: struct.Struct('<H'),
+    ColumnType.INT: struct.Struct('<i'),
+    ColumnType.UINT: struct.Struct('<I'),
+    ColumnType.LONG: struct.Struct('<q'),
+    ColumnType.ULONG: struct.Struct('<Q'),
+    ColumnType.FLOAT: struct.Struct('<f'),
+    ColumnType.DOUBLE: struct.Struct('<d'),
+}
+UINT16 = struct.Struct('<H')
+UINT32 = struct.Struct('<I')
+
+
+@dataclass(slots=True)
+class Geometry:
+    """A geometry in FlatGeobuf layout: flat coordinates and part ends."""
+
+    type: GeometryType
+    xy: list[float] = field(default_factory=list)
+    ends: list[int] = field(default_factory=list)
+    parts: list['Geometry'] = field(default_factory=list)
+
+    def bounds(self) -> Bounds | None:
+        """Returns the bounding box, or None for an empty geometry."""
+        boxes = [part.bounds() for part in self.parts]
+        if self.xy:
+            xs, ys = self.xy[0::2], self.xy[1::2]
+            boxes.append((min(xs), min(ys), max(xs), max(ys)))
+        boxes = [box for box in boxes if box is not None]
+        if not boxes:
+            return None
+        return (
+            min(box[0] for box in boxes),
+            min(box[1] for box in boxes),
+            max(box[2] for box in boxes),
+            max(box[3] for box in boxes),
+        )
+
+
+def read_wkb(data: bytes) -> Geometry:
+    """
+    Reads a 2D WKB geometry, as returned by `ST_AsBinary(ST_Force2D(...))`.
+
+    Raises ValueError for geometry types FlatGeobuf has no 2D layout for.
+    """
+    geometry, _ = _read_wkb(memoryview(data), 0)
+    return geometry
+
+
+def _read_wkb(data: memoryview, pos: int) -> tuple[Geometry, int]:
+    order = '<' if data[pos] == 1 else '>'
+    (kind,) = struct.unpack_from(f'{order}I', data, pos + 1)
+    pos += 5
+    if not GeometryType.POINT <= kind <= GeometryType.GEOMETRYCOLLECTION:
+        raise ValueError(f'Unsupported WKB geometry type {kind}')
+    kind = GeometryType(kind)
+
+    if kind == GeometryType.POINT:
+        return Geometry(kind, list(struct.unpack_from(f'{order}2d', data, pos))), (
+            pos + 16
+        )
+    (count,) = struct.unpack_from(f'{order}I', data, pos)
+    pos += 4
+
+    if kind == GeometryType.LINESTRING:
+        xy = list(struct.unpack_from(f'{order}{2 * count}d', data, pos))
+        return Geometry(kind, xy), pos + 16 * count
+    if kind == GeometryType.POLYGON:
+        geometry = Geometry(kind)
+        for _ in range(count):
+            (points,) = struct.unpack_from(f'{order}I', data, pos)
+            pos += 4
+            geometry.xy.extend(struct.unpack_from(f'{order}{2 * points}d', data, pos))
+            geometry.ends.append(len(geometry.xy) // 2)
+            pos += 16 * points
+        return geometry, pos
+
+    geometry = Geometry(kind)
+    for _ in range(count):
+        part, pos = _read_wkb(data, pos)
+        if kind in (GeometryType.MULTIPOINT, GeometryType.MULTILINESTRING):
+            geometry.xy.extend(part.xy)
+            geometry.ends.append(len(geometry.xy) // 2)
+        else:
+            geometry.parts.append(part)
+    return geometry, pos
+
+
+class Builder:
+    """
+    Minimal FlatBuffers builder for the FlatGeobuf tables.
+
+    Like the reference builders it writes back to front, so objects are
+    created before the tables referencing them; positions are counted
+    from the end of the buffer.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._size = 0
+        self._min_align = 1
+
+    def string(self, value: str) -> int:
+        data = value.encode()
+        self._prep(4, len(data) + 1)
+        self._prepend(data + b'\x00')
+        self._prepend(UINT32.pack(len(data)))
+        return self._size
+
+    def vector(self, fmt: str, values: Sequence | bytes) -> int:
+        """Adds a vector of scalars; `values` may be bytes for `B`."""
+        size = struct.calcsize(fmt)
+        if isinstance(values, bytes):
+            data = values
+        else:
+            data = struct.pack(f'<{len(values)}{fmt}', *values)
+        self._prep(4, len(data))
+        self._prep(size, len(data))
+        self._prepend(data)
+        self._prepend(UINT32.pack(len(data) // size))
+        return self._size
+
+    def tables(self, offsets: list[int]) -> int:
+        """Adds a vector of tables."""
+        self._prep(4, 4 * len(offsets))
+        for offset in reversed(offsets):
+            self._prepend(UINT32.pack(self._size + 4 - offset))
+        self._prepend(UINT32.pack(len(offsets)))
+        return self._size
+
+    def table(self, fields: list[tuple[str, int | float] | None]) -> int:
+        """
+        Adds a table from its fields in slot order, None for absent ones.
+
+        A field is a struct format with its value, or `offset` with the
+        position of a string, vector or table.
+        """
+        start = self._size
+        positions = []
+        for slot, item in enumerate(fields):
+            if item is None:
+                continue
+            fmt, value = item
+            if fmt == 'offset':
+                self._prep(4, 0)
+                self._prepend(UINT32.pack(self._size + 4 - value))
+            else:
+                self._prep(struct.calcsize(fmt), 0)
+                self._prepend(struct.pack(f'<{fmt}', value))
+            positions.append((slot, self._size))
+        self._prep(4, 0)
+        # The vtable is written right before the table, so the table's
+        # offset to it is its size.
+        vtable_size = 2 * (2 + len(fields))
+        self._prepend(struct.pack('<i', vtable_size))
+        table = self._size
+        slots = [0] * len(fields)
+        for slot, position in positions:
+            slots[slot] = table - position
+        self._prepend(
+            struct.pack(f'<{2 + len(fields)}H', vtable_size, table - start, *slots)
+        )
+        return table
+
+    def finish(self, root: int) -> bytes:
+        """Returns the size-prefixed buffer of the `root` table."""
+        self._prep(self._min_align, 8)
+        self._prepend(UINT32.pack(self._size + 4 - root))
+        self._prepend(UINT32.pack(self._size))
+        return b''.join(reversed(self._chunks))
+
+    def _prep(self, size: int, additional: int) -> None:
+        # Pads so that `size` aligned data ends up aligned once `additional`
+        # bytes are written.
+        self._min_align = max(self._min_align, size)
+        padding = -(self._size + additional) % size
+        if padding:
+            self._prepend(bytes(padding))
+
+    def _prepend(self, data: bytes) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+
+
+def encode_header(
+    name: str,
+    geometry_type: GeometryType,
+    columns: list[tuple[str, ColumnType]],
+    features_count: int,
+    envelope: Bounds | None,
+    index_node_size: int,
+    srid: int = 4326,
+) -> bytes:
+    """
+    Encodes a size-prefixed header. `features_count` is 0 if unknown and
+    `index_node_size` 0 if the file has no index.
+    """
+    builder = Builder()
+    column_tables = [
+        builder.table([('offset', builder.string(column)), ('B', column_type)])
+        for column, column_type in columns
+    ]
+    crs = builder.table([('offset', builder.string('EPSG')), ('i', srid)])
+    fields = [
+        ('offset', builder.string(name)),
+        ('offset', builder.vector('d', envelope)) if envelope else None,
+        ('B', geometry_type),
+        None,
+        None,
+        None,
+        None,
+        ('offset', builder.tables(column_tables)) if column_tables else None,
+        ('Q', features_count),
+        ('H', index_node_size),
+        ('offset', crs),
+    ]
+    return builder.finish(builder.table(fields))
+
+
+def encode_properties(columns: list[ColumnType], values: Sequence) -> bytes:
+    """Encodes property values by column index, leaving out nulls."""
+    parts = []
+    for index, (column_type, value) in enumerate(zip(columns, values)):
+        if value is None:
+            continue
+        parts.append(UINT16.pack(index))
+        fmt = COLUMN_FORMATS.get(column_type)
+        if fmt is not None:
+            parts.append(fmt.pack(value))
+        else:
+            data = value if isinstance(value, bytes) else str(value).encode()
+            parts.append(UINT32.pack(len(data)))
+            parts.append(data)
+    return b''.join(parts)
+
+
+def encode_feature(geometry: Geometry, properties: bytes) -> bytes:
+    """Encodes a size-prefixed feature."""
+    builder = Builder()
+    root = _write_geometry(builder, geometry)
+    fields = [
+        ('offset', root),
+        ('offset', builder.vector('B', properties)) if properties else None,
+    ]
+    return builder.finish(builder.table(fields))
+
+
+def _write_geometry(builder: Builder, geometry: Geometry) -> int:
+    parts = [_write_geometry(builder, part) for part in geometry.parts]
+    fields = [
+        # A single ring or part needs no ends.
+        ('offset', builder.vector('I', geometry.ends))
+        if len(geometry.ends) > 1
+        else None,
+        ('offset', builder.vector('d', geometry.xy)) if geometry.xy else None,
+        None,
+        None,
+        None,
+        None,
+        ('B', geometry.type),
+        ('offset', builder.tables(parts)) if parts else None,
+    ]
+    return builder.table(fields)
+
+
+def hilbert(x: int, y: int) -> int:
+    """Returns the position of a cell on a 16 bit Hilbert curve."""
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+    C ^= (a & (c >> 2)) ^ (b & (d >> 2))
+    D ^= (b & (c >> 2)) ^ ((a ^ b) & (d >> 2))
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+    C ^= (a & (c >> 4)) ^ (b & (d >> 4))
+    D ^= (b & (c >> 4)) ^ ((a ^ b) & (d >> 4))
+
+    a, b, c, d = A, B, C, D
+    C ^= (a & (c >> 8)) ^ (b & (d >> 8))
+    D ^= (b & (c >> 8)) ^ ((a ^ b) & (d >> 8))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+
+    i0 = (i0 | (i0 << 8)) & 0x00FF00FF
+    i0 = (i0 | (i0 << 4)) & 0x0F0F0F0F
+    i0 = (i0 | (i0 << 2)) & 0x33333333
+    i0 = (i0 | (i0 << 1)) & 0x55555555
+
+    i1 = (i1 | (i1 << 8)) & 0x00FF00FF
+    i1 = (i1 | (i1 << 4)) & 0x0F0F0F0F
+    i1 = (i1 | (i1 << 2)) & 0x33333333
+    i1 = (i1 | (i1 << 1)) & 0x55555555
+
+    return (i1 << 1) | i0
+
+
+def level_bounds(num_items: int, node_size: int) -> list[tuple[int, int]]:
+    """
+    Returns the node range of every index level, leaves first.
+
+    Levels are stored root first, so the leaves are the last nodes.
+    """
+    counts = [num_items]
+    count = num_items
+    while True:
+        count = -(-count // node_size)
+        counts.append(count)
+        if count == 1:
+            break
+    end = sum(counts)
+    bounds = []
+    for count in counts:
+        bounds.append((end - count, end))
+        end -= count
+    return bounds
+
+
+class PackedRTree:
+    """
+    Packed Hilbert R-tree over features, in FlatGeobuf layout.
+
+    Features are ordered along a Hilbert curve through their bbox centers
+    and must be written in `order`; the index refers to them by their
+    byte offset in that order.
+    """
+
+    def __init__(
+        self,
+        bounds: array,
+        sizes: Sequence[int],
+        node_size: int = DEFAULT_NODE_SIZE,
+    ) -> None:
+        """`bounds` holds 4 values per feature, `sizes` its encoded size."""
+        self.node_size = node_size
+        count = len(sizes)
+        self.extent = (
+            min(bounds[0::4]),
+            min(bounds[1::4]),
+            max(bounds[2::4]),
+            max(bounds[3::4]),
+        )
+        min_x, min_y, max_x, max_y = self.extent
+        width, height = max_x - min_x, max_y - min_y
+
+        def center(low: float, high: float, origin: float, span: float) -> int:
+            if span == 0:
+                return 0
+            return math.floor(HILBERT_MAX * ((low + high) / 2 - origin) / span)
+
+        keys = [
+            hilbert(
+                center(bounds[4 * i], bounds[4 * i + 2], min_x, width),
+                center(bounds[4 * i + 1], bounds[4 * i + 3], min_y, height),
+            )
+            for i in range(count)
+        ]
+        self.order = sorted(range(count), key=keys.__getitem__, reverse=True)
+        self.bounds = bounds
+        self.offsets = array('Q', bytes(8 * count))
+        offset = 0
+        for position, item in enumerate(self.order):
+            self.offsets[position] = offset
+            offset += sizes[item]
+
+        # Levels above the leaves, which are small enough to keep; leaves
+        # are built from the arrays when needed.
+        self.levels: list[list[tuple]] = []
+        self.level_bounds = level_bounds(count, node_size)
+        child, child_count = self._leaf, count
+        for level in range(1, len(self.level_bounds)):
+            first_child = self.level_bounds[level - 1][0]
+            nodes = []
+            for start in range(0, child_count, node_size):
+                end = min(start + node_size, child_count)
+                group = [child(position) for position in range(start, end)]
+                nodes.append(
+                    (
+                        min(node[0] for node in group),
+                        min(node[1] for node in group),
+                        max(node[2] for node in group),
+                        max(node[3] for node in group),
+                        first_child + start,
+                    )
+                )
+            self.levels.append(nodes)
+            child, child_count = nodes.__getitem__, len(nodes)
+
+    def chunks(self) -> Iterator[bytes]:
+        """Yields the encoded index, root first."""
+        for nodes in reversed(self.levels):
+            yield b''.join(NODE.pack(*node) for node in nodes)
+        for start in range(0, len(self.order), NODE_CHUNK_SIZE):
+            end = min(start + NODE_CHUNK_SIZE, len(self.order))
+            yield b''.join(
+                NODE.pack(*self._leaf(position)) for position in range(start, end)
+            )
+
+    def _leaf(self, position: int) -> tuple:
+        item = 4 * self.order[position]
+        return (*self.bounds[item : item + 4], self.offsets[position])
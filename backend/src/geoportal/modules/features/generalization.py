@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+
+from sqlalchemy import ColumnElement, FromClause, and_, literal
+
+from src.geoportal.modules.features.models import (
+    GENERALIZED_MODELS,
+    LAYER_MODELS,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class GeneralizationLevel:
+    """A precomputed simplified version of line and polygon layers."""
+
+    level: int
+    tolerance: float
+    max_zoom: int
+
+
+# Coarsest first; tolerances are in degrees, about half a pixel at the
+# latitudes of the oblast. Must match the `add_geo_generalization` migration
+# and the scale ranges of the mapfile layers. Zooms beyond the last level
+# are served at full resolution.
+GENERALIZATION_LEVELS = (
+    GeneralizationLevel(level=4, tolerance=0.01, max_zoom=7),
+    GeneralizationLevel(level=3, tolerance=0.002, max_zoom=9),
+    GeneralizationLevel(level=2, tolerance=0.0005, max_zoom=11),
+    GeneralizationLevel(level=1, tolerance=0.0001, max_zoom=13),
+)
+
+
+def level_for_zoom(zoom: int) -> int | None:
+    """Returns the generalization level for a zoom, None for full resolution."""
+    for level in GENERALIZATION_LEVELS:
+        if zoom <= level.max_zoom:
+            return level.level
+    return None
+
+
+def geometry_source(
+    layer: str, zoom: int | None
+) -> tuple[FromClause, ColumnElement, bool]:
+    """
+    Returns the tables to select a layer from, its geometry column for a
+    zoom and whether that geometry is generalized.
+
+    Generalized geometries are joined to the layer by id, so attributes
+    are still read from the layer table. The level is rendered inline,
+    as each level has its own partial index.
+    """
+    table = LAYER_MODELS[layer].__table__
+    level = level_for_zoom(zoom) if zoom is not None else None
+    if layer not in GENERALIZED_MODELS or level is None:
+        return table, table.c.geom, False
+    generalized = GENERALIZED_MODELS[layer].__table__
+    source = table.join(
+        generalized,
+        and_(
+            generalized.c.id == table.c.id,
+            generalized.c.level == literal(level, literal_execute=True),
+        ),
+    )
+    return source, generalized.c.geom, True
@@ -0,0 +1,136 @@
+from sqlalchemy import Column, Float, Integer, SmallInteger, String, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from src.geoportal.db.base_class import Base
+from src.geoportal.db.types import Geometry
+
+# The `geo` schema is loaded by the data pipeline and read by MapServer, it is
+# not managed by Alembic. These models are therefore not registered in
+# `db.models`.
+GEO_SCHEMA = 'geo'
+
+
+class Attraction(Base):
+    __tablename__ = 'attraction'
+    __table_args__ = {'schema': GEO_SCHEMA}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    geom = Column(Geometry('POINT'), nullable=False)
+    # Maintained by the `geo_search_vector_update` trigger.
+    search_vector = Column(TSVECTOR, nullable=True)
+
+    def __repr__(self):
+        return f"<Attraction(id={self.id}, name='{self.name}')>"
+
+
+class Museum(Base):
+    __tablename__ = 'museum'
+    __table_args__ = {'schema': GEO_SCHEMA}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    geom = Column(Geometry('POINT'), nullable=False)
+    # Maintained by the `geo_search_vector_update` trigger.
+    search_vector = Column(TSVECTOR, nullable=True)
+
+    def __repr__(self):
+        return f"<Museum(id={self.id}, name='{self.name}')>"
+
+
+class Park(Base):
+    __tablename__ = 'park'
+    __table_args__ = {'schema': GEO_SCHEMA}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    geom = Column(Geometry('POLYGON'), nullable=False)
+    # Maintained by the `geo_search_vector_update` trigger.
+    search_vector = Column(TSVECTOR, nullable=True)
+
+    def __repr__(self):
+        return f"<Park(id={self.id}, name='{self.name}')>"
+
+
+class Boundary(Base):
+    __tablename__ = 'boundary'
+    __table_args__ = {'schema': GEO_SCHEMA}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=True)
+    geom = Column(Geometry('LINESTRING'), nullable=False)
+
+    def __repr__(self):
+        return f"<Boundary(id={self.id}, name='{self.name}')>"
+
+
+class ParkGeneralized(Base):
+    """Simplified park polygons, see `features.generalization`."""
+
+    __tablename__ = 'park_generalized'
+    __table_args__ = {'schema': GEO_SCHEMA}
+
+    level = Column(SmallInteger, primary_key=True)
+    id = Column(Integer, primary_key=True)
+    geom = Column(Geometry('GEOMETRY'), nullable=False)
+
+    def __repr__(self):
+        return f'<ParkGeneralized(level={self.level}, id={self.id})>'
+
+
+class BoundaryGeneralized(Base):
+    """Simplified boundary lines, see `features.generalization`."""
+
+    __tablename__ = 'boundary_generalized'
+    __table_args__ = {'schema': GEO_SCHEMA}
+
+    level = Column(SmallInteger, primary_key=True)
+    id = Column(Integer, primary_key=True)
+    geom = Column(Geometry('GEOMETRY'), nullable=False)
+
+    def __repr__(self):
+        return f'<BoundaryGeneralized(level={self.level}, id={self.id})>'
+
+
+LAYER_MODELS: dict[str, type[Base]] = {
+    'attraction': Attraction,
+    'museum': Museum,
+    'park': Park,
+    'boundary': Boundary,
+}
+
+# Versions of line and polygon layers maintained by the
+# `geo_generalize_change` triggers.
+GENERALIZED_MODELS: dict[str, type[Base]] = {
+    'park': ParkGeneralized,
+    'boundary': BoundaryGeneralized,
+}
+
+
+class FeatureCluster(Base):
+    """
+    Points of a layer aggregated into a Web Mercator grid cell at one zoom.
+
+    Kept up to date by the `geo_cluster_change` triggers (see the
+    `add_feature_clusters` migration); sums are in EPSG:3857 meters.
+    """
+
+    __tablename__ = 'feature_clusters'
+    __table_args__ = {'schema': GEO_SCHEMA}
+
+    layer = Column(Text, primary_key=True)
+    zoom = Column(SmallInteger, primary_key=True)
+    cell_x = Column(Integer, primary_key=True)
+    cell_y = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False)
+    sum_x = Column(Float, nullable=False)
+    sum_y = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<FeatureCluster(layer='{self.layer}', zoom={self.zoom}, "
+            f'count={self.count})>'
+        )
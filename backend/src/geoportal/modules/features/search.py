@@ -0,0 +1,196 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from sqlalchemy import (
+    Float,
+    Select,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.geoportal.core.metrics import metrics_registry
+from src.geoportal.modules.features.crud import BBox
+from src.geoportal.modules.features.models import LAYER_MODELS
+
+# Layers in SearchLayer have a `search_vector` column maintained with this
+# text search configuration, see the `add_geo_search` migration.
+SEARCH_CONFIG = literal_column("'russian'::regconfig")
+
+AUTOCOMPLETE_CACHE_TTL_SECONDS = 60.0
+AUTOCOMPLETE_CACHE_MAX_ITEMS = 2048
+
+WORD_PATTERN = re.compile(r'\w+')
+
+autocomplete_cache_requests = metrics_registry.counter(
+    'search_autocomplete_cache_requests',
+    'Autocomplete lookups in the hot query cache.',
+    ('result',),
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lower-cases a search text and collapses whitespace."""
+    return ' '.join(text.lower().split())
+
+
+def prefix_tsquery(text: str) -> str | None:
+    """
+    Builds a tsquery matching words starting with every word of `text`.
+
+    Only word characters are kept, so the result is always valid tsquery
+    syntax; None is returned if no word is left.
+    """
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return None
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+class SearchCache:
+    """
+    Short-lived LRU of autocomplete results.
+
+    Typeahead sends the same few prefixes over and over, so even a short
+    TTL answers most of them without a query. Layer edits become visible
+    after the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_items: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self._results: OrderedDict[Hashable, tuple[list[dict], float]] = OrderedDict()
+
+    def get(self, key: Hashable) -> list[dict] | None:
+        """Returns cached results, or None if missing or expired."""
+        item = self._results.get(key)
+        if item is None or time.monotonic() >= item[1]:
+            self._results.pop(key, None)
+            autocomplete_cache_requests.labels('miss').inc()
+            return None
+        self._results.move_to_end(key)
+        autocomplete_cache_requests.labels('hit').inc()
+        return item[0]
+
+    def set(self, key: Hashable, results: list[dict]) -> None:
+        """Caches results."""
+        self._results[key] = (results, time.monotonic() + self.ttl_seconds)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_items:
+            self._results.popitem(last=False)
+
+
+class FeatureSearch:
+    """
+    Ranked search over names and descriptions of several layers.
+
+    Full-text matches use the Russian `search_vector` GIN indexes and
+    fuzzy name matches use the `lower(name)` trigram indexes; the rank
+    adds up both scores, so misspelled names are still found.
+    """
+
+    def __init__(self, cache: SearchCache) -> None:
+        self.cache = cache
+
+    def search_query(
+        self,
+        layers: list[str],
+        text: str,
+        bbox: BBox | None,
+        limit: int,
+        prefix: bool = False,
+    ) -> Select | None:
+        """
+        Builds one query searching several layers, best matches first.
+
+        In prefix mode every word of `text` may be the start of a word, as
+        typed so far. Returns None if `text` has nothing to search for.
+        """
+        if prefix:
+            query_text = prefix_tsquery(text)
+            if query_text is None:
+                return None
+            tsquery = func.to_tsquery(SEARCH_CONFIG, query_text)
+        else:
+            tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+
+        queries = []
+        for layer in layers:
+            table = LAYER_MODELS[layer].__table__
+            name = func.lower(table.c.name)
+            rank = func.ts_rank_cd(table.c.search_vector, tsquery, type_=Float) + (
+                func.similarity(name, text)
+            )
+            name_matches = name.op('%')(text)
+            if prefix:
+                name_matches = or_(name_matches, name.startswith(text, autoescape=True))
+            conditions = [or_(table.c.search_vector.op('@@')(tsquery), name_matches)]
+            if bbox is not None:
+                conditions.append(
+                    table.c.geom.op('&&')(func.ST_MakeEnvelope(*bbox, 4326))
+                )
+            point = func.ST_PointOnSurface(table.c.geom)
+            queries.append(
+                select(
+                    literal(layer).label('layer'),
+                    table.c.id,
+                    table.c.name,
+                    rank.label('rank'),
+                    func.ST_X(point).label('longitude'),
+                    func.ST_Y(point).label('latitude'),
+                )
+                .where(*conditions)
+                .order_by(rank.desc())
+                .limit(limit)
+            )
+        results = union_all(*queries).subquery()
+        return select(results).order_by(results.c.rank.desc()).limit(limit)
+
+    async def search(
+        self,
+        db: AsyncSession,
+        layers: list[str],
+        text: str,
+        bbox: BBox | None = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """Returns features matching a search text, best matches first."""
+        return await self._execute(
+            db, self.search_query(layers, normalize_text(text), bbox, limit)
+        )
+
+    async def autocomplete(
+        self,
+        db: AsyncSession,
+        layers: list[str],
+        text: str,
+        bbox: BBox | None = None,
+        limit: int = 10,
+    ) -> list[dict]:
+        """Returns features whose words start with the typed text, cached."""
+        text = normalize_text(text)
+        key = (text, tuple(layers), bbox, limit)
+        results = self.cache.get(key)
+        if results is None:
+            results = await self._execute(
+                db, self.search_query(layers, text, bbox, limit, prefix=True)
+            )
+            self.cache.set(key, results)
+        return results
+
+    async def _execute(self, db: AsyncSession, query: Select | None) -> list[dict]:
+        if query is None:
+            return []
+        result = await db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+
+feature_search = FeatureSearch(
+    SearchCache(AUTOCOMPLETE_CACHE_TTL_SECONDS, AUTOCOMPLETE_CACHE_MAX_ITEMS)
+)
@@ -1,6 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from src.geoportal.modules.health.api.v1.schemas import HealthCheckResponse
+from src.geoportal.db.session import engine
+from src.geoportal.modules.auth.dependencies import require_role
+from src.geoportal.modules.health.api.v1.schemas import (
+    DbPoolStatsResponse,
+    HealthCheckResponse,
+)
 
 router = APIRouter(
     prefix='/health',
@@ -20,3 +25,27 @@ async def health_check():
     Endpoint to check the health of the API.
     """
     return HealthCheckResponse(status='healthy')
+
+
+@router.get(
+    '/db/pool',
+    response_model=DbPoolStatsResponse,
+    dependencies=[Depends(require_role(['admin']))],
+)
+async def get_db_pool_stats() -> DbPoolStatsResponse:
+    """
+    Returns occupancy and checkout counters of the primary database pool,
+    used to size the pool.
+    """
+    pool = engine.pool
+    stats = pool.stats
+    return DbPoolStatsResponse(
+        size=pool.size(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(0, pool.overflow()),
+        checkouts=stats.checkouts,
+        timeouts=stats.timeouts,
+        wait_seconds=stats.wait_seconds,
+        wait_histogram=stats.histogram(),
+    )
@@ -10,3 +10,18 @@ class HealthCheckResponse(BaseModel):
     status: str = Field(
         description='The operational status of the API.', examples=['healthy']
     )
+
+
+class DbPoolStatsResponse(BaseModel):
+    """Occupancy and checkout counters of the primary database connection pool."""
+
+    size: int = Field(description='Configured number of persistent connections.')
+    checked_in: int = Field(description='Idle connections in the pool.')
+    checked_out: int = Field(description='Connections in use.')
+    overflow: int = Field(description='Connections opened beyond the pool size.')
+    checkouts: int = Field(description='Connections handed out since startup.')
+    timeouts: int = Field(description='Checkouts that gave up waiting.')
+    wait_seconds: float = Field(description='Total time spent waiting for checkouts.')
+    wait_histogram: dict[str, int] = Field(
+        description='Cumulative checkout counts by wait time upper bound in seconds.'
+    )
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.geoportal.core.metrics import metrics_registry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+router = APIRouter(
+    tags=['Metrics'],
+)
+
+
+@router.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Exposes application metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE)
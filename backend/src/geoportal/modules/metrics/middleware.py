@@ -0,0 +1,61 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.geoportal.core.metrics import metrics_registry
+
+# Label of requests matching no route, so unknown paths do not add series.
+UNMATCHED_ROUTE = '<unmatched>'
+
+http_requests = metrics_registry.counter(
+    'http_requests', 'HTTP requests by route template.', ('method', 'route', 'status')
+)
+http_request_duration = metrics_registry.histogram(
+    'http_request_duration_seconds',
+    'Time until the response body is sent, by route template.',
+    ('method', 'route'),
+)
+http_requests_in_flight = metrics_registry.gauge(
+    'http_requests_in_flight', 'HTTP requests being served.', ('method',)
+)
+
+
+class MetricsMiddleware:
+    """
+    Records count, latency and concurrency of HTTP requests.
+
+    Requests are labelled with the template of the matched route, such as
+    /api/v1/users/{user_id}, so series do not grow with path parameters.
+    A plain ASGI middleware is used because it does not buffer or wrap
+    streaming responses.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        in_flight = http_requests_in_flight.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            # The router stores the matched route in the shared scope.
+            route = getattr(scope.get('route'), 'path', UNMATCHED_ROUTE)
+            http_requests.labels(method, route, str(status_code)).inc()
+            http_request_duration.labels(method, route).observe(elapsed)
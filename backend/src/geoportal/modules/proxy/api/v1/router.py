@@ -1,10 +1,23 @@
 import httpx
 from fastapi import APIRouter, Depends, Request, Response
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from src.geoportal.config.get_settings import get_settings
-from src.geoportal.config.settings import Settings
 from src.geoportal.modules.auth.dependencies import require_role
+from src.geoportal.modules.proxy.api.v1.schemas import CacheStatsResponse
+from src.geoportal.modules.proxy.conditional import (
+    NO_STORE,
+    cache_control,
+    is_not_modified,
+    validator_headers,
+)
+from src.geoportal.modules.proxy.service import (
+    forward_headers,
+    is_storable,
+    mapserver_proxy,
+    response_headers,
+)
+from src.geoportal.modules.proxy.wms import get_request_type, normalize_params
 
 router = APIRouter(
     prefix='/proxy',
@@ -12,62 +25,91 @@ router = APIRouter(
     dependencies=[Depends(require_role(['user']))],
 )
 
-client = httpx.AsyncClient()
+
+@router.get(
+    '/cache/stats',
+    response_model=CacheStatsResponse,
+    dependencies=[Depends(require_role(['admin']))],
+)
+async def get_cache_stats() -> CacheStatsResponse:
+    """
+    Returns tile cache and request coalescing counters, used to size the cache.
+    """
+    cache = mapserver_proxy.cache
+    flights = {
+        'upstream_fetches': mapserver_proxy.flights.executed,
+        'coalesced_requests': mapserver_proxy.flights.coalesced,
+    }
+    if cache is None:
+        return CacheStatsResponse(enabled=False, **flights)
+    return CacheStatsResponse(
+        enabled=True,
+        **flights,
+        memory_items=cache.memory_items,
+        memory_bytes=cache.memory_bytes,
+        **cache.stats.as_dict(),
+    )
 
 
 @router.get('/mapserver/{path:path}')
 async def proxy_mapserver_get(
     path: str,
     request: Request,
-    settings: Settings = Depends(get_settings),
 ):
     """
     Proxies GET requests to the MapServer service.
     It captures the full path and query parameters.
-    """
-    mapserver_base_url = settings.mapserver.URL.rstrip('/')
 
-    target_url = f'{mapserver_base_url}/{path}'
-    if request.url.query:
-        target_url += f'?{request.url.query}'
+    Map images, legends and capabilities documents are served from the
+    tile cache when possible and carry ETag/Last-Modified validators, so
+    conditional requests are answered with 304 Not Modified. Other
+    requests are streamed through.
+    """
+    query = request.url.query
+    params = normalize_params(query)
+    request_type = get_request_type(params)
 
     try:
-        headers_to_forward = {
-            k: v
-            for k, v in request.headers.items()
-            if k.lower()
-            not in [
-                'host',
-                'connection',
-                'user-agent',
-                'content-length',
-                'content-type',
-            ]
-        }
-        headers_to_forward['user-agent'] = 'GeoportalBackendProxy/1.0'
+        if mapserver_proxy.is_shared(params):
+            entry, hit = await mapserver_proxy.fetch(
+                path, query, params, forward_headers(request.headers, shared=True)
+            )
+            headers = {**entry.headers, 'X-Cache': 'HIT' if hit else 'MISS'}
+            if not is_storable(entry.status_code, entry.media_type, request_type):
+                headers['cache-control'] = NO_STORE
+            else:
+                headers.update(validator_headers(entry))
+                headers['cache-control'] = cache_control(request_type)
+                if is_not_modified(request.headers, entry):
+                    headers.pop('content-type', None)
+                    return Response(status_code=304, headers=headers)
+            return Response(
+                content=entry.content,
+                status_code=entry.status_code,
+                media_type=entry.media_type,
+                headers=headers,
+            )
 
-        mapserver_req = client.build_request(
-            method='GET',
-            url=target_url,
-            headers=headers_to_forward,
+        mapserver_resp = await mapserver_proxy.stream(
+            path, query, forward_headers(request.headers), request_type
         )
-
-        mapserver_resp = await client.send(mapserver_req, stream=True)
-
-        response_headers = {
-            k: v
-            for k, v in mapserver_resp.headers.items()
-            if k.lower()
-            not in ['content-length', 'transfer-encoding', 'content-encoding']
-        }
-
         return StreamingResponse(
-            mapserver_resp.aiter_bytes(),
+            mapserver_proxy.iter_bytes(mapserver_resp, request_type),
             status_code=mapserver_resp.status_code,
             media_type=mapserver_resp.headers.get('Content-Type'),
-            headers=response_headers,
+            headers={
+                **response_headers(mapserver_resp.headers),
+                'cache-control': cache_control(request_type),
+            },
+            background=BackgroundTask(mapserver_resp.aclose),
         )
 
+    except httpx.PoolTimeout as exc:
+        return Response(
+            content=f'MapServer is busy: {exc}',
+            status_code=503,
+            media_type='text/plain',
+        )
     except httpx.RequestError as exc:
         return Response(
             content=f'Error connecting to MapServer: {exc}',
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+
+
+class CacheStatsResponse(BaseModel):
+    """Counters and occupancy of the MapServer tile cache."""
+
+    enabled: bool = Field(description='Whether the tile cache is enabled.')
+    memory_items: int = Field(0, description='Entries held in the memory tier.')
+    memory_bytes: int = Field(0, description='Bytes held in the memory tier.')
+    memory_hits: int = Field(0, description='Requests served from memory.')
+    disk_hits: int = Field(0, description='Requests served from disk.')
+    misses: int = Field(0, description='Requests forwarded to MapServer.')
+    stores: int = Field(0, description='Responses written to the cache.')
+    evictions: int = Field(0, description='Entries evicted from the memory tier.')
+    expirations: int = Field(0, description='Entries dropped after their TTL.')
+    bytes_served: int = Field(0, description='Bytes served from the cache.')
+    bytes_stored: int = Field(0, description='Bytes written to the cache.')
+    upstream_fetches: int = Field(0, description='Shared requests sent to MapServer.')
+    coalesced_requests: int = Field(
+        0, description='Requests that waited for an identical in-flight fetch.'
+    )
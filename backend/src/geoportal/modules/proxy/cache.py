@@ -0,0 +1,379 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.modules.proxy.wms import BBox, expand, intersects
+
+INVALIDATION_LOG = 'invalidations.log'
+INVALIDATION_LOG_LOCK = 'invalidations.lock'
+# A response rendered shortly before a change notification may already be
+# stored after it, so changes also invalidate entries this much younger.
+RENDER_GRACE_SECONDS = 5.0
+# Above this many pending invalidations per layer they are merged into one
+# invalidation of the whole layer.
+MAX_LAYER_INVALIDATIONS = 256
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """A MapServer response stored in the tile cache."""
+
+    content: bytes
+    media_type: str | None
+    status_code: int = 200
+    headers: dict[str, str] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    etag: str = ''
+    layers: tuple[str, ...] = ()
+    bbox: BBox | None = None
+    # EPSG:4326 distance around `bbox` within which changes still show in
+    # the response, e.g. through symbols, labels or a rendering buffer.
+    margin: tuple[float, float] = (0.0, 0.0)
+
+    def __post_init__(self) -> None:
+        if not self.etag:
+            self.etag = f'"{hashlib.sha256(self.content).hexdigest()[:32]}"'
+        self.layers = tuple(self.layers)
+        if self.bbox is not None:
+            self.bbox = tuple(self.bbox)
+        self.margin = tuple(self.margin)
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+@dataclass(slots=True, frozen=True)
+class Invalidation:
+    """A change of layer data within a bounding box, None meaning everywhere."""
+
+    layer: str
+    bbox: BBox | None
+    timestamp: float
+
+    def affects(self, entry: CachedResponse) -> bool:
+        return (
+            entry.created_at <= self.timestamp + RENDER_GRACE_SECONDS
+            and (not entry.layers or self.layer in entry.layers)
+            and (
+                self.bbox is None
+                or entry.bbox is None
+                or intersects(expand(self.bbox, entry.margin), entry.bbox)
+            )
+        )
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Counters describing the tile cache effectiveness."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    invalidated: int = 0
+    bytes_served: int = 0
+    bytes_stored: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class TileCache:
+    """
+    Two-tier cache for MapServer responses.
+
+    Entries live in a bounded in-memory LRU and are written through to a
+    sharded on-disk store, so they survive restarts and entries evicted
+    from memory can still be served without reaching MapServer.
+
+    Data changes are recorded as invalidations of a layer within a bounding
+    box. Matching memory entries are dropped at once, disk entries are
+    checked against the invalidation log when read. The log is persisted
+    next to the entries and kept for the cache TTL. Every worker receives
+    every change, so only the worker holding the log lock writes it.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        ttl_seconds: int,
+        max_items: int,
+        max_bytes: int,
+    ) -> None:
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._memory_bytes = 0
+        self._invalidations: dict[str, list[Invalidation]] = {}
+        self._log_lock: IO[bytes] | None = None
+
+    @property
+    def memory_items(self) -> int:
+        return len(self._memory)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    async def get(self, key: str) -> CachedResponse | None:
+        """Returns a fresh cached response or None."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if self._is_expired(entry):
+                self._evict(key)
+                self.stats.expirations += 1
+            elif self._is_invalidated(entry):
+                self._evict(key)
+                self.stats.invalidated += 1
+            else:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                self.stats.bytes_served += entry.size
+                return entry
+
+        entry = await asyncio.to_thread(self._read_disk, key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        if self._is_expired(entry) or self._is_invalidated(entry):
+            await asyncio.to_thread(self._delete_disk, key)
+            if self._is_expired(entry):
+                self.stats.expirations += 1
+            else:
+                self.stats.invalidated += 1
+            self.stats.misses += 1
+            return None
+
+        self._remember(key, entry)
+        self.stats.disk_hits += 1
+        self.stats.bytes_served += entry.size
+        return entry
+
+    async def contains(self, key: str) -> bool:
+        """Checks for a fresh response without touching the LRU or counters."""
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+        return (
+            entry is not None
+            and not self._is_expired(entry)
+            and not self._is_invalidated(entry)
+        )
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        """Stores a response in memory and on disk."""
+        self._remember(key, entry)
+        await asyncio.to_thread(self._write_disk, key, entry)
+        self.stats.stores += 1
+        self.stats.bytes_stored += entry.size
+
+    async def delete(self, key: str) -> None:
+        """Removes a response from both tiers."""
+        self._evict(key)
+        await asyncio.to_thread(self._delete_disk, key)
+
+    async def clear(self) -> None:
+        """Removes every cached response."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._invalidations.clear()
+        # The lock file is removed with the directory.
+        self._release_log_lock()
+        await asyncio.to_thread(shutil.rmtree, self.directory, True)
+
+    async def invalidate(self, layer: str, bbox: BBox | None = None) -> None:
+        """
+        Invalidates responses depending on `layer` within `bbox`.
+
+        `bbox` is in EPSG:4326; None invalidates the whole layer.
+        """
+        invalidation = Invalidation(layer=layer, bbox=bbox, timestamp=time.time())
+        self._record(invalidation)
+        self.stats.invalidations += 1
+        for key, entry in list(self._memory.items()):
+            if invalidation.affects(entry):
+                self._evict(key)
+                self.stats.invalidated += 1
+        await asyncio.to_thread(self._append_log, invalidation)
+
+    async def load_invalidations(self) -> None:
+        """Loads invalidations persisted by earlier runs and other workers."""
+        for invalidation in await asyncio.to_thread(self._read_log):
+            self._record(invalidation)
+        if await asyncio.to_thread(self._acquire_log_lock):
+            await asyncio.to_thread(self._rewrite_log)
+
+    def _is_expired(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.created_at > self.ttl_seconds
+
+    def _is_invalidated(self, entry: CachedResponse) -> bool:
+        layers = entry.layers or self._invalidations.keys()
+        return any(
+            invalidation.affects(entry)
+            for layer in layers
+            for invalidation in self._invalidations.get(layer, ())
+        )
+
+    def _record(self, invalidation: Invalidation) -> None:
+        horizon = time.time() - self.ttl_seconds - RENDER_GRACE_SECONDS
+        pending = [
+            item
+            for item in self._invalidations.get(invalidation.layer, [])
+            if item.timestamp > horizon
+        ]
+        pending.append(invalidation)
+        if len(pending) > MAX_LAYER_INVALIDATIONS:
+            pending = [
+                Invalidation(
+                    layer=invalidation.layer,
+                    bbox=None,
+                    timestamp=max(item.timestamp for item in pending),
+                )
+            ]
+        self._invalidations[invalidation.layer] = pending
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        self._evict(key)
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+        while self._memory and (
+            len(self._memory) > self.max_items or self._memory_bytes > self.max_bytes
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+            self.stats.evictions += 1
+
+    def _evict(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key[2:4] / key
+
+    def _read_disk(self, key: str) -> CachedResponse | None:
+        try:
+            with self._path(key).open('rb') as file:
+                meta = json.loads(file.readline())
+                content = file.read()
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(content=content, **meta)
+
+    def _write_disk(self, key: str, entry: CachedResponse) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            'media_type': entry.media_type,
+            'status_code': entry.status_code,
+            'headers': entry.headers,
+            'created_at': entry.created_at,
+            'etag': entry.etag,
+            'layers': entry.layers,
+            'bbox': entry.bbox,
+            'margin': entry.margin,
+        }
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with tmp_path.open('wb') as file:
+            file.write(json.dumps(meta).encode() + b'\n')
+            file.write(entry.content)
+        os.replace(tmp_path, path)
+
+    def _delete_disk(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def _acquire_log_lock(self) -> bool:
+        """
+        Returns whether this process writes the invalidation log, taking
+        the lock if no other process holds it.
+
+        The lock is held until the process exits, when the OS releases it
+        and the next worker to record an invalidation takes over.
+        """
+        if self._log_lock is not None:
+            return True
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock = (self.directory / INVALIDATION_LOG_LOCK).open('ab')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        self._log_lock = lock
+        return True
+
+    def _release_log_lock(self) -> None:
+        if self._log_lock is not None:
+            self._log_lock.close()
+            self._log_lock = None
+
+    def _append_log(self, invalidation: Invalidation) -> None:
+        if not self._acquire_log_lock():
+            return
+        with (self.directory / INVALIDATION_LOG).open('a') as file:
+            file.write(json.dumps(asdict(invalidation)) + '\n')
+
+    def _read_log(self) -> list[Invalidation]:
+        try:
+            with (self.directory / INVALIDATION_LOG).open() as file:
+                lines = file.readlines()
+        except OSError:
+            return []
+        invalidations = []
+        for line in lines:
+            try:
+                data = json.loads(line)
+                invalidations.append(
+                    Invalidation(
+                        layer=data['layer'],
+                        bbox=tuple(data['bbox']) if data['bbox'] else None,
+                        timestamp=data['timestamp'],
+                    )
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        return invalidations
+
+    def _rewrite_log(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / INVALIDATION_LOG
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with tmp_path.open('w') as file:
+            for invalidations in self._invalidations.values():
+                for invalidation in invalidations:
+                    file.write(json.dumps(asdict(invalidation)) + '\n')
+        os.replace(tmp_path, path)
+
+
+def create_tile_cache() -> TileCache | None:
+    """Creates the tile cache from settings, or None if caching is disabled."""
+    settings = get_settings()
+    if not settings.mapserver.CACHE_ENABLED:
+        return None
+    return TileCache(
+        directory=settings.mapserver.CACHE_DIR,
+        ttl_seconds=settings.mapserver.CACHE_TTL_SECONDS,
+        max_items=settings.mapserver.CACHE_MEMORY_MAX_ITEMS,
+        max_bytes=settings.mapserver.CACHE_MEMORY_MAX_BYTES,
+    )
+
+
+tile_cache = create_tile_cache()
@@ -0,0 +1,139 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.config.settings import MapServerSubSettings
+
+
+class UpstreamClient:
+    """
+    Pooled HTTP client for upstream map servers.
+
+    The client is created on application startup and closed on shutdown.
+    Besides the connection pool limits, every upstream host has its own
+    concurrency limit, so a burst of tile requests queues in the proxy
+    instead of piling up slow renders on MapServer.
+    """
+
+    def __init__(
+        self,
+        settings: MapServerSubSettings,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.settings = settings
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError('Upstream client is not started')
+        return self._client
+
+    @property
+    def is_started(self) -> bool:
+        return self._client is not None
+
+    async def start(self) -> None:
+        """Opens the connection pool."""
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.settings.POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=self.settings.POOL_MAX_KEEPALIVE,
+                keepalive_expiry=self.settings.POOL_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=self.settings.CONNECT_TIMEOUT,
+                read=self.settings.READ_TIMEOUT,
+                write=self.settings.CONNECT_TIMEOUT,
+                pool=self.settings.POOL_TIMEOUT,
+            ),
+            http2=self.settings.HTTP2,
+            transport=self.transport,
+        )
+
+    async def stop(self) -> None:
+        """Closes the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def acquire(self, url: httpx.URL) -> asyncio.Semaphore:
+        """
+        Takes a concurrency slot of the upstream host of `url`, returning
+        the semaphore to release it on.
+
+        Raises httpx.PoolTimeout if no slot frees up within the pool timeout.
+        """
+        semaphore = self._semaphores.setdefault(
+            url.netloc.decode(), asyncio.Semaphore(self.settings.MAX_CONCURRENCY)
+        )
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.settings.POOL_TIMEOUT)
+        except TimeoutError:
+            raise httpx.PoolTimeout(f'Upstream {url.host} is saturated') from None
+        return semaphore
+
+    @asynccontextmanager
+    async def limit(self, url: httpx.URL) -> AsyncIterator[None]:
+        """Holds a concurrency slot of the upstream host of `url`."""
+        semaphore = await self.acquire(url)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    async def get(self, url: str, headers: dict[str, str]) -> httpx.Response:
+        """Sends a GET request and reads the whole response."""
+        request = self.client.build_request('GET', url, headers=headers)
+        async with self.limit(request.url):
+            return await self.client.send(request)
+
+    async def stream(self, url: str, headers: dict[str, str]) -> httpx.Response:
+        """
+        Sends a GET request and returns once the response headers arrive.
+
+        The caller must close the response. The concurrency slot is held
+        until then, as MapServer is still rendering while the body streams.
+        """
+        request = self.client.build_request('GET', url, headers=headers)
+        semaphore = await self.acquire(request.url)
+        try:
+            response = await self.client.send(request, stream=True)
+        except BaseException:
+            semaphore.release()
+            raise
+        response.stream = SlotReleasingStream(response.stream, semaphore)
+        return response
+
+
+class SlotReleasingStream(httpx.AsyncByteStream):
+    """Response body stream releasing a concurrency slot once closed."""
+
+    def __init__(
+        self, stream: httpx.AsyncByteStream, semaphore: asyncio.Semaphore
+    ) -> None:
+        self._stream = stream
+        self._semaphore: asyncio.Semaphore | None = semaphore
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            # Responses may be closed more than once.
+            if self._semaphore is not None:
+                self._semaphore.release()
+                self._semaphore = None
+
+
+upstream_client = UpstreamClient(get_settings().mapserver)
@@ -0,0 +1,55 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.modules.proxy.cache import CachedResponse
+from src.geoportal.modules.proxy.wms import WmsRequestType
+
+NO_STORE = 'no-store'
+
+
+def cache_control(request_type: WmsRequestType) -> str:
+    """
+    Returns the Cache-Control policy for a MapServer request type.
+
+    Map images and legends rarely change and are cached for long,
+    capabilities documents briefly, feature info is never cached.
+    Responses are private because the proxy requires authentication.
+    """
+    settings = get_settings()
+    if request_type in (WmsRequestType.GET_MAP, WmsRequestType.GET_LEGEND_GRAPHIC):
+        return f'private, max-age={settings.mapserver.TILE_MAX_AGE}'
+    if request_type == WmsRequestType.GET_CAPABILITIES:
+        return f'private, max-age={settings.mapserver.CAPABILITIES_MAX_AGE}'
+    return NO_STORE
+
+
+def validator_headers(entry: CachedResponse) -> dict[str, str]:
+    """Returns the ETag and Last-Modified headers of a cached response."""
+    return {
+        'etag': entry.etag,
+        'last-modified': formatdate(entry.created_at, usegmt=True),
+    }
+
+
+def is_not_modified(headers: Mapping[str, str], entry: CachedResponse) -> bool:
+    """
+    Evaluates the client's conditional request headers against a response.
+
+    If-None-Match takes precedence over If-Modified-Since, as required by
+    RFC 9110.
+    """
+    if_none_match = headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or entry.etag in tags
+
+    if_modified_since = headers.get('if-modified-since')
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # Last-Modified has a one second resolution.
+    return int(entry.created_at) <= since
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.db.session import engine
+from src.geoportal.modules.proxy.cache import TileCache, tile_cache
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY_SECONDS = 5.0
+
+# Layers of the `geo` schema tables that send change notifications.
+LAYERS = ('attraction', 'museum', 'park', 'boundary')
+
+
+class CacheInvalidator:
+    """
+    Invalidates cached tiles when `geo` layer data changes.
+
+    Listens for the notifications sent by the `geo_notify_change` triggers
+    (see the `add_geo_change_notifications` migration). Each notification
+    carries the changed layer and the EPSG:4326 extent of the changed rows,
+    so only tiles of that layer intersecting the extent are dropped.
+    """
+
+    def __init__(self, cache: TileCache | None, channel: str) -> None:
+        self.cache = cache
+        self.channel = channel
+        self._task: asyncio.Task[None] | None = None
+        self._pending: set[asyncio.Task[None]] = set()
+
+    async def start(self) -> None:
+        """Starts listening in the background."""
+        if self.cache is None or self._task is not None:
+            return
+        await self.cache.load_invalidations()
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stops listening."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen(self) -> None:
+        reconnecting = False
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw_connection = await conn.get_raw_connection()
+                    driver_connection = raw_connection.driver_connection
+                    closed = asyncio.Event()
+                    driver_connection.add_termination_listener(lambda _: closed.set())
+                    await driver_connection.add_listener(self.channel, self._notify)
+                    logger.info('Listening for layer changes on %s', self.channel)
+                    if reconnecting:
+                        # Changes made while disconnected were not received.
+                        for layer in LAYERS:
+                            await self.cache.invalidate(layer)
+                    await closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Layer change listener failed')
+            reconnecting = True
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def _notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            change = json.loads(payload)
+            layer = change['layer']
+            bbox = tuple(change['bbox']) if change.get('bbox') else None
+        except (KeyError, TypeError, ValueError):
+            logger.warning('Malformed layer change notification: %s', payload)
+            return
+        task = asyncio.create_task(self.cache.invalidate(layer, bbox))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+def create_cache_invalidator() -> CacheInvalidator:
+    """Creates the cache invalidator from settings."""
+    settings = get_settings()
+    return CacheInvalidator(
+        cache=tile_cache if settings.mapserver.CACHE_INVALIDATION_ENABLED else None,
+        channel=settings.mapserver.CACHE_INVALIDATION_CHANNEL,
+    )
+
+
+cache_invalidator = create_cache_invalidator()
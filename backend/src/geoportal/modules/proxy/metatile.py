@@ -0,0 +1,152 @@
+import io
+from dataclasses import dataclass
+
+from PIL import Image
+
+from src.geoportal.modules.proxy.wms import (
+    GRID_ORIGINS,
+    BBox,
+    WmsRequestType,
+    canonical_query,
+    get_request_type,
+    get_srs,
+    parse_bbox,
+    with_bbox,
+)
+
+# Tolerance, in tiles, for a bounding box to be considered aligned to the grid.
+GRID_TOLERANCE = 1e-6
+
+PIL_FORMATS = {
+    'image/png': 'PNG',
+    'image/jpeg': 'JPEG',
+    'image/webp': 'WEBP',
+}
+
+
+@dataclass(slots=True)
+class MetatileTile:
+    """A single tile of a metatile and its position in the rendered image."""
+
+    column: int
+    row: int
+    params: dict[str, str]
+
+
+@dataclass(slots=True)
+class MetatilePlan:
+    """Describes how to render a metatile and slice it into tiles."""
+
+    params: dict[str, str]
+    query: str
+    tiles: list[MetatileTile]
+    tile_width: int
+    tile_height: int
+    buffer: int
+    image_format: str
+
+
+def is_tiled_get_map(params: dict[str, str]) -> bool:
+    """Checks whether normalized params describe a tiled GetMap request."""
+    return (
+        get_request_type(params) == WmsRequestType.GET_MAP
+        and params.get('TILED') == 'true'
+    )
+
+
+def plan_metatile(
+    params: dict[str, str], size: int, buffer: int = 0
+) -> MetatilePlan | None:
+    """
+    Plans the `size`x`size` metatile containing the tile requested by params.
+
+    The tile must belong to the default tile grid of a known projection,
+    otherwise None is returned and the tile is rendered on its own.
+    """
+    image_format = PIL_FORMATS.get(params.get('FORMAT', '').split(';')[0])
+    origin = GRID_ORIGINS.get(get_srs(params))
+    bbox = parse_bbox(params)
+    try:
+        tile_width, tile_height = int(params['WIDTH']), int(params['HEIGHT'])
+    except (KeyError, ValueError):
+        return None
+    if size < 2 or image_format is None or origin is None or bbox is None:
+        return None
+
+    minx, miny, maxx, maxy = bbox
+    span_x, span_y = maxx - minx, maxy - miny
+    if span_x <= 0 or span_y <= 0:
+        return None
+    column = (minx - origin[0]) / span_x
+    row = (origin[1] - maxy) / span_y
+    if (
+        abs(column - round(column)) > GRID_TOLERANCE
+        or abs(row - round(row)) > GRID_TOLERANCE
+    ):
+        return None
+
+    column, row = round(column), round(row)
+    meta_minx = origin[0] + column // size * size * span_x
+    meta_maxy = origin[1] - row // size * size * span_y
+    tiles = [
+        MetatileTile(
+            column=i,
+            row=j,
+            params=with_bbox(
+                params,
+                (
+                    meta_minx + i * span_x,
+                    meta_maxy - (j + 1) * span_y,
+                    meta_minx + (i + 1) * span_x,
+                    meta_maxy - j * span_y,
+                ),
+            ),
+        )
+        for j in range(size)
+        for i in range(size)
+    ]
+    # The requested tile keeps its own params, so its cache key always matches.
+    tiles[row % size * size + column % size].params = params
+
+    buffer_x = buffer * span_x / tile_width
+    buffer_y = buffer * span_y / tile_height
+    meta_bbox: BBox = (
+        meta_minx - buffer_x,
+        meta_maxy - size * span_y - buffer_y,
+        meta_minx + size * span_x + buffer_x,
+        meta_maxy + buffer_y,
+    )
+    meta_params = with_bbox(params, meta_bbox)
+    meta_params['WIDTH'] = str(size * tile_width + 2 * buffer)
+    meta_params['HEIGHT'] = str(size * tile_height + 2 * buffer)
+
+    return MetatilePlan(
+        params=meta_params,
+        query=canonical_query(meta_params),
+        tiles=tiles,
+        tile_width=tile_width,
+        tile_height=tile_height,
+        buffer=buffer,
+        image_format=image_format,
+    )
+
+
+def slice_metatile(content: bytes, plan: MetatilePlan) -> list[bytes]:
+    """
+    Slices a rendered metatile into tiles, in the order of `plan.tiles`.
+
+    This is CPU bound and should run outside of the event loop.
+    """
+    with Image.open(io.BytesIO(content)) as image:
+        image.load()
+        sliced = []
+        for tile in plan.tiles:
+            left = plan.buffer + tile.column * plan.tile_width
+            top = plan.buffer + tile.row * plan.tile_height
+            crop = image.crop(
+                (left, top, left + plan.tile_width, top + plan.tile_height)
+            )
+            output = io.BytesIO()
+            crop.save(output, format=plan.image_format)
+            sliced.append(output.getvalue())
+    return sliced
@@ -0,0 +1,314 @@
+"""
+Pre-renders map tiles into the proxy tile cache.
+
+Tiles are requested through the same path as proxied client requests, so
+they land under the same cache keys, use metatiling when it is enabled and
+are skipped when already cached. Progress is checkpointed to a state file
+and an interrupted run continues from there when started again. Failed
+tiles hold the checkpoint back, so they are retried by the next run.
+
+Usage:
+    python -m src.geoportal.modules.proxy.seed --layers park,museum --zoom 8-14
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlencode
+
+from src.geoportal.modules.proxy.client import upstream_client
+from src.geoportal.modules.proxy.service import (
+    forward_headers,
+    is_storable,
+    mapserver_proxy,
+)
+from src.geoportal.modules.proxy.wms import (
+    EARTH_RADIUS,
+    GRID_ORIGINS,
+    BBox,
+    WmsRequestType,
+    build_cache_key,
+    normalize_params,
+)
+
+logger = logging.getLogger(__name__)
+
+# Extent of the `geoportal.map` mapfile (Sverdlovsk Oblast).
+DEFAULT_BBOX: BBox = (59.0, 55.0, 63.0, 58.0)
+DEFAULT_LAYERS = ('boundary', 'attraction', 'museum', 'park')
+DEFAULT_PATH = 'mapserver'
+DEFAULT_MAP = '/etc/mapserver/geoportal.map'
+TILE_SIZE = 256
+REPORT_INTERVAL_SECONDS = 5.0
+
+
+@dataclass(slots=True)
+class SeedTile:
+    """A tile of the EPSG:3857 grid to seed."""
+
+    layer: str
+    zoom: int
+    x: int
+    y: int
+
+
+@dataclass(slots=True)
+class SeedStats:
+    """Counters of a seeding run."""
+
+    rendered: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.rendered + self.skipped + self.failed
+
+
+def tile_range(bbox: BBox, zoom: int) -> tuple[range, range]:
+    """Returns the column and row ranges of the tiles covering an EPSG:4326 bbox."""
+    minx, miny, maxx, maxy = bbox
+    count = 2**zoom
+
+    def column(lon: float) -> int:
+        return min(count - 1, max(0, int((lon + 180) / 360 * count)))
+
+    def row(lat: float) -> int:
+        lat = math.radians(lat)
+        y = (1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2
+        return min(count - 1, max(0, int(y * count)))
+
+    return range(column(minx), column(maxx) + 1), range(row(maxy), row(miny) + 1)
+
+
+def iter_tiles(layers: list[str], zooms: range, bbox: BBox) -> Iterator[SeedTile]:
+    """Enumerates tiles in a stable order, neighbouring tiles close together."""
+    for zoom in zooms:
+        columns, rows = tile_range(bbox, zoom)
+        for layer in layers:
+            for y in rows:
+                for x in columns:
+                    yield SeedTile(layer=layer, zoom=zoom, x=x, y=y)
+
+
+def tile_query(tile: SeedTile, extra: dict[str, str]) -> str:
+    """Builds the GetMap query OpenLayers TileWMS sends for a tile."""
+    span = 2 * math.pi * EARTH_RADIUS / 2**tile.zoom
+    origin_x, origin_y = GRID_ORIGINS['epsg:3857']
+    minx = origin_x + tile.x * span
+    maxy = origin_y - tile.y * span
+    params = {
+        **extra,
+        'SERVICE': 'WMS',
+        'VERSION': '1.3.0',
+        'REQUEST': 'GetMap',
+        'FORMAT': 'image/png',
+        'TRANSPARENT': 'true',
+        'LAYERS': tile.layer,
+        'STYLES': '',
+        'TILED': 'true',
+        'WIDTH': str(TILE_SIZE),
+        'HEIGHT': str(TILE_SIZE),
+        'CRS': 'EPSG:3857',
+        'BBOX': ','.join(
+            repr(value) for value in (minx, maxy - span, minx + span, maxy)
+        ),
+    }
+    return urlencode(params)
+
+
+class Seeder:
+    """Seeds tiles with a bounded pool of async workers."""
+
+    def __init__(
+        self,
+        path: str,
+        extra: dict[str, str],
+        workers: int,
+        state_file: Path,
+        job: str = '',
+    ) -> None:
+        self.path = path
+        self.extra = extra
+        self.workers = workers
+        self.state_file = state_file
+        self.job = job
+        self.stats = SeedStats()
+        self._done: set[int] = set()
+        self._watermark = 0
+
+    async def run(self, tiles: Iterator[SeedTile]) -> SeedStats:
+        """Seeds tiles, resuming after the last checkpoint."""
+        start = self._load_checkpoint()
+        self._watermark = start
+        queue: asyncio.Queue[tuple[int, SeedTile] | None] = asyncio.Queue(
+            maxsize=self.workers * 4
+        )
+        workers = [asyncio.create_task(self._work(queue)) for _ in range(self.workers)]
+        reporter = asyncio.create_task(self._report())
+        started = time.monotonic()
+        try:
+            for index, tile in enumerate(tiles):
+                if index >= start:
+                    await queue.put((index, tile))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            reporter.cancel()
+            self._save_checkpoint()
+
+        if not self.stats.failed:
+            self.state_file.unlink(missing_ok=True)
+        elapsed = time.monotonic() - started
+        logger.info(
+            'Seeded %d tiles in %.1fs (%.1f tiles/s): %d rendered, %d skipped, '
+            '%d failed',
+            self.stats.total,
+            elapsed,
+            self.stats.total / elapsed if elapsed else 0,
+            self.stats.rendered,
+            self.stats.skipped,
+            self.stats.failed,
+        )
+        return self.stats
+
+    async def _work(self, queue: asyncio.Queue[tuple[int, SeedTile] | None]) -> None:
+        while (item := await queue.get()) is not None:
+            index, tile = item
+            try:
+                await self._seed(tile)
+            except Exception as exc:
+                self.stats.failed += 1
+                logger.warning('Failed to seed %s: %s', tile, exc)
+                continue
+            self._mark_done(index)
+
+    async def _seed(self, tile: SeedTile) -> None:
+        query = tile_query(tile, self.extra)
+        params = normalize_params(query)
+        cache = mapserver_proxy.cache
+        if cache is not None and await cache.contains(
+            build_cache_key(self.path, params)
+        ):
+            self.stats.skipped += 1
+            return
+        entry, _ = await mapserver_proxy.fetch(
+            self.path, query, params, forward_headers({}, shared=True)
+        )
+        # Service exceptions come with status 200 and are not cached.
+        if not is_storable(entry.status_code, entry.media_type, WmsRequestType.GET_MAP):
+            raise RuntimeError(
+                f'MapServer responded with {entry.status_code} {entry.media_type}'
+            )
+        self.stats.rendered += 1
+
+    def _mark_done(self, index: int) -> None:
+        self._done.add(index)
+        while self._watermark in self._done:
+            self._done.remove(self._watermark)
+            self._watermark += 1
+
+    async def _report(self) -> None:
+        last_total, last_time = 0, time.monotonic()
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL_SECONDS)
+            now = time.monotonic()
+            logger.info(
+                '%d tiles done (%.1f tiles/s), %d rendered, %d skipped, %d failed',
+                self.stats.total,
+                (self.stats.total - last_total) / (now - last_time),
+                self.stats.rendered,
+                self.stats.skipped,
+                self.stats.failed,
+            )
+            last_total, last_time = self.stats.total, now
+            self._save_checkpoint()
+
+    def _load_checkpoint(self) -> int:
+        """Returns the index to resume from, if the checkpoint is for this job."""
+        try:
+            state = json.loads(self.state_file.read_text())
+            if state['job'] != self.job:
+                return 0
+            return int(state['next'])
+        except (OSError, KeyError, TypeError, ValueError):
+            return 0
+
+    def _save_checkpoint(self) -> None:
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self.state_file.write_text(
+            json.dumps({'job': self.job, 'next': self._watermark})
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--layers',
+        default=','.join(DEFAULT_LAYERS),
+        help='Comma separated layers to seed (default: %(default)s)',
+    )
+    parser.add_argument('--zoom', default='8-12', help='Zoom level or range, e.g. 8-12')
+    parser.add_argument(
+        '--bbox',
+        default=','.join(str(value) for value in DEFAULT_BBOX),
+        help='EPSG:4326 bbox minlon,minlat,maxlon,maxlat (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--workers', type=int, default=8, help='Concurrent requests (default: 8)'
+    )
+    parser.add_argument(
+        '--path',
+        default=DEFAULT_PATH,
+        help='MapServer path, as proxied by /proxy/mapserver/{path}',
+    )
+    parser.add_argument(
+        '--map', default=DEFAULT_MAP, help='Value of the MapServer `map` parameter'
+    )
+    parser.add_argument(
+        '--state-file',
+        type=Path,
+        help='Checkpoint file (default: seed.json in the cache directory)',
+    )
+    return parser.parse_args(argv)
+
+
+async def seed(args: argparse.Namespace) -> SeedStats:
+    """Runs a seeding job described by parsed command line arguments."""
+    zoom_min, _, zoom_max = args.zoom.partition('-')
+    zooms = range(int(zoom_min), int(zoom_max or zoom_min) + 1)
+    bbox = tuple(float(value) for value in args.bbox.split(','))
+    layers = [layer for layer in args.layers.split(',') if layer]
+    cache = mapserver_proxy.cache
+    if cache is None:
+        logger.warning('The tile cache is disabled, seeding has no effect')
+    state_file = args.state_file or (
+        (cache.directory if cache is not None else Path('.')) / 'seed.json'
+    )
+
+    await upstream_client.start()
+    try:
+        if cache is not None:
+            await cache.load_invalidations()
+        seeder = Seeder(
+            path=args.path,
+            extra={'map': args.map} if args.map else {},
+            workers=args.workers,
+            state_file=state_file,
+            job=json.dumps([layers, args.zoom, bbox, args.path, args.map]),
+        )
+        return await seeder.run(iter_tiles(layers, zooms, bbox))
+    finally:
+        await upstream_client.stop()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    asyncio.run(seed(parse_args()))
@@ -0,0 +1,315 @@
+import asyncio
+import time
+from typing import AsyncIterator
+
+import httpx
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.core.metrics import metrics_registry
+from src.geoportal.modules.proxy.cache import CachedResponse, TileCache, tile_cache
+from src.geoportal.modules.proxy.client import UpstreamClient, upstream_client
+from src.geoportal.modules.proxy.metatile import (
+    MetatilePlan,
+    is_tiled_get_map,
+    plan_metatile,
+    slice_metatile,
+)
+from src.geoportal.modules.proxy.singleflight import SingleFlight
+from src.geoportal.modules.proxy.wms import (
+    WmsRequestType,
+    build_cache_key,
+    get_pixel_margin,
+    get_request_type,
+    get_scope,
+)
+
+CACHEABLE_REQUEST_TYPES = frozenset(
+    {
+        WmsRequestType.GET_MAP,
+        WmsRequestType.GET_CAPABILITIES,
+        WmsRequestType.GET_LEGEND_GRAPHIC,
+    }
+)
+
+EXCLUDED_REQUEST_HEADERS = frozenset(
+    {'host', 'connection', 'user-agent', 'content-length', 'content-type'}
+)
+# Headers that must not reach MapServer when the response is shared between users.
+PRIVATE_REQUEST_HEADERS = frozenset(
+    {'cookie', 'authorization', 'if-none-match', 'if-modified-since'}
+)
+EXCLUDED_RESPONSE_HEADERS = frozenset(
+    {'content-length', 'transfer-encoding', 'content-encoding'}
+)
+UNCACHED_RESPONSE_HEADERS = frozenset({'date', 'set-cookie', 'connection'})
+
+USER_AGENT = 'GeoportalBackendProxy/1.0'
+
+upstream_duration = metrics_registry.histogram(
+    'mapserver_upstream_duration_seconds',
+    'Time until MapServer response headers arrive, including the wait for '
+    'a concurrency slot.',
+    ('request_type',),
+)
+upstream_responses = metrics_registry.counter(
+    'mapserver_upstream_responses',
+    'MapServer responses by status, or error when none was received.',
+    ('request_type', 'status'),
+)
+upstream_bytes = metrics_registry.counter(
+    'mapserver_upstream_bytes', 'Bytes received from MapServer.', ('request_type',)
+)
+
+
+def forward_headers(headers: dict[str, str], shared: bool = False) -> dict[str, str]:
+    """
+    Filters client request headers before forwarding them to MapServer.
+
+    Shared requests additionally drop credentials and validators, because
+    their response is cached and served to other users.
+    """
+    excluded = EXCLUDED_REQUEST_HEADERS | (
+        PRIVATE_REQUEST_HEADERS if shared else frozenset()
+    )
+    forwarded = {k: v for k, v in headers.items() if k.lower() not in excluded}
+    forwarded['user-agent'] = USER_AGENT
+    return forwarded
+
+
+def response_headers(headers: httpx.Headers) -> dict[str, str]:
+    """Filters MapServer response headers before returning them to the client."""
+    return {
+        k: v for k, v in headers.items() if k.lower() not in EXCLUDED_RESPONSE_HEADERS
+    }
+
+
+def is_storable(
+    status_code: int, content_type: str | None, request_type: WmsRequestType
+) -> bool:
+    """
+    Checks whether a MapServer response may be stored in the cache.
+
+    MapServer reports errors as OGC service exceptions with status 200,
+    so the content type is checked as well.
+    """
+    if status_code != 200:
+        return False
+    content_type = content_type or ''
+    if 'se_xml' in content_type:
+        return False
+    if request_type == WmsRequestType.GET_MAP:
+        return content_type.startswith('image/')
+    return True
+
+
+class MapServerProxy:
+    """
+    Fetches resources from MapServer, serving repeated requests from cache.
+
+    Concurrent identical requests that miss the cache share one upstream fetch.
+    With metatiling enabled, a tiled GetMap miss renders the surrounding
+    metatile once and fills the cache with all of its tiles.
+
+    Symbols and labels of features up to `symbol_margin` pixels outside an
+    image, or outside its metatile buffer, still show in it, so changes
+    within that distance invalidate the cached image too.
+    """
+
+    def __init__(
+        self,
+        upstream: UpstreamClient,
+        cache: TileCache | None,
+        metatile_size: int = 0,
+        metatile_buffer: int = 0,
+        symbol_margin: int = 0,
+    ) -> None:
+        self.upstream = upstream
+        self.cache = cache
+        self.metatile_size = metatile_size
+        self.metatile_buffer = metatile_buffer
+        self.symbol_margin = symbol_margin
+        self.flights: SingleFlight[CachedResponse] = SingleFlight()
+        self.metatile_flights: SingleFlight[dict[str, CachedResponse]] = SingleFlight()
+
+    def build_url(self, path: str, query: str = '') -> str:
+        """Builds the upstream MapServer URL."""
+        target_url = f'{get_settings().mapserver.URL.rstrip("/")}/{path}'
+        if query:
+            target_url += f'?{query}'
+        return target_url
+
+    def is_shared(self, params: dict[str, str]) -> bool:
+        """
+        Checks whether a response to normalized params can be shared between
+        clients, i.e. cached and coalesced rather than streamed through.
+        """
+        return get_request_type(params) in CACHEABLE_REQUEST_TYPES
+
+    async def fetch(
+        self,
+        path: str,
+        query: str,
+        params: dict[str, str],
+        headers: dict[str, str],
+    ) -> tuple[CachedResponse, bool]:
+        """
+        Returns a buffered MapServer response and whether it was a cache hit.
+
+        Cache hits never reach MapServer, and concurrent misses for the same
+        key wait for a single upstream request.
+        """
+        key = build_cache_key(path, params)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached, True
+
+        if self.cache is not None and self.metatile_size and is_tiled_get_map(params):
+            plan = plan_metatile(params, self.metatile_size, self.metatile_buffer)
+            if plan is not None:
+                tiles, _ = await self.metatile_flights.do(
+                    build_cache_key(path, plan.params),
+                    lambda: self._fetch_metatile(path, plan, headers),
+                )
+                if key in tiles:
+                    return tiles[key], False
+
+        entry, _ = await self.flights.do(
+            key, lambda: self._fetch_upstream(key, path, query, params, headers)
+        )
+        return entry, False
+
+    async def _send(
+        self,
+        url: str,
+        headers: dict[str, str],
+        request_type: WmsRequestType,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """Sends a request to MapServer, recording its latency and status."""
+        send = self.upstream.stream if stream else self.upstream.get
+        started = time.perf_counter()
+        try:
+            response = await send(url, headers)
+        except httpx.RequestError:
+            upstream_responses.labels(request_type.value, 'error').inc()
+            raise
+        upstream_duration.labels(request_type.value).observe(
+            time.perf_counter() - started
+        )
+        upstream_responses.labels(request_type.value, str(response.status_code)).inc()
+        if not stream:
+            upstream_bytes.labels(request_type.value).inc(len(response.content))
+        return response
+
+    async def _fetch_upstream(
+        self,
+        key: str,
+        path: str,
+        query: str,
+        params: dict[str, str],
+        headers: dict[str, str],
+    ) -> CachedResponse:
+        upstream = await self._send(
+            self.build_url(path, query), headers, get_request_type(params)
+        )
+        layers, bbox = get_scope(params)
+        entry = CachedResponse(
+            content=upstream.content,
+            media_type=upstream.headers.get('content-type'),
+            status_code=upstream.status_code,
+            headers={
+                k: v
+                for k, v in response_headers(upstream.headers).items()
+                if k.lower() not in UNCACHED_RESPONSE_HEADERS
+            },
+            layers=layers,
+            bbox=bbox,
+            margin=get_pixel_margin(params, self.symbol_margin),
+        )
+        if self.cache is not None and is_storable(
+            entry.status_code, entry.media_type, get_request_type(params)
+        ):
+            await self.cache.set(key, entry)
+        return entry
+
+    async def _fetch_metatile(
+        self, path: str, plan: MetatilePlan, headers: dict[str, str]
+    ) -> dict[str, CachedResponse]:
+        """
+        Renders a metatile, slices it and caches every tile.
+
+        Returns the tiles by cache key, or an empty dict if MapServer did not
+        return an image, in which case tiles are fetched one by one.
+        """
+        upstream = await self._send(
+            self.build_url(path, plan.query), headers, WmsRequestType.GET_MAP
+        )
+        if not is_storable(
+            upstream.status_code,
+            upstream.headers.get('content-type'),
+            WmsRequestType.GET_MAP,
+        ):
+            return {}
+
+        sliced = await asyncio.to_thread(slice_metatile, upstream.content, plan)
+        tile_headers = {
+            k: v
+            for k, v in response_headers(upstream.headers).items()
+            if k.lower() not in UNCACHED_RESPONSE_HEADERS
+        }
+        tiles = {}
+        for tile, content in zip(plan.tiles, sliced):
+            tile_key = build_cache_key(path, tile.params)
+            layers, bbox = get_scope(tile.params)
+            tiles[tile_key] = CachedResponse(
+                content=content,
+                media_type=upstream.headers.get('content-type'),
+                headers=tile_headers,
+                layers=layers,
+                bbox=bbox,
+                margin=get_pixel_margin(tile.params, self.symbol_margin + plan.buffer),
+            )
+            if self.cache is not None:
+                await self.cache.set(tile_key, tiles[tile_key])
+        return tiles
+
+    async def stream(
+        self,
+        path: str,
+        query: str,
+        headers: dict[str, str],
+        request_type: WmsRequestType = WmsRequestType.OTHER,
+    ) -> httpx.Response:
+        """Opens a streamed MapServer response. The caller must close it."""
+        return await self._send(
+            self.build_url(path, query), headers, request_type, stream=True
+        )
+
+    async def iter_bytes(
+        self, response: httpx.Response, request_type: WmsRequestType
+    ) -> AsyncIterator[bytes]:
+        """Yields the body of a streamed response, counting its bytes."""
+        received = upstream_bytes.labels(request_type.value)
+        async for chunk in response.aiter_bytes():
+            received.inc(len(chunk))
+            yield chunk
+
+
+def create_mapserver_proxy() -> MapServerProxy:
+    """Creates the MapServer proxy from settings."""
+    settings = get_settings()
+    return MapServerProxy(
+        upstream=upstream_client,
+        cache=tile_cache,
+        metatile_size=(
+            settings.mapserver.METATILE_SIZE
+            if settings.mapserver.METATILE_ENABLED
+            else 0
+        ),
+        metatile_buffer=settings.mapserver.METATILE_BUFFER,
+        symbol_margin=settings.mapserver.CACHE_INVALIDATION_MARGIN,
+    )
+
+
+mapserver_proxy = create_mapserver_proxy()
@@ -0,0 +1,231 @@
+import hashlib
+import math
+from enum import Enum
+from urllib.parse import parse_qsl, urlencode
+
+# Parameters whose values are case-insensitive per the OGC WMS specification.
+CASE_INSENSITIVE_PARAMS = frozenset(
+    {
+        'SERVICE',
+        'REQUEST',
+        'FORMAT',
+        'INFO_FORMAT',
+        'SRS',
+        'CRS',
+        'TRANSPARENT',
+        'TILED',
+        'EXCEPTIONS',
+    }
+)
+
+
+# Axis-ordered tile grid origins (top-left corner) of the projections OpenLayers
+# builds default WMS tile grids for.
+GRID_ORIGINS = {
+    'epsg:3857': (-20037508.342789244, 20037508.342789244),
+    'epsg:900913': (-20037508.342789244, 20037508.342789244),
+    'epsg:4326': (-180.0, 90.0),
+}
+
+BBox = tuple[float, float, float, float]
+
+EARTH_RADIUS = 6378137.0
+
+
+class WmsRequestType(str, Enum):
+    """Kinds of OGC requests proxied to MapServer."""
+
+    GET_MAP = 'getmap'
+    GET_FEATURE_INFO = 'getfeatureinfo'
+    GET_CAPABILITIES = 'getcapabilities'
+    GET_LEGEND_GRAPHIC = 'getlegendgraphic'
+    OTHER = 'other'
+
+
+def normalize_params(query: str) -> dict[str, str]:
+    """
+    Parses a query string into a dict with upper-cased parameter names.
+
+    Values of case-insensitive parameters are lower-cased so that
+    `FORMAT=image/PNG` and `format=image/png` produce the same result.
+    """
+    params: dict[str, str] = {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        name = key.upper()
+        params[name] = value.lower() if name in CASE_INSENSITIVE_PARAMS else value
+    return params
+
+
+def get_request_type(params: dict[str, str]) -> WmsRequestType:
+    """Returns the OGC request type of normalized parameters."""
+    try:
+        return WmsRequestType(params.get('REQUEST', ''))
+    except ValueError:
+        return WmsRequestType.OTHER
+
+
+def canonical_query(params: dict[str, str]) -> str:
+    """Builds a query string with parameters in a stable order."""
+    return urlencode(sorted(params.items()))
+
+
+def build_cache_key(path: str, params: dict[str, str]) -> str:
+    """
+    Builds a cache key for a MapServer request.
+
+    The key is independent of parameter order and parameter name case.
+    Bounding box coordinates are rounded, so that coordinates computed by
+    different clients for the same tile map to the same key.
+    """
+    if 'BBOX' in params:
+        try:
+            coords = tuple(float(value) for value in params['BBOX'].split(','))
+            params = {**params, 'BBOX': format_bbox(coords)}
+        except ValueError:
+            pass
+    canonical = f'{path.strip("/")}?{canonical_query(params)}'
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def format_bbox(coords: tuple[float, ...]) -> str:
+    """Formats bounding box coordinates with a fixed number of significant digits."""
+    return ','.join(f'{value:.10g}' for value in coords)
+
+
+def get_srs(params: dict[str, str]) -> str:
+    """Returns the spatial reference system of normalized GetMap params."""
+    return params.get('CRS') or params.get('SRS') or ''
+
+
+def has_swapped_axes(params: dict[str, str]) -> bool:
+    """
+    Checks whether BBOX is in latitude/longitude order.
+
+    WMS 1.3.0 follows the EPSG axis order, which is latitude first for
+    EPSG:4326.
+    """
+    return get_srs(params) == 'epsg:4326' and params.get('VERSION', '') >= '1.3'
+
+
+def parse_bbox(params: dict[str, str]) -> BBox | None:
+    """Returns the bounding box of normalized params as (minx, miny, maxx, maxy)."""
+    try:
+        coords = tuple(float(value) for value in params['BBOX'].split(','))
+    except (KeyError, ValueError):
+        return None
+    if len(coords) != 4:
+        return None
+    if has_swapped_axes(params):
+        coords = (coords[1], coords[0], coords[3], coords[2])
+    return coords
+
+
+def with_bbox(params: dict[str, str], bbox: BBox) -> dict[str, str]:
+    """
+    Returns a copy of normalized params with the bounding box replaced.
+
+    Coordinates keep full precision, as they are sent to MapServer.
+    """
+    minx, miny, maxx, maxy = bbox
+    if has_swapped_axes(params):
+        bbox = (miny, minx, maxy, maxx)
+    return {**params, 'BBOX': ','.join(repr(value) for value in bbox)}
+
+
+def to_wgs84(bbox: BBox, srs: str) -> BBox | None:
+    """
+    Converts a bounding box to EPSG:4326, the SRID of the `geo` tables.
+
+    Returns None for projections the proxy does not know.
+    """
+    if srs == 'epsg:4326':
+        return bbox
+    if srs not in ('epsg:3857', 'epsg:900913'):
+        return None
+    minx, miny, maxx, maxy = bbox
+
+    def lon(x: float) -> float:
+        return math.degrees(x / EARTH_RADIUS)
+
+    def lat(y: float) -> float:
+        return math.degrees(2 * math.atan(math.exp(y / EARTH_RADIUS)) - math.pi / 2)
+
+    return lon(minx), lat(miny), lon(maxx), lat(maxy)
+
+
+def get_scope(params: dict[str, str]) -> tuple[tuple[str, ...], BBox | None]:
+    """
+    Returns the layers and EPSG:4326 bounding box a response depends on.
+
+    No layers means the response depends on every layer, no bounding box
+    means it depends on the whole layer.
+    """
+    layers = params.get('LAYERS') or params.get('LAYER') or ''
+    bbox = parse_bbox(params)
+    return (
+        tuple(layer for layer in layers.split(',') if layer),
+        to_wgs84(bbox, get_srs(params)) if bbox is not None else None,
+    )
+
+
+def get_margin(
+    bbox: BBox, srs: str, margin_x: float, margin_y: float
+) -> tuple[float, float]:
+    """
+    Converts a margin around a bounding box from `srs` units to EPSG:4326.
+
+    Returns the largest margin in degrees on either side of each axis, or
+    no margin for projections the proxy does not know.
+    """
+    minx, miny, maxx, maxy = bbox
+    inner = to_wgs84(bbox, srs)
+    outer = to_wgs84(
+        (minx - margin_x, miny - margin_y, maxx + margin_x, maxy + margin_y), srs
+    )
+    if inner is None or outer is None:
+        return 0.0, 0.0
+    return (
+        max(inner[0] - outer[0], outer[2] - inner[2]),
+        max(inner[1] - outer[1], outer[3] - inner[3]),
+    )
+
+
+def get_pixel_margin(params: dict[str, str], pixels: int) -> tuple[float, float]:
+    """
+    Returns the EPSG:4326 margin of `pixels` around the image requested by
+    normalized GetMap params, at the resolution of that image.
+    """
+    bbox = parse_bbox(params)
+    try:
+        width, height = int(params['WIDTH']), int(params['HEIGHT'])
+    except (KeyError, ValueError):
+        return 0.0, 0.0
+    if bbox is None or width <= 0 or height <= 0 or pixels <= 0:
+        return 0.0, 0.0
+    minx, miny, maxx, maxy = bbox
+    return get_margin(
+        bbox,
+        get_srs(params),
+        pixels * (maxx - minx) / width,
+        pixels * (maxy - miny) / height,
+    )
+
+
+def expand(bbox: BBox, margin: tuple[float, float]) -> BBox:
+    """Grows a bounding box by a margin on every side."""
+    return (
+        bbox[0] - margin[0],
+        bbox[1] - margin[1],
+        bbox[2] + margin[0],
+        bbox[3] + margin[1],
+    )
+
+
+def intersects(first: BBox, second: BBox) -> bool:
+    """Checks whether two bounding boxes intersect."""
+    return (
+        first[0] <= second[2]
+        and second[0] <= first[2]
+        and first[1] <= second[3]
+        and second[1] <= first[3]
+    )
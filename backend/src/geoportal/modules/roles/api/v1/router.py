@@ -3,7 +3,8 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.geoportal.db.session import get_db
+from src.geoportal.core.pagination import decode_cursor, encode_cursor
+from src.geoportal.db.session import get_db, get_read_db
 from src.geoportal.modules.auth.dependencies import require_role
 from src.geoportal.modules.roles.api.v1.schemas import (
     RoleCreate,
@@ -41,22 +42,39 @@ async def create_role(
 async def get_roles(
     skip: int = Query(0, ge=0, description='Number of roles to skip'),
     limit: int = Query(100, ge=1, le=1000, description='Number of roles to return'),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = Query(
+        None, description='next_cursor of the previous page, replaces skip'
+    ),
+    estimate_total: bool = Query(
+        False, description='Estimate total from table statistics instead of counting'
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ) -> RoleListResponse:
-    """Get all roles with pagination."""
-    roles = await role_crud.get_all(db, skip=skip, limit=limit)
-    total = await role_crud.count(db)
+    """Get all roles with keyset or offset pagination."""
+    try:
+        after = UUID(decode_cursor(cursor)['id']) if cursor else None
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor'
+        )
+    roles = await role_crud.get_all(db, skip=skip, limit=limit + 1, after=after)
+    total = await role_crud.count(db, estimate=estimate_total)
+    next_cursor = None
+    if len(roles) > limit:
+        roles = roles[:limit]
+        next_cursor = encode_cursor({'id': roles[-1].id})
 
     return RoleListResponse(
         roles=[RoleResponse.model_validate(role) for role in roles],
         total=total,
+        next_cursor=next_cursor,
     )
 
 
 @router.get('/{role_id}', response_model=RoleResponse)
 async def get_role(
     role_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> RoleResponse:
     """Get role by ID."""
     role = await role_crud.get_by_id(db, role_id)
@@ -41,3 +41,6 @@ class RoleListResponse(BaseModel):
 
     roles: list[RoleResponse]
     total: int
+    next_cursor: str | None = Field(
+        None, description='Cursor of the next page, absent on the last page'
+    )
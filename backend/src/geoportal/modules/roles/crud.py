@@ -1,15 +1,24 @@
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.geoportal.db.models import Role
+from src.geoportal.core.pagination import count_rows
+from src.geoportal.db.models import Role, User, user_role_association
+from src.geoportal.modules.auth.principal import principal_cache
+from src.geoportal.modules.auth.revocation import token_revocations
 from src.geoportal.modules.roles.api.v1.schemas import RoleCreate, RoleUpdate
 
+# Role given to every registered user.
+DEFAULT_ROLE_NAME = 'user'
+
 
 class RoleCRUD:
     """CRUD operations for Role model."""
 
+    def __init__(self) -> None:
+        self._default_role: Role | None = None
+
     async def create(self, db: AsyncSession, role_data: RoleCreate) -> Role:
         """Create a new role."""
         role = Role(**role_data.model_dump())
@@ -28,17 +37,44 @@ class RoleCRUD:
         result = await db.execute(select(Role).where(Role.name == name))
         return result.scalar_one_or_none()
 
+    async def get_default(self, db: AsyncSession) -> Role | None:
+        """
+        Get the role given to new users, attached to `db`.
+
+        The role is looked up once and then merged into the session without
+        a query; updating or deleting any role drops the cached copy.
+        """
+        if self._default_role is None:
+            role = await self.get_by_name(db, DEFAULT_ROLE_NAME)
+            if role is not None:
+                self._default_role = role
+            return role
+        return await db.merge(self._default_role, load=False)
+
     async def get_all(
-        self, db: AsyncSession, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after: UUID | None = None,
     ) -> list[Role]:
-        """Get all roles with pagination."""
-        result = await db.execute(select(Role).offset(skip).limit(limit))
+        """
+        Get roles ordered by ID.
+
+        Pass the ID of the last role of a page as `after` to get the next
+        page by keyset; `skip` is kept for offset pagination.
+        """
+        query = select(Role).order_by(Role.id).limit(limit)
+        if after is not None:
+            query = query.where(Role.id > after)
+        else:
+            query = query.offset(skip)
+        result = await db.execute(query)
         return list(result.scalars().all())
 
-    async def count(self, db: AsyncSession) -> int:
-        """Count total number of roles."""
-        result = await db.execute(select(Role))
-        return len(list(result.scalars().all()))
+    async def count(self, db: AsyncSession, estimate: bool = False) -> int:
+        """Count total number of roles, or estimate it from table statistics."""
+        return await count_rows(db, Role.__table__, estimate=estimate)
 
     async def update(
         self, db: AsyncSession, role_id: UUID, role_data: RoleUpdate
@@ -51,8 +87,12 @@ class RoleCRUD:
         update_data = role_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(role, field, value)
+        versions = await self._bump_member_token_versions(db, role_id)
 
         await db.commit()
+        principal_cache.clear()
+        self._default_role = None
+        self._revoke_member_tokens(versions)
         await db.refresh(role)
         return role
 
@@ -62,9 +102,33 @@ class RoleCRUD:
         if not role:
             return False
 
+        versions = await self._bump_member_token_versions(db, role_id)
         await db.delete(role)
         await db.commit()
+        principal_cache.clear()
+        self._default_role = None
+        self._revoke_member_tokens(versions)
         return True
 
+    async def _bump_member_token_versions(
+        self, db: AsyncSession, role_id: UUID
+    ) -> list[tuple[UUID, int]]:
+        """Increments the token version of the role members."""
+        members = select(user_role_association.c.user_id).where(
+            user_role_association.c.role_id == role_id
+        )
+        result = await db.execute(
+            update(User)
+            .where(User.id.in_(members))
+            .values(token_version=User.token_version + 1)
+            .returning(User.id, User.token_version),
+            execution_options={'synchronize_session': False},
+        )
+        return [(user_id, version) for user_id, version in result]
+
+    def _revoke_member_tokens(self, versions: list[tuple[UUID, int]]) -> None:
+        for user_id, version in versions:
+            token_revocations.set_version(user_id, version)
+
 
 role_crud = RoleCRUD()
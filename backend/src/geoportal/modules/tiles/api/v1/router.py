@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from src.geoportal.config.get_settings import get_settings
+from src.geoportal.modules.auth.dependencies import require_role
+from src.geoportal.modules.features.api.v1.schemas import FeatureLayer
+from src.geoportal.modules.proxy.conditional import (
+    is_not_modified,
+    validator_headers,
+)
+from src.geoportal.modules.tiles.service import is_valid_tile, vector_tile_service
+
+router = APIRouter(
+    prefix='/tiles',
+    tags=['Tiles'],
+    dependencies=[Depends(require_role(['user']))],
+)
+
+
+@router.get('/{layer}/{z}/{x}/{y}.mvt')
+async def get_vector_tile(
+    layer: FeatureLayer, z: int, x: int, y: int, request: Request
+) -> Response:
+    """
+    Returns a Mapbox Vector Tile of a layer in the EPSG:3857 XYZ grid.
+    """
+    if not is_valid_tile(z, x, y):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail='Tile does not exist'
+        )
+
+    entry, hit = await vector_tile_service.get(layer.value, z, x, y)
+    headers = {
+        **validator_headers(entry),
+        'cache-control': f'private, max-age={get_settings().mapserver.TILE_MAX_AGE}',
+        'X-Cache': 'HIT' if hit else 'MISS',
+    }
+    if is_not_modified(request.headers, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.content, media_type=entry.media_type, headers=headers)
@@ -0,0 +1,154 @@
+import hashlib
+import math
+from dataclasses import dataclass
+
+from sqlalchemy import Select, func, select
+
+from src.geoportal.db.session import read_session
+from src.geoportal.modules.features.generalization import geometry_source
+from src.geoportal.modules.features.models import LAYER_MODELS
+from src.geoportal.modules.proxy.cache import CachedResponse, TileCache, tile_cache
+from src.geoportal.modules.proxy.singleflight import SingleFlight
+from src.geoportal.modules.proxy.wms import (
+    EARTH_RADIUS,
+    GRID_ORIGINS,
+    BBox,
+    get_margin,
+    to_wgs84,
+)
+
+MVT_MEDIA_TYPE = 'application/vnd.mapbox-vector-tile'
+MAX_ZOOM = 22
+# Tile coordinate space of ST_AsMVTGeom and the clipping buffer around it.
+EXTENT = 4096
+BUFFER = 64
+# Lines and polygons are simplified to this fraction of a 256 px tile pixel.
+SIMPLIFY_PIXELS = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class VectorLayer:
+    """Vector tile settings of a `geo` layer."""
+
+    attributes: tuple[str, ...]
+    max_features: int
+    min_zoom: int = 0
+    simplify: bool = False
+
+
+VECTOR_LAYERS: dict[str, VectorLayer] = {
+    'attraction': VectorLayer(attributes=('name',), max_features=5000, min_zoom=6),
+    'museum': VectorLayer(attributes=('name',), max_features=5000, min_zoom=6),
+    'park': VectorLayer(
+        attributes=('name',), max_features=2000, min_zoom=4, simplify=True
+    ),
+    'boundary': VectorLayer(attributes=('name',), max_features=1000, simplify=True),
+}
+
+
+def tile_span(z: int) -> float:
+    """Returns the EPSG:3857 width of a tile at zoom `z`."""
+    return 2 * math.pi * EARTH_RADIUS / 2**z
+
+
+def tile_bbox(z: int, x: int, y: int) -> BBox:
+    """Returns the EPSG:3857 bounding box of a tile."""
+    span = tile_span(z)
+    origin_x, origin_y = GRID_ORIGINS['epsg:3857']
+    minx = origin_x + x * span
+    maxy = origin_y - y * span
+    return minx, maxy - span, minx + span, maxy
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def tile_cache_key(layer: str, z: int, x: int, y: int) -> str:
+    return hashlib.sha256(f'mvt/{layer}/{z}/{x}/{y}'.encode()).hexdigest()
+
+
+def tile_query(layer: str, z: int, x: int, y: int) -> Select:
+    """
+    Builds a query returning a layer's features within a tile as MVT.
+
+    Geometries are filtered with the `geom` index in EPSG:4326, then
+    transformed, simplified for the zoom level and clipped to the tile.
+    Lines and polygons are read from their precomputed generalized
+    versions where the zoom has one.
+    """
+    config = VECTOR_LAYERS[layer]
+    table = LAYER_MODELS[layer].__table__
+    source, source_geom, generalized = geometry_source(layer, z)
+    span = tile_span(z)
+    envelope = func.ST_TileEnvelope(z, x, y)
+    search_area = func.ST_Transform(
+        func.ST_Expand(envelope, span * BUFFER / EXTENT), 4326
+    )
+
+    geom = func.ST_Transform(source_geom, 3857)
+    if config.simplify and not generalized:
+        geom = func.ST_SimplifyPreserveTopology(geom, span / 256 * SIMPLIFY_PIXELS)
+    rows = (
+        select(
+            table.c.id,
+            *(table.c[name] for name in config.attributes),
+            func.ST_AsMVTGeom(geom, envelope, EXTENT, BUFFER).label('geom'),
+        )
+        .select_from(source)
+        .where(source_geom.op('&&')(search_area))
+        .order_by(table.c.id)
+        .limit(config.max_features)
+        .subquery('tile')
+    )
+    return select(func.ST_AsMVT(rows.table_valued(), layer, EXTENT, 'geom', 'id'))
+
+
+class VectorTileService:
+    """
+    Renders vector tiles from the `geo` tables with PostGIS.
+
+    Tiles share the proxy tile cache, so layer change notifications
+    invalidate them together with the raster tiles of the same layer.
+    Tiles include features within their clipping buffer, so changes within
+    that buffer invalidate them too.
+    """
+
+    def __init__(self, cache: TileCache | None) -> None:
+        self.cache = cache
+        self.flights: SingleFlight[CachedResponse] = SingleFlight()
+
+    async def get(
+        self, layer: str, z: int, x: int, y: int
+    ) -> tuple[CachedResponse, bool]:
+        """Returns a tile and whether it was served from the cache."""
+        key = tile_cache_key(layer, z, x, y)
+        if self.cache is not None:
+            entry = await self.cache.get(key)
+            if entry is not None:
+                return entry, True
+        entry, _ = await self.flights.do(key, lambda: self._render(key, layer, z, x, y))
+        return entry, False
+
+    async def _render(
+        self, key: str, layer: str, z: int, x: int, y: int
+    ) -> CachedResponse:
+        content = b''
+        if z >= VECTOR_LAYERS[layer].min_zoom:
+            async with read_session() as db:
+                content = await db.scalar(tile_query(layer, z, x, y)) or b''
+        bbox = tile_bbox(z, x, y)
+        buffer = tile_span(z) * BUFFER / EXTENT
+        entry = CachedResponse(
+            content=content,
+            media_type=MVT_MEDIA_TYPE,
+            layers=(layer,),
+            bbox=to_wgs84(bbox, 'epsg:3857'),
+            margin=get_margin(bbox, 'epsg:3857', buffer, buffer),
+        )
+        if self.cache is not None:
+            await self.cache.set(key, entry)
+        return entry
+
+
+vector_tile_service = VectorTileService(tile_cache)
@@ -1,18 +1,29 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.geoportal.core.pagination import decode_cursor, encode_cursor
 from src.geoportal.db.models import User
-from src.geoportal.db.session import get_db
+from src.geoportal.db.session import get_db, get_read_db
 from src.geoportal.modules.auth.dependencies import get_current_user, require_role
 from src.geoportal.modules.users.api.v1.schemas import (
+    BulkRoleAssignmentRequest,
+    BulkRoleAssignmentResponse,
     UserCreate,
+    UserImportResponse,
+    UserImportStatus,
     UserListResponse,
     UserResponse,
     UserUpdate,
 )
-from src.geoportal.modules.users.crud import user_crud
+from src.geoportal.modules.users.bulk import (
+    MAX_REPORTED_FAILURES,
+    iter_import_rows,
+    user_importer,
+)
+from src.geoportal.modules.users.crud import UserAlreadyExistsError, user_crud
+from src.geoportal.modules.users.models import normalize_email
 
 router = APIRouter(prefix='/users', tags=['Users'])
 
@@ -23,19 +34,86 @@ async def create_user(
     db: AsyncSession = Depends(get_db),
 ) -> UserResponse:
     """Create a new user."""
-    if await user_crud.get_by_email(db, user_data.email):
+    try:
+        user = await user_crud.create(db, user_data)
+    except UserAlreadyExistsError as exc:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"User with email '{user_data.email}' already exists",
-        )
-    if await user_crud.get_by_username(db, user_data.username):
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+    return UserResponse.model_validate(user)
+
+
+@router.post(
+    '/import',
+    response_model=UserImportResponse,
+    dependencies=[Depends(require_role(['admin']))],
+)
+async def import_users(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> UserImportResponse:
+    """
+    Create users from a CSV or JSON Lines request body.
+
+    CSV needs a header with `email`, `username` and `password` columns and
+    optionally `is_active`; JSON Lines needs one object with the same keys
+    per line. The body is processed in batches as it arrives; rows are
+    counted as created, existing, invalid or failed, and invalid and
+    failed rows are listed with their errors.
+    """
+    media_type = request.headers.get('content-type', '').split(';')[0].strip()
+    try:
+        rows = iter_import_rows(request.stream(), media_type)
+    except ValueError as exc:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"User with username '{user_data.username}' already exists",
-        )
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc)
+        ) from exc
 
-    user = await user_crud.create(db, user_data)
-    return UserResponse.model_validate(user)
+    counts = {import_status: 0 for import_status in UserImportStatus}
+    failures = []
+    # Only counts and the first failed rows are kept, so memory does not
+    # grow with the file.
+    async for result in user_importer.run(db, rows):
+        counts[result.status] += 1
+        if (
+            result.status in (UserImportStatus.INVALID, UserImportStatus.FAILED)
+            and len(failures) < MAX_REPORTED_FAILURES
+        ):
+            failures.append(result)
+    return UserImportResponse(
+        created=counts[UserImportStatus.CREATED],
+        existing=counts[UserImportStatus.EXISTS],
+        invalid=counts[UserImportStatus.INVALID],
+        failed=counts[UserImportStatus.FAILED],
+        failures=failures,
+        failures_truncated=(
+            counts[UserImportStatus.INVALID] + counts[UserImportStatus.FAILED]
+            > len(failures)
+        ),
+    )
+
+
+@router.post(
+    '/roles/{role_id}',
+    response_model=BulkRoleAssignmentResponse,
+    dependencies=[Depends(require_role(['admin']))],
+)
+async def assign_role_to_users(
+    role_id: UUID,
+    assignment: BulkRoleAssignmentRequest,
+    db: AsyncSession = Depends(get_db),
+) -> BulkRoleAssignmentResponse:
+    """Assign a role to many users at once."""
+    result = await user_crud.assign_role_to_users(db, role_id, assignment.user_ids)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Role with id '{role_id}' not found",
+        )
+    assigned, already_assigned, not_found = result
+    return BulkRoleAssignmentResponse(
+        assigned=assigned, already_assigned=already_assigned, not_found=not_found
+    )
 
 
 @router.get(
@@ -46,14 +124,32 @@ async def create_user(
 async def get_users(
     skip: int = Query(0, ge=0, description='Number of users to skip'),
     limit: int = Query(100, ge=1, le=1000, description='Number of users to return'),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = Query(
+        None, description='next_cursor of the previous page, replaces skip'
+    ),
+    estimate_total: bool = Query(
+        False, description='Estimate total from table statistics instead of counting'
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ) -> UserListResponse:
-    """Get all users with pagination."""
-    users = await user_crud.get_all(db, skip=skip, limit=limit)
-    total = await user_crud.count(db)
+    """Get all users with keyset or offset pagination."""
+    try:
+        after = UUID(decode_cursor(cursor)['id']) if cursor else None
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor'
+        )
+    users = await user_crud.get_all(db, skip=skip, limit=limit + 1, after=after)
+    total = await user_crud.count(db, estimate=estimate_total)
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor({'id': users[-1].id})
+
     return UserListResponse(
         users=[UserResponse.model_validate(user) for user in users],
         total=total,
+        next_cursor=next_cursor,
     )
 
 
@@ -74,7 +170,7 @@ async def read_users_me(
 )
 async def get_user(
     user_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> UserResponse:
     """Get user by ID."""
     user = await user_crud.get_by_id(db, user_id)
@@ -129,7 +225,7 @@ async def update_user(
             detail=f"User with id '{user_id}' not found",
         )
 
-    if user_data.email and user_data.email != existing_user.email:
+    if user_data.email and normalize_email(user_data.email) != existing_user.email:
         if await user_crud.get_by_email(db, user_data.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
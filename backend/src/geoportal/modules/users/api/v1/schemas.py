@@ -1,3 +1,4 @@
+from enum import Enum
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
@@ -45,3 +46,53 @@ class UserListResponse(BaseModel):
 
     users: list[UserResponse]
     total: int
+    next_cursor: str | None = Field(
+        None, description='Cursor of the next page, absent on the last page'
+    )
+
+
+class UserImportStatus(str, Enum):
+    """Outcome of importing one user."""
+
+    CREATED = 'created'
+    EXISTS = 'exists'
+    INVALID = 'invalid'
+    FAILED = 'failed'
+
+
+class UserImportRowResult(BaseModel):
+    """Result of importing one row of a user import file."""
+
+    row: int = Field(..., description='Row number, starting at 1 after the header')
+    status: UserImportStatus
+    id: UUID | None = Field(None, description='ID of the created user')
+    error: str | None = None
+
+
+class UserImportResponse(BaseModel):
+    """Schema for a bulk user import response."""
+
+    created: int
+    existing: int
+    invalid: int
+    failed: int
+    failures: list[UserImportRowResult] = Field(
+        ..., description='Invalid and failed rows, the first 1000'
+    )
+    failures_truncated: bool = Field(
+        False, description='Whether more rows failed than are reported'
+    )
+
+
+class BulkRoleAssignmentRequest(BaseModel):
+    """Schema for assigning a role to many users."""
+
+    user_ids: list[UUID] = Field(..., min_length=1, max_length=10000)
+
+
+class BulkRoleAssignmentResponse(BaseModel):
+    """Schema for a bulk role assignment response."""
+
+    assigned: list[UUID] = Field(..., description='Users that got the role')
+    already_assigned: list[UUID] = Field(..., description='Users that had the role')
+    not_found: list[UUID] = Field(..., description='Unknown user IDs')
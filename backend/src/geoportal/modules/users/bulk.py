@@ -0,0 +1,243 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.geoportal.core.hashing import password_hasher
+from src.geoportal.db.models import User, user_role_association
+from src.geoportal.modules.roles.crud import role_crud
+from src.geoportal.modules.users.api.v1.schemas import (
+    UserCreate,
+    UserImportRowResult,
+    UserImportStatus,
+)
+from src.geoportal.modules.users.models import normalize_email
+
+# Rows hashed, inserted and committed together.
+IMPORT_BATCH_SIZE = 500
+# Invalid and failed rows listed in an import response, which otherwise
+# only holds counts.
+MAX_REPORTED_FAILURES = 1000
+
+CSV_MEDIA_TYPES = frozenset({'text/csv'})
+JSON_LINES_MEDIA_TYPES = frozenset(
+    {'application/x-ndjson', 'application/jsonl', 'application/json'}
+)
+
+
+@dataclass(slots=True)
+class ImportRow:
+    """A parsed row of a user import file."""
+
+    number: int
+    data: dict[str, Any] | None
+    error: str | None = None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Splits a UTF-8 byte stream into lines without reading it whole."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[ImportRow]:
+    """
+    Parses CSV with a header row, e.g. `email,username,password,is_active`.
+
+    Fields must not contain line breaks.
+    """
+    header: list[str] | None = None
+    number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield ImportRow(number, None, f'Expected {len(header)} fields')
+            continue
+        yield ImportRow(number, dict(zip(header, values)))
+
+
+async def iter_json_lines_rows(lines: AsyncIterator[str]) -> AsyncIterator[ImportRow]:
+    """Parses JSON Lines, one user object per line."""
+    number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield ImportRow(number, None, f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(data, dict):
+            yield ImportRow(number, None, 'Expected a JSON object')
+            continue
+        yield ImportRow(number, data)
+
+
+def iter_import_rows(
+    chunks: AsyncIterator[bytes], media_type: str
+) -> AsyncIterator[ImportRow]:
+    """
+    Parses a user import stream of the given media type.
+
+    Raises ValueError for unsupported media types.
+    """
+    if media_type in CSV_MEDIA_TYPES:
+        return iter_csv_rows(iter_lines(chunks))
+    if media_type in JSON_LINES_MEDIA_TYPES:
+        return iter_json_lines_rows(iter_lines(chunks))
+    raise ValueError(f'Unsupported media type {media_type!r}')
+
+
+class UserImporter:
+    """
+    Imports users in batches.
+
+    Each batch is validated, hashed in parallel on the password hashing
+    pool and inserted with a single `INSERT ... ON CONFLICT DO NOTHING`,
+    together with the default role, in its own transaction. Users whose
+    email or username is taken are reported as existing.
+    """
+
+    async def run(
+        self, db: AsyncSession, rows: AsyncIterator[ImportRow]
+    ) -> AsyncIterator[UserImportRowResult]:
+        batch: list[ImportRow] = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                for result in await self._import_batch(db, batch):
+                    yield result
+                batch = []
+        if batch:
+            for result in await self._import_batch(db, batch):
+                yield result
+
+    async def _import_batch(
+        self, db: AsyncSession, batch: list[ImportRow]
+    ) -> list[UserImportRowResult]:
+        results: dict[int, UserImportRowResult] = {}
+        valid: list[tuple[int, UserCreate]] = []
+        for row in batch:
+            if row.data is None:
+                results[row.number] = self._result(
+                    row.number, UserImportStatus.INVALID, error=row.error
+                )
+                continue
+            try:
+                valid.append((row.number, UserCreate(**row.data)))
+            except ValidationError as exc:
+                results[row.number] = self._result(
+                    row.number,
+                    UserImportStatus.INVALID,
+                    error='; '.join(error['msg'] for error in exc.errors()),
+                )
+
+        valid = self._drop_repeated(valid, results)
+        hashes = await password_hasher.hash_many([user.password for _, user in valid])
+        values = []
+        for (number, user), hashed_password in zip(valid, hashes):
+            if isinstance(hashed_password, Exception):
+                results[number] = self._result(
+                    number, UserImportStatus.FAILED, error=str(hashed_password)
+                )
+                continue
+            values.append(
+                (
+                    number,
+                    {
+                        'email': normalize_email(user.email),
+                        'username': user.username,
+                        'hashed_password': hashed_password,
+                        'is_active': user.is_active,
+                    },
+                )
+            )
+
+        if values:
+            created = await self._insert(db, [value for _, value in values])
+            for number, value in values:
+                user_id = created.get((value['email'], value['username']))
+                results[number] = (
+                    self._result(number, UserImportStatus.CREATED, user_id=user_id)
+                    if user_id is not None
+                    else self._result(number, UserImportStatus.EXISTS)
+                )
+        return [results[number] for number in sorted(results)]
+
+    def _drop_repeated(
+        self,
+        valid: list[tuple[int, UserCreate]],
+        results: dict[int, UserImportRowResult],
+    ) -> list[tuple[int, UserCreate]]:
+        """
+        Reports rows repeating an email or username of an earlier row in
+        the batch as existing, as the insert skips them.
+        """
+        emails: set[str] = set()
+        usernames: set[str] = set()
+        unique = []
+        for number, user in valid:
+            email = normalize_email(user.email)
+            if email in emails or user.username in usernames:
+                results[number] = self._result(number, UserImportStatus.EXISTS)
+                continue
+            emails.add(email)
+            usernames.add(user.username)
+            unique.append((number, user))
+        return unique
+
+    async def _insert(
+        self, db: AsyncSession, values: list[dict[str, Any]]
+    ) -> dict[tuple[str, str], Any]:
+        """Inserts users, returning the IDs of created users by email and username."""
+        result = await db.execute(
+            pg_insert(User)
+            .values(values)
+            .on_conflict_do_nothing()
+            .returning(User.id, User.email, User.username)
+        )
+        created = {(email, username): user_id for user_id, email, username in result}
+        default_role = await role_crud.get_default(db)
+        if created and default_role is not None:
+            await db.execute(
+                insert(user_role_association),
+                [
+                    {'user_id': user_id, 'role_id': default_role.id}
+                    for user_id in created.values()
+                ],
+            )
+        await db.commit()
+        return created
+
+    @staticmethod
+    def _result(
+        number: int,
+        status: UserImportStatus,
+        user_id: Any = None,
+        error: str | None = None,
+    ) -> UserImportRowResult:
+        return UserImportRowResult(row=number, status=status, id=user_id, error=error)
+
+
+user_importer = UserImporter()
@@ -1,37 +1,77 @@
+from datetime import timedelta
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.geoportal.core.security import get_password_hash
-from src.geoportal.db.models import User
+from src.geoportal.core.hashing import password_hasher
+from src.geoportal.core.pagination import count_rows
+from src.geoportal.db.models import User, UserDeletion, user_role_association
+from src.geoportal.modules.auth.principal import principal_cache
+from src.geoportal.modules.auth.revocation import token_revocations
 from src.geoportal.modules.roles.crud import role_crud
 from src.geoportal.modules.users.api.v1.schemas import UserCreate, UserUpdate
+from src.geoportal.modules.users.models import normalize_email
+
+# Changes to these fields revoke self-contained access tokens of the user.
+TOKEN_CLAIM_FIELDS = frozenset({'hashed_password', 'is_active'})
+
+# Unique constraints of the users table, by the field they protect.
+UNIQUE_CONSTRAINTS = {'ix_users_email': 'email', 'ix_users_username': 'username'}
+
+
+class UserAlreadyExistsError(Exception):
+    """Raised when a user with the same email or username already exists."""
+
+    def __init__(self, field: str, value: str) -> None:
+        super().__init__(f"User with {field} '{value}' already exists")
+        self.field = field
+        self.value = value
+
+
+def unique_violation_field(exc: IntegrityError) -> str | None:
+    """Returns the user field whose unique constraint `exc` violated, if any."""
+    constraint = getattr(exc.orig.__cause__, 'constraint_name', None)
+    if constraint is None:
+        message = str(exc.orig)
+        constraint = next(
+            (name for name in UNIQUE_CONSTRAINTS if name in message), None
+        )
+    return UNIQUE_CONSTRAINTS.get(constraint)
 
 
 class UserCRUD:
     """CRUD operations for User model."""
 
     async def create(self, db: AsyncSession, user_data: UserCreate) -> User:
-        """Create a new user."""
-        hashed_password = get_password_hash(user_data.password)
+        """
+        Create a new user with the default role in a single transaction.
+
+        Uniqueness is enforced by the database: raises UserAlreadyExistsError
+        if the email or username is taken.
+        """
+        hashed_password = await password_hasher.hash(user_data.password)
         user = User(
             email=user_data.email,
             username=user_data.username,
             hashed_password=hashed_password,
             is_active=user_data.is_active,
+            token_version=0,
         )
+        default_role = await role_crud.get_default(db)
+        user.roles = [default_role] if default_role is not None else []
         db.add(user)
-        await db.commit()
-        await db.refresh(user, attribute_names=['roles'])
-        
-        user_role = await role_crud.get_by_name(db, 'user')
-        if user_role and user_role not in user.roles:
-            user.roles.append(user_role)
+        try:
             await db.commit()
-            await db.refresh(user, attribute_names=['roles'])
-        
+        except IntegrityError as exc:
+            await db.rollback()
+            field = unique_violation_field(exc)
+            if field is None:
+                raise
+            raise UserAlreadyExistsError(field, getattr(user_data, field)) from exc
         return user
 
     async def get_by_id(self, db: AsyncSession, user_id: UUID) -> User | None:
@@ -42,8 +82,10 @@ class UserCRUD:
         return result.scalar_one_or_none()
 
     async def get_by_email(self, db: AsyncSession, email: str) -> User | None:
-        """Get user by email."""
-        result = await db.execute(select(User).where(User.email == email))
+        """Get user by email, regardless of case."""
+        result = await db.execute(
+            select(User).where(func.lower(User.email) == normalize_email(email))
+        )
         return result.scalar_one_or_none()
 
     async def get_by_username(self, db: AsyncSession, username: str) -> User | None:
@@ -52,18 +94,29 @@ class UserCRUD:
         return result.scalar_one_or_none()
 
     async def get_all(
-        self, db: AsyncSession, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after: UUID | None = None,
     ) -> list[User]:
-        """Get all users with pagination and preloaded roles."""
-        result = await db.execute(
-            select(User).offset(skip).limit(limit).options(selectinload(User.roles))
-        )
+        """
+        Get users ordered by ID with preloaded roles.
+
+        Pass the ID of the last user of a page as `after` to get the next
+        page by keyset; `skip` is kept for offset pagination.
+        """
+        query = select(User).order_by(User.id).limit(limit)
+        if after is not None:
+            query = query.where(User.id > after)
+        else:
+            query = query.offset(skip)
+        result = await db.execute(query.options(selectinload(User.roles)))
         return list(result.scalars().all())
 
-    async def count(self, db: AsyncSession) -> int:
-        """Count total number of users."""
-        result = await db.execute(select(User))
-        return len(list(result.scalars().all()))
+    async def count(self, db: AsyncSession, estimate: bool = False) -> int:
+        """Count total number of users, or estimate it from table statistics."""
+        return await count_rows(db, User.__table__, estimate=estimate)
 
     async def update(
         self, db: AsyncSession, user_id: UUID, user_data: UserUpdate
@@ -76,17 +129,23 @@ class UserCRUD:
         update_data = user_data.model_dump(exclude_unset=True)
 
         if 'password' in update_data and update_data['password']:
-            hashed_password = get_password_hash(update_data['password'])
+            hashed_password = await password_hasher.hash(update_data['password'])
             update_data['hashed_password'] = hashed_password
             del update_data['password']
         else:
             if 'password' in update_data:
                 del update_data['password']
 
+        revoke_tokens = bool(TOKEN_CLAIM_FIELDS & update_data.keys())
         for field, value in update_data.items():
             setattr(user, field, value)
+        if revoke_tokens:
+            user.token_version += 1
 
         await db.commit()
+        principal_cache.invalidate(user.id)
+        if revoke_tokens:
+            token_revocations.set_version(user.id, user.token_version)
         await db.refresh(user, attribute_names=['roles'])
         return user
 
@@ -97,7 +156,19 @@ class UserCRUD:
             return False
 
         await db.delete(user)
+        # Lets other processes revoke the user's self-contained tokens;
+        # deletions older than the token lifetime are dropped.
+        await db.execute(
+            delete(UserDeletion).where(
+                UserDeletion.deleted_at
+                < func.now()
+                - timedelta(seconds=token_revocations.token_lifetime_seconds)
+            )
+        )
+        db.add(UserDeletion(user_id=user_id))
         await db.commit()
+        principal_cache.invalidate(user_id)
+        token_revocations.mark_deleted(user_id)
         return True
 
     async def assign_role_to_user(
@@ -114,10 +185,62 @@ class UserCRUD:
 
         if role not in user.roles:
             user.roles.append(role)
+            user.token_version += 1
             await db.commit()
+            principal_cache.invalidate(user.id)
+            token_revocations.set_version(user.id, user.token_version)
             await db.refresh(user, attribute_names=['roles'])
 
         return user
 
+    async def assign_role_to_users(
+        self, db: AsyncSession, role_id: UUID, user_ids: list[UUID]
+    ) -> tuple[list[UUID], list[UUID], list[UUID]] | None:
+        """
+        Assign a role to many users with set-based statements.
+
+        Returns the users that got the role, the users that already had it
+        and the unknown user IDs, or None if the role does not exist.
+        """
+        if await role_crud.get_by_id(db, role_id) is None:
+            return None
+
+        user_ids = list(dict.fromkeys(user_ids))
+        existing = set(
+            (await db.execute(select(User.id).where(User.id.in_(user_ids))))
+            .scalars()
+            .all()
+        )
+        result = await db.execute(
+            pg_insert(user_role_association)
+            .from_select(
+                ['user_id', 'role_id'],
+                select(User.id, literal(role_id)).where(User.id.in_(existing)),
+            )
+            .on_conflict_do_nothing()
+            .returning(user_role_association.c.user_id)
+        )
+        assigned = set(result.scalars().all())
+        versions = []
+        if assigned:
+            result = await db.execute(
+                update(User)
+                .where(User.id.in_(assigned))
+                .values(token_version=User.token_version + 1)
+                .returning(User.id, User.token_version),
+                execution_options={'synchronize_session': False},
+            )
+            versions = list(result)
+        await db.commit()
+
+        for user_id, version in versions:
+            principal_cache.invalidate(user_id)
+            token_revocations.set_version(user_id, version)
+        return (
+            [user_id for user_id in user_ids if user_id in assigned],
+            [user_id for user_id in user_ids if user_id in existing - assigned],
+            [user_id for user_id in user_ids if user_id not in existing],
+        )
+
 
 user_crud = UserCRUD()
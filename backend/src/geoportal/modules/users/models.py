@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Boolean, Column, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, validates
 
@@ -8,14 +8,35 @@ from src.geoportal.db.associations import user_role_association
 from src.geoportal.db.base_class import Base
 
 
+def normalize_email(email: str) -> str:
+    """Returns the stored form of an email; emails are unique regardless of case."""
+    return email.lower()
+
+
 class User(Base):
     __tablename__ = 'users'
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    email = Column(String(255), unique=True, index=True, nullable=False)
+    email = Column(String(255), nullable=False)
     username = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
+    # Incremented whenever issued access tokens must stop carrying stale claims.
+    token_version = Column(Integer, default=0, server_default='0', nullable=False)
+
+    __table_args__ = (
+        # Emails are stored normalized; the index also rejects emails that
+        # differ only in case when written around the ORM.
+        Index('ix_users_email', func.lower(email), unique=True),
+        # Only users whose tokens were ever revoked are loaded by the
+        # token revocation check.
+        Index(
+            'ix_users_token_version',
+            'id',
+            'token_version',
+            postgresql_where=token_version > 0,
+        ),
+    )
 
     roles = relationship(
         'Role', secondary=user_role_association, back_populates='users', lazy='select'
@@ -25,7 +46,7 @@ class User(Base):
     def validate_email(self, key, email_address):
         if '@' not in email_address:
             raise ValueError('Failed email validation')
-        return email_address.lower()
+        return normalize_email(email_address)
 
     @validates('username')
     def validate_username(self, key, username):
@@ -35,3 +56,22 @@ class User(Base):
 
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}', username='{self.username}')>"
+
+
+class UserDeletion(Base):
+    """
+    A recently deleted user, whose self-contained tokens are revoked.
+
+    Rows older than the access token lifetime no longer matter and are
+    removed on later deletions.
+    """
+
+    __tablename__ = 'user_deletions'
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    deleted_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f'<UserDeletion(user_id={self.user_id})>'
@@ -0,0 +1,124 @@
+"""Add geo change notifications
+
+Revision ID: 3f1c2a7d9b40
+Revises: badb8a0a0072
+Create Date: 2026-10-18 10:12:31.529417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b40'
+down_revision: Union[str, Sequence[str], None] = 'badb8a0a0072'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANNEL = 'geo_changes'
+LAYER_TABLES = ('attraction', 'museum', 'park', 'boundary')
+
+# Statement level triggers send one notification per statement with the
+# EPSG:4326 extent of all changed rows, so bulk reloads stay cheap.
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION public.geo_notify_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    extent box2d;
+    changed bigint;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT ST_Extent(geom), count(*) INTO extent, changed FROM new_rows;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT ST_Extent(geom), count(*) INTO extent, changed
+        FROM (
+            SELECT geom FROM old_rows
+            UNION ALL
+            SELECT geom FROM new_rows
+        ) AS changed_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT ST_Extent(geom), count(*) INTO extent, changed FROM old_rows;
+    ELSE
+        changed := 1;
+    END IF;
+
+    IF changed > 0 THEN
+        PERFORM pg_notify(
+            TG_ARGV[0],
+            json_build_object(
+                'layer', TG_TABLE_NAME,
+                'bbox', CASE WHEN extent IS NULL THEN NULL ELSE json_build_array(
+                    ST_XMin(extent), ST_YMin(extent), ST_XMax(extent), ST_YMax(extent)
+                ) END
+            )::text
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+TRIGGERS = {
+    'geo_notify_change_insert': 'AFTER INSERT ON {table} '
+    'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT',
+    'geo_notify_change_update': 'AFTER UPDATE ON {table} '
+    'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT',
+    'geo_notify_change_delete': 'AFTER DELETE ON {table} '
+    'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT',
+    'geo_notify_change_truncate': 'AFTER TRUNCATE ON {table} FOR EACH STATEMENT',
+}
+
+
+def _for_existing_table(table: str, statements: list[str]) -> str:
+    """Wraps statements so they only run if the layer table exists."""
+    body = '\n'.join(
+        "        EXECUTE '{}';".format(statement.replace("'", "''"))
+        for statement in statements
+    )
+    return f"""
+DO $$
+BEGIN
+    IF to_regclass('{table}') IS NOT NULL THEN
+{body}
+    END IF;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(NOTIFY_FUNCTION)
+    for name in LAYER_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    f'DROP TRIGGER IF EXISTS {trigger} ON {table}'
+                    for trigger in TRIGGERS
+                ]
+                + [
+                    f'CREATE TRIGGER {trigger} {timing.format(table=table)} '
+                    f"EXECUTE FUNCTION public.geo_notify_change('{CHANNEL}')"
+                    for trigger, timing in TRIGGERS.items()
+                ],
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in LAYER_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    f'DROP TRIGGER IF EXISTS {trigger} ON {table}'
+                    for trigger in TRIGGERS
+                ],
+            )
+        )
+    op.execute('DROP FUNCTION IF EXISTS public.geo_notify_change()')
@@ -0,0 +1,45 @@
+"""Add user deletions
+
+Revision ID: 4e8b2c6d1a39
+Revises: f2a9c7e1b4d8
+Create Date: 2026-10-18 20:14:36.502918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8b2c6d1a39'
+down_revision: Union[str, Sequence[str], None] = 'f2a9c7e1b4d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_deletions',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column(
+            'deleted_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index(
+        'ix_users_token_version',
+        'users',
+        ['id', 'token_version'],
+        postgresql_where=sa.text('token_version > 0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_token_version', table_name='users')
+    op.drop_table('user_deletions')
@@ -0,0 +1,200 @@
+"""Add feature clusters
+
+Revision ID: 8c3b5f1a2d64
+Revises: 6a2d4e8c1f57
+Create Date: 2026-10-18 14:21:09.603871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3b5f1a2d64'
+down_revision: Union[str, Sequence[str], None] = '6a2d4e8c1f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CLUSTER_TABLES = ('attraction', 'museum')
+# Must match CLUSTER_MAX_ZOOM and CELLS_PER_TILE in modules/features/crud.py.
+MAX_ZOOM = 16
+CELLS_PER_TILE = 4
+
+# Grid cells of a point at every zoom, on a Web Mercator grid with
+# CELLS_PER_TILE x CELLS_PER_TILE cells per 256 px tile.
+CELLS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION public.geo_cluster_cells(geom geometry)
+RETURNS TABLE (zoom integer, cell_x integer, cell_y integer, x float8, y float8)
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT
+        z,
+        floor((p.x + 20037508.342789244) * ({CELLS_PER_TILE}::bigint << z)
+            / 40075016.685578488)::integer,
+        floor((p.y + 20037508.342789244) * ({CELLS_PER_TILE}::bigint << z)
+            / 40075016.685578488)::integer,
+        p.x,
+        p.y
+    FROM (
+        SELECT ST_X(m) AS x, ST_Y(m) AS y FROM ST_Transform(geom, 3857) AS m
+    ) AS p,
+    generate_series(0, {MAX_ZOOM}) AS z
+$$;
+"""
+
+# Cells keep the count and coordinate sums of their points, so changes are
+# applied by adding and subtracting without reading the layer table.
+CHANGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION public.geo_cluster_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM geo.feature_clusters WHERE layer = TG_TABLE_NAME;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE geo.feature_clusters AS cluster
+        SET count = cluster.count - removed.count,
+            sum_x = cluster.sum_x - removed.sum_x,
+            sum_y = cluster.sum_y - removed.sum_y
+        FROM (
+            SELECT c.zoom, c.cell_x, c.cell_y,
+                   count(*) AS count, sum(c.x) AS sum_x, sum(c.y) AS sum_y
+            FROM old_rows, public.geo_cluster_cells(old_rows.geom) AS c
+            GROUP BY c.zoom, c.cell_x, c.cell_y
+        ) AS removed
+        WHERE cluster.layer = TG_TABLE_NAME
+            AND cluster.zoom = removed.zoom
+            AND cluster.cell_x = removed.cell_x
+            AND cluster.cell_y = removed.cell_y;
+        DELETE FROM geo.feature_clusters
+        WHERE layer = TG_TABLE_NAME AND count <= 0;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO geo.feature_clusters AS cluster
+            (layer, zoom, cell_x, cell_y, count, sum_x, sum_y)
+        SELECT TG_TABLE_NAME, c.zoom, c.cell_x, c.cell_y,
+               count(*), sum(c.x), sum(c.y)
+        FROM new_rows, public.geo_cluster_cells(new_rows.geom) AS c
+        GROUP BY c.zoom, c.cell_x, c.cell_y
+        ON CONFLICT (layer, zoom, cell_x, cell_y) DO UPDATE
+        SET count = cluster.count + excluded.count,
+            sum_x = cluster.sum_x + excluded.sum_x,
+            sum_y = cluster.sum_y + excluded.sum_y;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+CLUSTERS_TABLE = """
+CREATE TABLE IF NOT EXISTS geo.feature_clusters (
+    layer text NOT NULL,
+    zoom smallint NOT NULL,
+    cell_x integer NOT NULL,
+    cell_y integer NOT NULL,
+    count integer NOT NULL,
+    sum_x float8 NOT NULL,
+    sum_y float8 NOT NULL,
+    PRIMARY KEY (layer, zoom, cell_x, cell_y)
+)
+"""
+# Keeps the removal of emptied cells from scanning the layer's cells.
+EMPTY_CLUSTERS_INDEX = (
+    'CREATE INDEX IF NOT EXISTS ix_feature_clusters_empty '
+    'ON geo.feature_clusters (layer) WHERE count <= 0'
+)
+
+TRIGGERS = {
+    'geo_cluster_change_insert': 'AFTER INSERT ON {table} '
+    'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT',
+    'geo_cluster_change_update': 'AFTER UPDATE ON {table} '
+    'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT',
+    'geo_cluster_change_delete': 'AFTER DELETE ON {table} '
+    'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT',
+    'geo_cluster_change_truncate': 'AFTER TRUNCATE ON {table} FOR EACH STATEMENT',
+}
+
+
+def _for_existing_table(table: str, statements: list[str]) -> str:
+    """Wraps statements so they only run if the table exists."""
+    body = '\n'.join(
+        "        EXECUTE '{}';".format(statement.replace("'", "''"))
+        for statement in statements
+    )
+    return f"""
+DO $$
+BEGIN
+    IF to_regclass('{table}') IS NOT NULL THEN
+{body}
+    END IF;
+END;
+$$;
+"""
+
+
+def _backfill(name: str) -> str:
+    """Builds the statement filling the clusters of an existing layer."""
+    return (
+        'INSERT INTO geo.feature_clusters '
+        '(layer, zoom, cell_x, cell_y, count, sum_x, sum_y) '
+        f"SELECT '{name}', c.zoom, c.cell_x, c.cell_y, count(*), sum(c.x), sum(c.y) "
+        f'FROM geo.{name}, public.geo_cluster_cells(geo.{name}.geom) AS c '
+        'GROUP BY c.zoom, c.cell_x, c.cell_y'
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(CELLS_FUNCTION)
+    op.execute(
+        """
+DO $$
+BEGIN
+    IF to_regnamespace('geo') IS NOT NULL THEN
+        EXECUTE '{}';
+        EXECUTE '{}';
+    END IF;
+END;
+$$;
+""".format(CLUSTERS_TABLE, EMPTY_CLUSTERS_INDEX)
+    )
+    op.execute(CHANGE_FUNCTION)
+    for name in CLUSTER_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    f'DROP TRIGGER IF EXISTS {trigger} ON {table}'
+                    for trigger in TRIGGERS
+                ]
+                + [f"DELETE FROM geo.feature_clusters WHERE layer = '{name}'"]
+                + [_backfill(name)]
+                + [
+                    f'CREATE TRIGGER {trigger} {timing.format(table=table)} '
+                    'EXECUTE FUNCTION public.geo_cluster_change()'
+                    for trigger, timing in TRIGGERS.items()
+                ],
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in CLUSTER_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    f'DROP TRIGGER IF EXISTS {trigger} ON {table}'
+                    for trigger in TRIGGERS
+                ],
+            )
+        )
+    op.execute('DROP TABLE IF EXISTS geo.feature_clusters')
+    op.execute('DROP FUNCTION IF EXISTS public.geo_cluster_change()')
+    op.execute('DROP FUNCTION IF EXISTS public.geo_cluster_cells(geometry)')
@@ -0,0 +1,32 @@
+"""Index lowercased user emails
+
+Revision ID: 8c3e5a1f7d26
+Revises: 4e8b2c6d1a39
+Create Date: 2026-10-18 21:02:11.730415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3e5a1f7d26'
+down_revision: Union[str, Sequence[str], None] = '4e8b2c6d1a39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails on emails that differ only in case, which must be merged first.
+    op.execute('UPDATE users SET email = lower(email) WHERE email <> lower(email)')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.create_index('ix_users_email', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_email', table_name='users')
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
@@ -0,0 +1,65 @@
+"""Add geo spatial indexes
+
+Revision ID: b7e41d9c3a25
+Revises: 8c3b5f1a2d64
+Create Date: 2026-10-18 15:02:44.271930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e41d9c3a25'
+down_revision: Union[str, Sequence[str], None] = '8c3b5f1a2d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LAYER_TABLES = ('attraction', 'museum', 'park', 'boundary')
+
+# Index key expressions, and the same expressions as pg_indexes shows them.
+# `geom` serves bbox filters and tiles; `(geom::geography)` serves KNN
+# ordering and radius searches in meters, see FeatureCRUD.nearest_query.
+INDEXES = {
+    'ix_{name}_geom': ('(geom)', '(geom)'),
+    'ix_{name}_geog': ('((geom::geography))', '(((geom)::geography))'),
+}
+
+# The data pipeline may already index `geom` under another name.
+CREATE_IF_NOT_INDEXED = """
+DO $$
+BEGIN
+    IF to_regclass('{table}') IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE schemaname = 'geo' AND tablename = '{name}'
+            AND indexdef LIKE '%USING gist {indexed}%'
+    ) THEN
+        EXECUTE 'CREATE INDEX IF NOT EXISTS {index} ON {table} USING gist {key}';
+    END IF;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name in LAYER_TABLES:
+        table = f'geo.{name}'
+        for index, (key, indexed) in INDEXES.items():
+            op.execute(
+                CREATE_IF_NOT_INDEXED.format(
+                    table=table,
+                    name=name,
+                    index=index.format(name=name),
+                    key=key,
+                    indexed=indexed,
+                )
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in LAYER_TABLES:
+        for index in INDEXES:
+            op.execute(f'DROP INDEX IF EXISTS geo.{index.format(name=name)}')
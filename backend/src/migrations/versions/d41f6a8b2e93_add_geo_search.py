@@ -0,0 +1,98 @@
+"""Add geo search
+
+Revision ID: d41f6a8b2e93
+Revises: b7e41d9c3a25
+Create Date: 2026-10-18 16:37:12.845306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f6a8b2e93'
+down_revision: Union[str, Sequence[str], None] = 'b7e41d9c3a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TABLES = ('attraction', 'museum', 'park')
+TRIGGER = 'geo_search_vector_update'
+
+# Names weigh more than descriptions in the rank.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce({row}description, '')), 'B')"
+)
+
+UPDATE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION public.geo_search_vector_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')};
+    RETURN NEW;
+END;
+$$;
+"""
+
+
+def _for_existing_table(table: str, statements: list[str]) -> str:
+    """Wraps statements so they only run if the layer table exists."""
+    body = '\n'.join(
+        "        EXECUTE '{}';".format(statement.replace("'", "''"))
+        for statement in statements
+    )
+    return f"""
+DO $$
+BEGIN
+    IF to_regclass('{table}') IS NOT NULL THEN
+{body}
+    END IF;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(UPDATE_FUNCTION)
+    for name in SEARCH_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS '
+                    'search_vector tsvector',
+                    f'UPDATE {table} SET search_vector = '
+                    f"{SEARCH_VECTOR.format(row='')}",
+                    f'DROP TRIGGER IF EXISTS {TRIGGER} ON {table}',
+                    f'CREATE TRIGGER {TRIGGER} '
+                    f'BEFORE INSERT OR UPDATE OF name, description ON {table} '
+                    'FOR EACH ROW EXECUTE FUNCTION public.geo_search_vector_update()',
+                    f'CREATE INDEX IF NOT EXISTS ix_{name}_search_vector '
+                    f'ON {table} USING gin (search_vector)',
+                    f'CREATE INDEX IF NOT EXISTS ix_{name}_name_trgm '
+                    f'ON {table} USING gin (lower(name) gin_trgm_ops)',
+                ],
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in SEARCH_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    f'DROP TRIGGER IF EXISTS {TRIGGER} ON {table}',
+                    f'DROP INDEX IF EXISTS geo.ix_{name}_name_trgm',
+                    f'DROP INDEX IF EXISTS geo.ix_{name}_search_vector',
+                    f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector',
+                ],
+            )
+        )
+    op.execute('DROP FUNCTION IF EXISTS public.geo_search_vector_update()')
@@ -0,0 +1,177 @@
+"""Add geo generalization
+
+Revision ID: f2a9c7e1b4d8
+Revises: d41f6a8b2e93
+Create Date: 2026-10-18 18:05:51.390127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c7e1b4d8'
+down_revision: Union[str, Sequence[str], None] = 'd41f6a8b2e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GENERALIZED_TABLES = ('park', 'boundary')
+# Simplification tolerances in degrees, coarsest last. Must match
+# GENERALIZATION_LEVELS in modules/features/generalization.py and the
+# scale ranges of the mapfile layers.
+LEVELS = ((1, 0.0001), (2, 0.0005), (3, 0.002), (4, 0.01))
+
+LEVELS_FUNCTION = """
+CREATE OR REPLACE FUNCTION public.geo_generalization_levels()
+RETURNS TABLE (level integer, tolerance float8)
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    VALUES {values}
+$$;
+""".format(values=', '.join(f'({level}, {tolerance})' for level, tolerance in LEVELS))
+
+# Features smaller than the tolerance are left out of a level, as they
+# would render below one pixel.
+GENERALIZE_SELECT = """
+SELECT l.level, s.id, ST_SimplifyPreserveTopology(s.geom, l.tolerance)
+FROM {source} AS s, public.geo_generalization_levels() AS l
+WHERE s.geom IS NOT NULL AND greatest(
+    ST_XMax(s.geom) - ST_XMin(s.geom), ST_YMax(s.geom) - ST_YMin(s.geom)
+) >= l.tolerance
+"""
+
+# Updated features whose geometry did not change keep their versions.
+CHANGED_OLD_ROWS = (
+    'SELECT o.id FROM old_rows AS o LEFT JOIN new_rows AS n ON n.id = o.id '
+    'WHERE n.id IS NULL OR n.geom IS DISTINCT FROM o.geom'
+)
+CHANGED_NEW_ROWS = (
+    '(SELECT n.id, n.geom FROM new_rows AS n LEFT JOIN old_rows AS o ON o.id = n.id '
+    'WHERE o.id IS NULL OR o.geom IS DISTINCT FROM n.geom)'
+)
+UPSERT = (
+    'INSERT INTO %s (level, id, geom) {select} '
+    'ON CONFLICT (level, id) DO UPDATE SET geom = excluded.geom'
+)
+
+# Only the changed features are generalized again.
+CHANGE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION public.geo_generalize_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    generalized text := format('%I.%I', TG_TABLE_SCHEMA, TG_TABLE_NAME || '_generalized');
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        EXECUTE format('TRUNCATE %s', generalized);
+    ELSIF TG_OP = 'DELETE' THEN
+        EXECUTE format(
+            'DELETE FROM %s WHERE id IN (SELECT id FROM old_rows)', generalized
+        );
+    ELSIF TG_OP = 'UPDATE' THEN
+        EXECUTE format(
+            $sql$DELETE FROM %s WHERE id IN ({CHANGED_OLD_ROWS})$sql$, generalized
+        );
+        EXECUTE format(
+            $sql${UPSERT.format(select=GENERALIZE_SELECT.format(source=CHANGED_NEW_ROWS))}$sql$,
+            generalized
+        );
+    ELSE
+        EXECUTE format(
+            $sql${UPSERT.format(select=GENERALIZE_SELECT.format(source='new_rows'))}$sql$,
+            generalized
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+GENERALIZED_TABLE = """
+CREATE TABLE IF NOT EXISTS {table}_generalized (
+    level smallint NOT NULL,
+    id integer NOT NULL,
+    geom geometry(Geometry, 4326) NOT NULL,
+    PRIMARY KEY (level, id)
+)
+"""
+
+TRIGGERS = {
+    'geo_generalize_change_insert': 'AFTER INSERT ON {table} '
+    'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT',
+    'geo_generalize_change_update': 'AFTER UPDATE ON {table} '
+    'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT',
+    'geo_generalize_change_delete': 'AFTER DELETE ON {table} '
+    'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT',
+    'geo_generalize_change_truncate': 'AFTER TRUNCATE ON {table} FOR EACH STATEMENT',
+}
+
+
+def _for_existing_table(table: str, statements: list[str]) -> str:
+    """Wraps statements so they only run if the layer table exists."""
+    body = '\n'.join(
+        "        EXECUTE '{}';".format(statement.replace("'", "''"))
+        for statement in statements
+    )
+    return f"""
+DO $$
+BEGIN
+    IF to_regclass('{table}') IS NOT NULL THEN
+{body}
+    END IF;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(LEVELS_FUNCTION)
+    op.execute(CHANGE_FUNCTION)
+    for name in GENERALIZED_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    GENERALIZED_TABLE.format(table=table),
+                    # One index per level, as every query reads a single level.
+                    *(
+                        f'CREATE INDEX IF NOT EXISTS ix_{name}_generalized_{level} '
+                        f'ON {table}_generalized USING gist (geom) '
+                        f'WHERE level = {level}'
+                        for level, _ in LEVELS
+                    ),
+                    f'TRUNCATE {table}_generalized',
+                    f'INSERT INTO {table}_generalized (level, id, geom) '
+                    + GENERALIZE_SELECT.format(source=table),
+                    f'ANALYZE {table}_generalized',
+                    *(
+                        f'DROP TRIGGER IF EXISTS {trigger} ON {table}'
+                        for trigger in TRIGGERS
+                    ),
+                    *(
+                        f'CREATE TRIGGER {trigger} {timing.format(table=table)} '
+                        'EXECUTE FUNCTION public.geo_generalize_change()'
+                        for trigger, timing in TRIGGERS.items()
+                    ),
+                ],
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in GENERALIZED_TABLES:
+        table = f'geo.{name}'
+        op.execute(
+            _for_existing_table(
+                table,
+                [
+                    f'DROP TRIGGER IF EXISTS {trigger} ON {table}'
+                    for trigger in TRIGGERS
+                ],
+            )
+        )
+        op.execute(f'DROP TABLE IF EXISTS {table}_generalized')
+    op.execute('DROP FUNCTION IF EXISTS public.geo_generalize_change()')
+    op.execute('DROP FUNCTION IF EXISTS public.geo_generalization_levels()')
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import api from '@/services/api';
 
 export interface FeatureInfoData {
   id: string;
@@ -22,36 +23,29 @@ export function useFeatureInfo(
     const handleClick = async (evt: any) => {
       setFeatures(null);
       const view = map.getView();
-      const viewResolution = view.getResolution();
-      const projection = view.getProjection();
-      const activeLayers = layersStateRef.current.filter((l: any) => l.visible);
+      const activeLayers = layersStateRef.current
+        .filter((l: any) => l.visible && wmsLayersRef.current[l.id])
+        .map((l: any) => l.params.LAYERS);
+      if (activeLayers.length === 0) return;
       let allFeatures: FeatureInfoData[] = [];
-      for (const layerCfg of activeLayers) {
-        const wmsLayer = wmsLayersRef.current[layerCfg.id];
-        if (!wmsLayer) continue;
-        const wmsSource = wmsLayer.getSource();
-        const url = wmsSource?.getFeatureInfoUrl(evt.coordinate, viewResolution!, projection, {
-          INFO_FORMAT: 'geojson',
-          QUERY_LAYERS: layerCfg.params.LAYERS,
-          FEATURE_COUNT: 10,
+      try {
+        const response = await api.get('/features/info', {
+          params: {
+            x: evt.coordinate[0],
+            y: evt.coordinate[1],
+            resolution: view.getResolution(),
+            crs: view.getProjection().getCode(),
+            layers: activeLayers.join(','),
+            limit: 10,
+          },
         });
-        if (url) {
-          try {
-            const response = await fetch(url);
-            const data = await response.json();
-            if (data.features && data.features.length > 0) {
-              allFeatures.push(
-                ...data.features.map((f: any) => ({
-                  id: f.properties.id,
-                  name: f.properties.name,
-                  description: f.properties.description,
-                })),
-              );
-            }
-          } catch (e) {
-            // Можно добавить обработку ошибок
-          }
-        }
+        allFeatures = response.data.features.map((f: any) => ({
+          id: String(f.id),
+          name: f.properties.name,
+          description: f.properties.description,
+        }));
+      } catch (e) {
+        // Можно добавить обработку ошибок
       }
       setFeatures(allFeatures.length > 0 ? allFeatures : null);
       console.log('FeatureInfoPopup features:', allFeatures);